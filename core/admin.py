@@ -2,6 +2,8 @@ from django.contrib import admin
 from .models import (
     Korisnik,
     Prihod,
+    Izvod,
+    MjesecniSaldo,
     Faktura,
     StavkaFakture,
     SupportOdgovor,
@@ -10,6 +12,9 @@ from .models import (
     Uplatnica,
     Bilans,
     EmailInbox,
+    ParsiranIzvod,
+    InboxPosao,
+    InboxPrilog,
     SystemLog,
     FailedRequest,
     UserPreferences,
@@ -21,6 +26,9 @@ from .models import (
     Banka,
 )
 from django.utils.html import format_html
+from django.db.models import Count
+
+from .fakture import osvjezi_zbirove_nakon_commita
 
 # ============================================
 # OSNOVNI MODELI
@@ -68,6 +76,50 @@ class PrihodAdmin(admin.ModelAdmin):
     list_filter = ["mjesec", "datum_kreiranja"]
     search_fields = ["korisnik__ime"]
     date_hierarchy = "datum_kreiranja"
+    raw_id_fields = ["izvod"]
+
+
+@admin.register(MjesecniSaldo)
+class MjesecniSaldoAdmin(admin.ModelAdmin):
+    """Samo za pregled - salda održava core.salda"""
+
+    list_display = ["korisnik", "mjesec", "vrsta", "suma", "broj"]
+    list_filter = ["vrsta"]
+    search_fields = ["korisnik__ime", "mjesec"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Izvod)
+class IzvodAdmin(admin.ModelAdmin):
+    list_display = [
+        "naziv",
+        "korisnik",
+        "sha256",
+        "velicina",
+        "broj_transakcija",
+        "datum_kreiranja",
+    ]
+    search_fields = ["naziv", "sha256", "korisnik__ime"]
+    readonly_fields = ["korisnik", "sha256", "fajl", "velicina", "datum_kreiranja"]
+
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("korisnik")
+            .annotate(_broj=Count("transakcije"))
+        )
+
+    def broj_transakcija(self, obj):
+        return obj._broj
+
+    broj_transakcija.short_description = "Transakcija"
+    broj_transakcija.admin_order_field = "_broj"
 
 
 # ============================================
@@ -161,9 +213,10 @@ class FakturaAdmin(admin.ModelAdmin):
 
     readonly_fields = ["ukupno_bez_pdv", "pdv_iznos", "ukupno_sa_pdv"]
 
-    def save_model(self, request, obj, form, change):
-        super().save_model(request, obj, form, change)
-        obj.izracunaj_ukupno()
+    def save_related(self, request, form, formsets, change):
+        # Stavke iz inline-a i sama faktura - jedan obračun zbirova po čuvanju
+        super().save_related(request, form, formsets, change)
+        osvjezi_zbirove_nakon_commita(form.instance.pk)
 
 
 @admin.register(StavkaFakture)
@@ -420,6 +473,53 @@ class FailedRequestAdmin(admin.ModelAdmin):
     date_hierarchy = "timestamp"
 
 
+@admin.register(ParsiranIzvod)
+class ParsiranIzvodAdmin(admin.ModelAdmin):
+    list_display = [
+        "pdf_hash",
+        "verzija_parsera",
+        "velicina",
+        "datum_kreiranja",
+        "posljednje_koristenje",
+    ]
+    list_filter = ["verzija_parsera"]
+    search_fields = ["pdf_hash"]
+    readonly_fields = ["pdf_hash", "verzija_parsera", "rezultat", "velicina"]
+
+
+class InboxPrilogInline(admin.TabularInline):
+    model = InboxPrilog
+    extra = 0
+    readonly_fields = ["naziv", "fajl", "obradjen"]
+
+
+@admin.register(InboxPosao)
+class InboxPosaoAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "korisnik",
+        "status",
+        "pokusaji",
+        "sljedeci_pokusaj",
+        "datum_kreiranja",
+    ]
+    list_filter = ["status", "datum_kreiranja"]
+    search_fields = ["korisnik__ime", "korisnik__jib", "from_email", "subject"]
+    date_hierarchy = "datum_kreiranja"
+    readonly_fields = ["message_id", "greska", "datum_kreiranja", "datum_zavrsetka"]
+    inlines = [InboxPrilogInline]
+    actions = ["ponovi"]
+
+    @admin.action(description="Vrati u red za obradu")
+    def ponovi(self, request, queryset):
+        from django.utils import timezone
+
+        broj = queryset.exclude(status="zavrsen").update(
+            status="na_cekanju", pokusaji=0, sljedeci_pokusaj=timezone.now()
+        )
+        self.message_user(request, f"{broj} poslova vraćeno u red")
+
+
 # ============================================
 # ENHANCED MODELI
 # ============================================
@@ -0,0 +1,76 @@
+"""
+Keš izračunatog dashboarda po korisniku.
+
+Ključ je (korisnik, filter godine), a vrijednost nosi verziju podataka
+korisnika i globalnu verziju (sistemski parametri) za koje je izračunata.
+Čitanje je jedan `get_many` - verzije i vrijednost odjednom - pa ponovljeni
+prikaz dashboarda ne ide u bazu po brojke. Vrijednost sa starom verzijom se
+ignoriše.
+
+Signali u core.signals nakon commit-a mijenjaju verziju korisnika (Prihod,
+Faktura, Uplatnica, EmailInbox, Korisnik) ili globalnu verziju
+(SistemskiParametri). Masovni uvoz (core.uvoz) ne šalje signale, pa verziju
+mijenja sam. Radi sa bilo kojim Django cache backendom.
+"""
+
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+GLOBALNA = "dashboard:verzija"
+
+
+def _ttl():
+    return getattr(settings, "DASHBOARD_CACHE_TTL", 3600)
+
+
+def _kljuc_verzije(korisnik_id):
+    return f"dashboard:verzija:{korisnik_id}"
+
+
+def _kljuc(korisnik_id, godina_filter):
+    return f"dashboard:{korisnik_id}:{godina_filter}"
+
+
+def _verzija(kljuc, procitano):
+    """Pročitana verzija, ili nova ako je nema u kešu"""
+    verzija = procitano.get(kljuc)
+    if verzija is None:
+        verzija = uuid.uuid4().hex
+        if not cache.add(kljuc, verzija, None):
+            verzija = cache.get(kljuc)
+    return verzija
+
+
+def dashboard_kesirano(korisnik_id, godina_filter, izracunaj):
+    """Vraća keširanu vrijednost ili je računa pozivom `izracunaj()`"""
+    kljuc = _kljuc(korisnik_id, godina_filter)
+    kljuc_verzije = _kljuc_verzije(korisnik_id)
+    procitano = cache.get_many([kljuc, kljuc_verzije, GLOBALNA])
+
+    verzije = (_verzija(kljuc_verzije, procitano), _verzija(GLOBALNA, procitano))
+    unos = procitano.get(kljuc)
+    if unos and unos[0] == verzije:
+        return unos[1]
+
+    # Verzije su pročitane prije računanja: ako se podaci promijene u
+    # međuvremenu, ova vrijednost je već zastarjela i neće se koristiti
+    vrijednost = izracunaj()
+    cache.set(kljuc, (verzije, vrijednost), _ttl())
+    return vrijednost
+
+
+def zastarjelo(*korisnik_ids):
+    """Nova verzija za korisnike nakon commit-a (stari dashboard se ignoriše)"""
+    kljucevi = {_kljuc_verzije(k) for k in korisnik_ids if k}
+    if kljucevi:
+        transaction.on_commit(
+            lambda: cache.set_many({k: uuid.uuid4().hex for k in kljucevi}, None)
+        )
+
+
+def sve_zastarjelo():
+    """Nova globalna verzija - dashboard svih korisnika se ponovo računa"""
+    transaction.on_commit(lambda: cache.set(GLOBALNA, uuid.uuid4().hex, None))
@@ -0,0 +1,162 @@
+"""
+Kreiranje fakture sa stavkama u jednom koraku.
+
+StavkaFakture.save() nakon svake stavke ponovo računa zbirove fakture, što
+je u redu za izmjenu jedne stavke, ali nova faktura sa N stavki bi tako
+bila N ponovnih čitanja stavki i N+1 upisa fakture. `NovaFaktura` provjeri
+stavke i izračuna iznose stavki i zbirove u memoriji, pa upiše fakturu
+jednim INSERT-om i sve stavke jednim bulk_create.
+
+Izmjena postojećih stavki (admin inline, pojedinačni save()) ne računa
+zbirove odmah: `osvjezi_zbirove_nakon_commita` zapamti fakturu, a nakon
+commit-a se zbirovi svih zapamćenih faktura upišu jednim UPDATE-om sa
+SUM podupitima - jednom po transakciji, bez obzira na broj stavki.
+"""
+
+import threading
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+NULA = Decimal("0")
+MIN_KOLICINA = Decimal("0.01")
+
+
+def _broj(vrijednost, naziv, redni_broj):
+    """Decimal iz unosa forme ("1,5" -> 1.5)"""
+    try:
+        broj = Decimal(str(vrijednost).strip().replace(",", "."))
+    except InvalidOperation:
+        broj = None
+    if broj is None or not broj.is_finite():
+        raise ValidationError(f"Stavka {redni_broj}: neispravna {naziv} '{vrijednost}'")
+    return broj
+
+
+class NovaFaktura:
+    """
+    Nova faktura sa stavkama:
+
+        nova = NovaFaktura(request.user, broj_fakture="1/2025", ...)
+        nova.dodaj_stavku("Konsalting", kolicina="2", cijena="150,00")
+        faktura = nova.sacuvaj()
+    """
+
+    def __init__(self, user, **podaci):
+        self.user = user
+        self.podaci = podaci
+        self.stavke = []
+
+    def dodaj_stavku(
+        self, opis, kolicina, cijena, jedinica="unit", pdv_stopa=0, redni_broj=None
+    ):
+        """Provjerava i dodaje stavku (ValidationError za neispravan unos)"""
+        from .models import StavkaFakture
+
+        redni_broj = redni_broj or len(self.stavke) + 1
+        opis = (opis or "").strip()
+        if not opis:
+            raise ValidationError(f"Stavka {redni_broj}: opis je obavezan")
+
+        kolicina = _broj(kolicina, "količina", redni_broj)
+        cijena = _broj(cijena, "cijena", redni_broj)
+        if kolicina < MIN_KOLICINA:
+            raise ValidationError(f"Stavka {redni_broj}: količina mora biti veća od 0")
+        if cijena < NULA:
+            raise ValidationError(f"Stavka {redni_broj}: cijena ne može biti negativna")
+
+        stavka = StavkaFakture(
+            redni_broj=redni_broj,
+            opis=opis[:500],
+            jedinica_mjere=jedinica or "unit",
+            kolicina=kolicina,
+            cijena_po_jedinici=cijena,
+            pdv_stopa=int(pdv_stopa or 0),
+        )
+        stavka.izracunaj()
+        self.stavke.append(stavka)
+        return stavka
+
+    def sacuvaj(self):
+        """Upisuje fakturu (jedan INSERT) i stavke (bulk_create); vraća Fakturu"""
+        from .models import Faktura, StavkaFakture
+
+        ukupno_bez_pdv = sum((s.ukupna_cijena for s in self.stavke), NULA)
+        pdv_iznos = sum((s.pdv_iznos for s in self.stavke), NULA)
+
+        with transaction.atomic():
+            faktura = Faktura.objects.create(
+                user=self.user,
+                **self.podaci,
+                ukupno_bez_pdv=ukupno_bez_pdv,
+                pdv_iznos=pdv_iznos,
+                ukupno_sa_pdv=ukupno_bez_pdv + pdv_iznos,
+            )
+            for stavka in self.stavke:
+                stavka.faktura = faktura
+            StavkaFakture.objects.bulk_create(self.stavke, batch_size=500)
+
+        return faktura
+
+
+# ============================================
+# ZBIROVI POSTOJEĆIH FAKTURA
+# ============================================
+
+_na_cekanju = threading.local()
+
+
+def _zbir_stavki(polje):
+    from .models import StavkaFakture
+
+    return Coalesce(
+        Subquery(
+            StavkaFakture.objects.filter(faktura=OuterRef("pk"))
+            .order_by()
+            .values("faktura")
+            .annotate(s=Sum(polje))
+            .values("s")
+        ),
+        Value(NULA),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def osvjezi_zbirove(faktura_ids):
+    """Zbirovi faktura iz njihovih stavki - jedan UPDATE za sve fakture"""
+    from .models import Faktura
+
+    faktura_ids = {f for f in faktura_ids if f}
+    if not faktura_ids:
+        return 0
+    bez_pdv = _zbir_stavki("ukupna_cijena")
+    pdv = _zbir_stavki("pdv_iznos")
+    return Faktura.objects.filter(pk__in=faktura_ids).update(
+        ukupno_bez_pdv=bez_pdv,
+        pdv_iznos=pdv,
+        ukupno_sa_pdv=bez_pdv + pdv,
+        updated_at=timezone.now(),
+    )
+
+
+def _osvjezi_na_cekanju():
+    faktura_ids = getattr(_na_cekanju, "ids", None)
+    _na_cekanju.ids = set()
+    if faktura_ids:
+        osvjezi_zbirove(faktura_ids)
+
+
+def osvjezi_zbirove_nakon_commita(faktura_id):
+    """
+    Zbirovi fakture se osvježe nakon commit-a; više zahtjeva u istoj
+    transakciji daje jedan UPDATE (van transakcije - odmah)
+    """
+    if not hasattr(_na_cekanju, "ids"):
+        _na_cekanju.ids = set()
+    _na_cekanju.ids.add(faktura_id)
+    # Prvi callback osvježi sve zapamćene fakture, ostali nemaju šta da rade
+    transaction.on_commit(_osvjezi_na_cekanju)
@@ -0,0 +1,214 @@
+"""
+Izvoz više faktura kao ZIP arhiva koja se šalje dok nastaje.
+
+Fakture se čitaju iteratorom (stavke jednim upitom po grupi faktura), a
+dokumenti se renderuju u ograničenom pool-u procesa - najviše
+`FAKTURE_IZVOZ_U_TOKU` po workeru istovremeno. Izdate i plaćene fakture
+sa već sačuvanim dokumentom (core.fakture_skladiste) se ne renderuju, a
+novorenderovane se sačuvaju za sljedeća preuzimanja.
+
+ZIP se piše u pseudo-fajl koji se isprazni nakon svakog dokumenta, pa u
+memoriji nikad nije cijela arhiva - samo dokumenti u obradi i centralni
+direktorij arhive (nekoliko desetina bajtova po fakturi).
+"""
+
+import os
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from . import fakture_skladiste
+
+# Stavke učitane za grupu faktura (Prefetch to_attr)
+_STAVKE = "stavke_izvoza"
+
+# DOCX i PDF su već kompresovani
+_BEZ_KOMPRESIJE = ("docx", "pdf")
+
+
+def _broj_workera():
+    return getattr(settings, "FAKTURE_IZVOZ_WORKERS", min(4, os.cpu_count() or 1))
+
+
+def _u_toku_po_workeru():
+    return getattr(settings, "FAKTURE_IZVOZ_U_TOKU", 2)
+
+
+def _pripremi_workera():
+    """Initializer workera - Django je potreban za šablon DOC fakture"""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _renderuj(faktura, stavke, oblik):
+    """Renderuje jednu fakturu - izvršava se u worker procesu"""
+    return fakture_skladiste.renderuj(faktura, oblik, stavke).getvalue()
+
+
+def _fakture_sa_stavkama(fakture):
+    from .models import StavkaFakture
+
+    stavke = StavkaFakture.objects.only(
+        "faktura_id",
+        "redni_broj",
+        "opis",
+        "jedinica_mjere",
+        "kolicina",
+        "cijena_po_jedinici",
+        "ukupna_cijena",
+    )
+    return fakture.prefetch_related(
+        Prefetch("stavke", queryset=stavke, to_attr=_STAVKE)
+    ).iterator(chunk_size=100)
+
+
+def _preuzmi_stavke(faktura):
+    # Stavke se šalju workeru odvojeno, bez duplikata u pickle-u fakture
+    stavke = getattr(faktura, _STAVKE)
+    delattr(faktura, _STAVKE)
+    return stavke
+
+
+def _zavrseni(u_toku, oblik):
+    """Čeka bar jedan renderovan dokument i vraća sve gotove"""
+    gotovi, _ = wait(u_toku, return_when=FIRST_COMPLETED)
+    for future in gotovi:
+        faktura = u_toku.pop(future)
+        try:
+            sadrzaj = future.result()
+        except BrokenProcessPool:
+            yield faktura, None, "Worker izvoza je neočekivano prekinut"
+            continue
+        except Exception as e:
+            yield faktura, None, str(e)
+            continue
+        fakture_skladiste.sacuvaj_dokument(faktura, oblik, sadrzaj)
+        yield faktura, sadrzaj, None
+
+
+def dokumenti(fakture, oblik, max_workers=None):
+    """
+    Generator (faktura, bytes, greska) za sve fakture iz queryset-a, redom
+    kojim su dokumenti gotovi; greška jedne fakture ne prekida ostale
+    (tada je bytes None)
+    """
+    if max_workers is None:
+        max_workers = _broj_workera()
+
+    # Isključen pool - renderovanje u ovom procesu
+    if max_workers <= 1:
+        for faktura in _fakture_sa_stavkama(fakture):
+            stavke = _preuzmi_stavke(faktura)
+            sacuvan = fakture_skladiste.sacuvan_dokument(faktura, oblik)
+            if sacuvan is not None:
+                with sacuvan:
+                    yield faktura, sacuvan.read(), None
+                continue
+            try:
+                sadrzaj = _renderuj(faktura, stavke, oblik)
+            except Exception as e:
+                yield faktura, None, str(e)
+                continue
+            fakture_skladiste.sacuvaj_dokument(faktura, oblik, sadrzaj)
+            yield faktura, sadrzaj, None
+        return
+
+    najvise_u_toku = max_workers * _u_toku_po_workeru()
+    pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_pripremi_workera)
+    u_toku = {}
+    try:
+        for faktura in _fakture_sa_stavkama(fakture):
+            stavke = _preuzmi_stavke(faktura)
+            sacuvan = fakture_skladiste.sacuvan_dokument(faktura, oblik)
+            if sacuvan is not None:
+                with sacuvan:
+                    yield faktura, sacuvan.read(), None
+                continue
+
+            u_toku[pool.submit(_renderuj, faktura, stavke, oblik)] = faktura
+            if len(u_toku) >= najvise_u_toku:
+                yield from _zavrseni(u_toku, oblik)
+
+        while u_toku:
+            yield from _zavrseni(u_toku, oblik)
+    finally:
+        # Klijent je prekinuo preuzimanje - ne renderujemo ostatak
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+# ============================================
+# ZIP STREAM
+# ============================================
+
+
+class _Bafer:
+    """Pseudo-fajl za zipfile - skuplja upisano dok se ne isprazni"""
+
+    def __init__(self):
+        self.dijelovi = []
+
+    def write(self, podaci):
+        self.dijelovi.append(bytes(podaci))
+        return len(podaci)
+
+    def flush(self):
+        pass
+
+    def isprazni(self):
+        podaci = b"".join(self.dijelovi)
+        self.dijelovi.clear()
+        return podaci
+
+
+def _naziv_u_arhivi(faktura, oblik, nazivi):
+    naziv = fakture_skladiste.naziv_fajla(faktura, oblik)
+    if naziv in nazivi:
+        # "1/2025" i "1-2025" daju isti naziv fajla - dodaje se id
+        osnova, ekstenzija = naziv.rsplit(".", 1)
+        naziv = f"{osnova}_{faktura.pk}.{ekstenzija}"
+    nazivi.add(naziv)
+    return naziv
+
+
+def zip_stream(fakture, oblik, max_workers=None):
+    """Generator bytes dijelova ZIP arhive sa dokumentima faktura"""
+    kompresija = (
+        zipfile.ZIP_STORED if oblik in _BEZ_KOMPRESIJE else zipfile.ZIP_DEFLATED
+    )
+    bafer = _Bafer()
+    nazivi = set()
+    greske = []
+
+    with zipfile.ZipFile(bafer, "w", compression=kompresija) as arhiva:
+        for faktura, sadrzaj, greska in dokumenti(fakture, oblik, max_workers):
+            if greska:
+                greske.append(f"{faktura.broj_fakture}: {greska}")
+                continue
+            info = zipfile.ZipInfo(
+                _naziv_u_arhivi(faktura, oblik, nazivi),
+                date_time=timezone.localtime(faktura.updated_at).timetuple()[:6],
+            )
+            info.compress_type = kompresija
+            arhiva.writestr(info, sadrzaj)
+            yield bafer.isprazni()
+
+        if greske:
+            arhiva.writestr("GRESKE.txt", "\n".join(greske))
+    yield bafer.isprazni()
+
+
+def zip_odgovor(naziv_fajla, fakture, oblik):
+    """StreamingHttpResponse sa ZIP arhivom dokumenata faktura"""
+    odgovor = StreamingHttpResponse(
+        zip_stream(fakture, oblik), content_type="application/zip"
+    )
+    odgovor["Content-Disposition"] = f'attachment; filename="{naziv_fajla}"'
+    return odgovor
@@ -0,0 +1,135 @@
+"""
+Renderovani dokumenti faktura (DOC/HTML, DOCX, PDF) i njihov keš.
+
+Ključ dokumenta je (faktura, updated_at, format): svaka izmjena fakture ili
+stavki pomjera updated_at (core.fakture osvježava i njega), pa stari
+dokument više nije ključ ni za šta. Izdate i plaćene fakture se više ne
+mijenjaju - njihov dokument se renderuje jednom, čuva u storage-u i
+servira direktno iz fajla. Nacrti se renderuju na zahtjev.
+
+ETag se računa iz istog ključa, bez renderovanja i bez čitanja storage-a,
+pa ponovljeno preuzimanje sa If-None-Match dobija 304.
+"""
+
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+# Povećati kada se promijeni izgled dokumenata - stari keš se ne koristi
+VERZIJA_RENDERERA = 1
+
+FOLDER = "fakture"
+
+# Status fakture čiji se dokument više ne mijenja
+NEPROMJENLJIVE = ("issued", "paid")
+
+
+def _html(faktura, stavke=None):
+    from .utils import generate_invoice_doc
+
+    return BytesIO(generate_invoice_doc(faktura, stavke).encode("utf-8"))
+
+
+def _docx(faktura, stavke=None):
+    from .utils import generate_invoice_docx
+
+    return generate_invoice_docx(faktura, stavke)
+
+
+def _pdf(faktura, stavke=None):
+    from .utils import generate_invoice_pdf
+
+    return generate_invoice_pdf(faktura, stavke)
+
+
+# format: (ekstenzija, content type, renderer -> BytesIO)
+FORMATI = {
+    "doc": ("doc", "application/msword", _html),
+    "docx": (
+        "docx",
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        _docx,
+    ),
+    "pdf": ("pdf", "application/pdf", _pdf),
+}
+
+
+def _verzija(faktura):
+    return f"v{VERZIJA_RENDERERA}-{faktura.updated_at.strftime('%Y%m%d%H%M%S%f')}"
+
+
+def etag(faktura, format):
+    """ETag dokumenta - mijenja se sa svakom izmjenom fakture"""
+    return f'"faktura-{faktura.pk}-{_verzija(faktura)}-{format}"'
+
+
+def naziv_fajla(faktura, format):
+    return f'faktura_{faktura.broj_fakture.replace("/", "-")}.{FORMATI[format][0]}'
+
+
+def _folder(faktura_id):
+    return f"{FOLDER}/{faktura_id}"
+
+
+def _putanja(faktura, format):
+    return f"{_folder(faktura.pk)}/{_verzija(faktura)}.{FORMATI[format][0]}"
+
+
+def renderuj(faktura, format, stavke=None):
+    """Dokument fakture kao BytesIO, bez keša (`stavke` - već učitane stavke)"""
+    return FORMATI[format][2](faktura, stavke)
+
+
+def sacuvan_dokument(faktura, format):
+    """Otvoren sačuvan dokument izdate/plaćene fakture, ili None"""
+    if faktura.status not in NEPROMJENLJIVE:
+        return None
+    putanja = _putanja(faktura, format)
+    if default_storage.exists(putanja):
+        return default_storage.open(putanja, "rb")
+    return None
+
+
+def sacuvaj_dokument(faktura, format, sadrzaj):
+    """Čuva renderovan dokument izdate/plaćene fakture (ostale ne)"""
+    if faktura.status not in NEPROMJENLJIVE:
+        return
+    putanja = _putanja(faktura, format)
+    sacuvano = default_storage.save(putanja, ContentFile(sadrzaj))
+    if sacuvano != putanja:
+        # Isti dokument je paralelno sačuvan u drugom requestu
+        default_storage.delete(sacuvano)
+    _pocisti(faktura.pk, zadrzi=putanja)
+
+
+def dokument(faktura, format):
+    """
+    Otvoren fajl dokumenta: za izdate/plaćene fakture iz storage-a (renderuje
+    se samo prvi put), za ostale renderovan na zahtjev
+    """
+    sacuvan = sacuvan_dokument(faktura, format)
+    if sacuvan is not None:
+        return sacuvan
+
+    sadrzaj = renderuj(faktura, format).getvalue()
+    sacuvaj_dokument(faktura, format, sadrzaj)
+    return BytesIO(sadrzaj)
+
+
+def _pocisti(faktura_id, zadrzi=None):
+    """Briše stare verzije dokumenata fakture (sve, ako `zadrzi` nije dat)"""
+    try:
+        _, fajlovi = default_storage.listdir(_folder(faktura_id))
+    except (FileNotFoundError, NotImplementedError):
+        return
+    verzija = zadrzi.rsplit("/", 1)[1].rsplit(".", 1)[0] if zadrzi else None
+    for fajl in fajlovi:
+        if verzija is None or not fajl.startswith(f"{verzija}."):
+            default_storage.delete(f"{_folder(faktura_id)}/{fajl}")
+
+
+def obrisi_dokumente(faktura_id):
+    """Briše sve dokumente fakture nakon commit-a (poziva se iz signala)"""
+    transaction.on_commit(lambda: _pocisti(faktura_id))
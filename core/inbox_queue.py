@@ -0,0 +1,249 @@
+"""
+Red poslova za dolazne emailove sa izvodima.
+
+`email_webhook` samo provjeri JIB, upiše posao i PDF priloge i odmah vrati
+202. Worker (`manage.py obradi_inbox`) preuzima poslove, parsira priloge i
+kreira EmailInbox zapise. Prolazne greške se ponavljaju sa eksponencijalnim
+backoff-om, a posao koji potroši sve pokušaje završava u FailedRequest.
+
+Preuzimanje posla je atomski UPDATE sa provjerom statusa i broja pokušaja,
+pa više workera može raditi istovremeno i na bazama bez SELECT FOR UPDATE.
+"""
+
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+
+def _max_pokusaja():
+    return getattr(settings, "INBOX_QUEUE_MAX_POKUSAJA", 5)
+
+
+def _backoff_sekundi():
+    return getattr(settings, "INBOX_QUEUE_BACKOFF_SECONDS", 30)
+
+
+def _zakljucavanje_sekundi():
+    return getattr(settings, "INBOX_QUEUE_LEASE_SECONDS", 300)
+
+
+def backoff(pokusaj):
+    """Čekanje prije sljedećeg pokušaja: baza * 2^(n-1), max 1h, uz jitter"""
+    osnova = min(_backoff_sekundi() * 2 ** (pokusaj - 1), 3600)
+    return timedelta(seconds=osnova * random.uniform(0.8, 1.2))
+
+
+# ============================================
+# UPIS (WEBHOOK)
+# ============================================
+
+
+def zakazi(korisnik_id, from_email, subject, prilozi, message_id=""):
+    """
+    Upisuje posao i priloge. `prilozi` su fajlovi iz core.prilozi (imaju
+    `sha256`); privremeni fajl se u storage premješta, ne kopira.
+    Vraća (posao, kreiran); ponovljena isporuka istog Message-ID vraća
+    postojeći posao.
+    """
+    from .models import InboxPosao, InboxPrilog
+
+    message_id = message_id[:255]
+    if message_id:
+        postojeci = InboxPosao.objects.filter(
+            korisnik_id=korisnik_id, message_id=message_id
+        ).first()
+        if postojeci:
+            return postojeci, False
+
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                posao = InboxPosao.objects.create(
+                    korisnik_id=korisnik_id,
+                    from_email=from_email[:255],
+                    subject=subject[:255],
+                    message_id=message_id,
+                )
+        except IntegrityError:
+            # Paralelna isporuka istog emaila je upisala posao između
+            # provjere i upisa (jedinstven korisnik + Message-ID)
+            if not message_id:
+                raise
+            return (
+                InboxPosao.objects.get(korisnik_id=korisnik_id, message_id=message_id),
+                False,
+            )
+
+        for fajl in prilozi:
+            InboxPrilog.objects.create(
+                posao=posao,
+                naziv=fajl.name,
+                fajl=fajl,
+                sha256=getattr(fajl, "sha256", ""),
+            )
+
+    return posao, True
+
+
+# ============================================
+# WORKER
+# ============================================
+
+
+def preuzmi(limit=10):
+    """Generator poslova spremnih za obradu, preuzetih za ovaj worker"""
+    from .models import InboxPosao
+
+    sada = timezone.now()
+    spremni = InboxPosao.objects.filter(
+        Q(status="na_cekanju", sljedeci_pokusaj__lte=sada)
+        # Worker koji je držao posao je pao - posao se vraća u red
+        | Q(status="u_obradi", zakljucano_do__lt=sada)
+    ).order_by("sljedeci_pokusaj")
+
+    for pk, status, pokusaji in spremni.values_list("pk", "status", "pokusaji")[
+        :limit
+    ]:
+        preuzet = InboxPosao.objects.filter(
+            pk=pk, status=status, pokusaji=pokusaji
+        ).update(
+            status="u_obradi",
+            pokusaji=pokusaji + 1,
+            zakljucano_do=timezone.now()
+            + timedelta(seconds=_zakljucavanje_sekundi()),
+        )
+        if preuzet:
+            yield InboxPosao.objects.select_related("korisnik__user").get(pk=pk)
+
+
+def obradi_sljedece(limit=10):
+    """Obradi do `limit` spremnih poslova - vraća (uspjesno, neuspjesno)"""
+    uspjesno = neuspjesno = 0
+    for posao in preuzmi(limit):
+        if obradi_posao(posao):
+            uspjesno += 1
+        else:
+            neuspjesno += 1
+    return uspjesno, neuspjesno
+
+
+def obradi_posao(posao):
+    """Obrađuje jedan preuzeti posao; vraća True ako je završen"""
+    try:
+        # Već obrađeni prilozi (iz ranijeg pokušaja) se preskaču
+        for prilog in posao.prilozi.filter(obradjen=False):
+            with transaction.atomic():
+                obradi_prilog(posao, prilog)
+                prilog.obradjen = True
+                prilog.save(update_fields=["obradjen"])
+    except Exception as e:
+        _neuspjeh(posao, e)
+        return False
+
+    posao.status = "zavrsen"
+    posao.datum_zavrsetka = timezone.now()
+    posao.zakljucano_do = None
+    posao.greska = ""
+    posao.save(
+        update_fields=["status", "datum_zavrsetka", "zakljucano_do", "greska"]
+    )
+    return True
+
+
+def _neuspjeh(posao, greska):
+    from .models import FailedRequest
+
+    posao.greska = f"{type(greska).__name__}: {greska}"
+    posao.zakljucano_do = None
+
+    if posao.pokusaji >= _max_pokusaja():
+        posao.status = "neuspjesan"
+        posao.datum_zavrsetka = timezone.now()
+        FailedRequest.objects.create(
+            user=posao.korisnik.user,
+            action="email_webhook",
+            error=f"Inbox posao #{posao.pk} ({posao.pokusaji} pokušaja): "
+            f"{posao.greska}",
+            retryable=False,
+        )
+        print(f"❌ Posao #{posao.pk} neuspješan nakon {posao.pokusaji} pokušaja")
+    else:
+        posao.status = "na_cekanju"
+        posao.sljedeci_pokusaj = timezone.now() + backoff(posao.pokusaji)
+        print(f"⚠️ Posao #{posao.pk} pokušaj {posao.pokusaji}: {posao.greska}")
+
+    posao.save(
+        update_fields=[
+            "status",
+            "greska",
+            "zakljucano_do",
+            "sljedeci_pokusaj",
+            "datum_zavrsetka",
+        ]
+    )
+
+
+def obradi_prilog(posao, prilog):
+    """
+    Parsira jedan PDF prilog i kreira EmailInbox (ako nije duplikat).
+    Parser čita sačuvani fajl direktno, a EmailInbox preuzima isti fajl.
+    """
+    from .izvodi_cache import hash_sadrzaja, parsiraj_kesirano
+    from .models import EmailInbox
+    from .parsers import prepoznaj_banku
+
+    korisnik = posao.korisnik
+    pdf_hash = prilog.sha256
+    if not pdf_hash:
+        with prilog.fajl.open("rb") as f:
+            pdf_hash = hash_sadrzaja(f)
+
+    if EmailInbox.objects.filter(korisnik=korisnik, pdf_hash=pdf_hash).exists():
+        print(f"⏭️ SKIP - Duplikat {prilog.naziv} (hash: {pdf_hash[:16]}...)")
+        fajl = prilog.fajl
+        transaction.on_commit(lambda: fajl.delete(save=False))
+        return None
+
+    banka = prepoznaj_banku(f"{posao.from_email} {posao.subject} {prilog.naziv}")
+
+    try:
+        with prilog.fajl.open("rb") as f:
+            rezultat = parsiraj_kesirano(f, pdf_hash=pdf_hash, banka=banka)
+    except Exception as e:
+        # Neispravan PDF se neće popraviti ponavljanjem - čuvamo ga bez transakcija
+        print(f"❌ Parser error ({prilog.naziv}): {str(e)}")
+        rezultat = {"banka": None, "transakcije": [], "pouzdanost": 0}
+
+    transakcije_json = [
+        {
+            "datum": t["datum"].strftime("%Y-%m-%d"),
+            "opis": t["opis"],
+            "iznos": float(t["iznos"]),
+            "tip": "prihod" if t["iznos"] > 0 else "rashod",
+            "partner": t.get("partner", ""),
+            "referenca": t.get("referenca", ""),
+        }
+        for t in rezultat["transakcije"]
+    ]
+
+    inbox = EmailInbox.objects.create(
+        korisnik=korisnik,
+        from_email=posao.from_email,
+        subject=posao.subject,
+        banka_naziv=rezultat["banka"] or banka or "Nepoznata banka",
+        pdf_fajl=prilog.fajl.name,
+        pdf_hash=pdf_hash,
+        transakcije_json=transakcije_json,
+        confidence=rezultat["pouzdanost"],
+        procesuirano=False,
+    )
+
+    print(
+        f"✅ Inbox ID={inbox.id} za {korisnik.ime}: {len(transakcije_json)} "
+        f"transakcija (pouzdanost {rezultat['pouzdanost']}%)"
+    )
+    return inbox
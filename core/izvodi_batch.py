@@ -0,0 +1,146 @@
+"""
+Paralelno parsiranje bankovnih izvoda.
+
+Fajlovi se šalju u ograničen pool procesa, a rezultati se vraćaju redom
+kojim se parsiranje završi. Svaki worker ima ograničenu memoriju, pa jedan
+neispravan ili ogroman PDF ne može srušiti cijeli upload.
+
+Već viđeni fajlovi (isti SHA256) se ne šalju workerima - rezultat dolazi iz
+keša (core.izvodi_cache), a keš se puni u glavnom procesu.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from django.conf import settings
+
+try:
+    import resource
+except ImportError:  # Windows nema resource modul
+    resource = None
+
+
+def _broj_workera():
+    return getattr(
+        settings, "IZVODI_PARSER_WORKERS", min(4, os.cpu_count() or 1)
+    )
+
+
+def _limit_memorije_mb():
+    return getattr(settings, "IZVODI_PARSER_MAX_MEMORY_MB", 512)
+
+
+def _ogranici_memoriju(limit_mb):
+    """Initializer workera - postavlja limit heap memorije procesa"""
+    if resource is None or not limit_mb:
+        return
+
+    limit = limit_mb * 1024 * 1024
+    try:
+        resource.setrlimit(resource.RLIMIT_DATA, (limit, limit))
+    except (ValueError, OSError):
+        # Hard limit sistema je niži - ostavljamo postojeći
+        pass
+
+
+def _greska(kljuc, poruka):
+    return {"kljuc": kljuc, "transakcije": [], "rezultat": None, "greska": poruka}
+
+
+def _parsiraj(kljuc, sadrzaj):
+    """Parsira jedan fajl - izvršava se u worker procesu"""
+    from .parsers import parsiraj
+
+    try:
+        rezultat = parsiraj(BytesIO(sadrzaj))
+    except MemoryError:
+        return _greska(kljuc, "Fajl prelazi dozvoljenu memoriju parsera")
+    except Exception as e:
+        return _greska(kljuc, str(e))
+
+    return {
+        "kljuc": kljuc,
+        "transakcije": rezultat["transakcije"],
+        "rezultat": rezultat,
+        "greska": None,
+    }
+
+
+def parsiraj_izvode(fajlovi, max_workers=None, limit_mb=None, kes=True):
+    """
+    Parsira listu izvoda i vraća rezultate kako koji fajl bude gotov.
+
+    `fajlovi` je lista parova (kljuc, bytes), gdje je kljuc bilo šta što
+    identifikuje fajl (naziv, indeks...). Za svaki fajl generator vraća dict
+    {"kljuc", "transakcije", "rezultat", "greska"} ("rezultat" je cijeli
+    rezultat parsers.parsiraj); greška jednog fajla ne prekida obradu
+    ostalih.
+    """
+    from . import izvodi_cache
+
+    hashevi = {}
+    if kes:
+        hashevi = {
+            kljuc: izvodi_cache.hash_sadrzaja(sadrzaj) for kljuc, sadrzaj in fajlovi
+        }
+        pogoci = izvodi_cache.procitaj_vise(hashevi.values())
+
+        za_parsiranje = []
+        for kljuc, sadrzaj in fajlovi:
+            rezultat = pogoci.get(hashevi[kljuc])
+            if rezultat is None:
+                za_parsiranje.append((kljuc, sadrzaj))
+            else:
+                yield {
+                    "kljuc": kljuc,
+                    "transakcije": rezultat["transakcije"],
+                    "rezultat": rezultat,
+                    "greska": None,
+                }
+        fajlovi = za_parsiranje
+
+    for rezultat in _parsiraj_sve(fajlovi, max_workers, limit_mb):
+        if kes and rezultat["rezultat"] is not None:
+            izvodi_cache.sacuvaj(hashevi[rezultat["kljuc"]], rezultat["rezultat"])
+        yield rezultat
+
+
+def _parsiraj_sve(fajlovi, max_workers, limit_mb):
+    if not fajlovi:
+        return
+
+    if max_workers is None:
+        max_workers = _broj_workera()
+    if limit_mb is None:
+        limit_mb = _limit_memorije_mb()
+
+    max_workers = min(max_workers, len(fajlovi))
+
+    # Jedan fajl ili isključen pool - nema smisla plaćati start procesa
+    if max_workers <= 1:
+        for kljuc, sadrzaj in fajlovi:
+            yield _parsiraj(kljuc, sadrzaj)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_ogranici_memoriju,
+        initargs=(limit_mb,),
+    ) as pool:
+        futures = {
+            pool.submit(_parsiraj, kljuc, sadrzaj): kljuc
+            for kljuc, sadrzaj in fajlovi
+        }
+
+        for future in as_completed(futures):
+            kljuc = futures[future]
+            try:
+                yield future.result()
+            except BrokenProcessPool:
+                # Worker je ubijen (npr. OOM killer) - ostali fajlovi u
+                # istom pool-u takođe padaju sa ovom greškom
+                yield _greska(kljuc, "Worker parsera je neočekivano prekinut")
+            except Exception as e:
+                yield _greska(kljuc, str(e))
@@ -0,0 +1,225 @@
+"""
+Keš rezultata parsiranja izvoda.
+
+Ključ je SHA256 sadržaja PDF-a i verzija parsera, pa isti bajtovi nisu
+parsirani dva puta: ponovni upload, ponovna potvrda ili reprocess vraćaju
+rezultat iz memorije procesa (mikrosekunde) ili iz baze, bez otvaranja PDF-a.
+Rezultat iz keša dijele svi pozivaoci i ne smije se mijenjati.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .parsers import VERZIJA_PARSERA, parsiraj
+
+# Datum korištenja u bazi osvježavamo najviše jednom u ovom periodu
+OSVJEZAVANJE_KORISTENJA = timedelta(hours=1)
+
+
+def hash_sadrzaja(pdf_file):
+    """SHA256 PDF-a (bytes ili fajl) - isti kao EmailInbox.pdf_hash"""
+    if isinstance(pdf_file, bytes):
+        return hashlib.sha256(pdf_file).hexdigest()
+
+    pdf_file.seek(0)
+    file_hash = hashlib.sha256()
+    for chunk in iter(lambda: pdf_file.read(4096), b""):
+        file_hash.update(chunk)
+    pdf_file.seek(0)
+    return file_hash.hexdigest()
+
+
+# ============================================
+# SERIJALIZACIJA
+# ============================================
+
+
+def _u_json(rezultat):
+    return {
+        **rezultat,
+        "transakcije": [
+            {**t, "datum": t["datum"].isoformat(), "iznos": str(t["iznos"])}
+            for t in rezultat["transakcije"]
+        ],
+    }
+
+
+def _iz_jsona(podaci):
+    return {
+        **podaci,
+        "transakcije": [
+            {
+                **t,
+                "datum": date.fromisoformat(t["datum"]),
+                "iznos": Decimal(t["iznos"]),
+            }
+            for t in podaci["transakcije"]
+        ],
+    }
+
+
+# ============================================
+# MEMORIJA PROCESA
+# ============================================
+
+
+class _LRU:
+    """Mali LRU keš sa lock-om (thread-safe za runserver/gunicorn threads)"""
+
+    def __init__(self):
+        self._podaci = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _kapacitet(self):
+        return getattr(settings, "IZVODI_CACHE_MEMORIJA", 256)
+
+    def get(self, kljuc):
+        with self._lock:
+            vrijednost = self._podaci.get(kljuc)
+            if vrijednost is not None:
+                self._podaci.move_to_end(kljuc)
+            return vrijednost
+
+    def set(self, kljuc, vrijednost):
+        with self._lock:
+            self._podaci[kljuc] = vrijednost
+            self._podaci.move_to_end(kljuc)
+            while len(self._podaci) > self._kapacitet():
+                self._podaci.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._podaci.clear()
+
+
+_memorija = _LRU()
+
+
+# ============================================
+# ČITANJE / UPIS
+# ============================================
+
+
+def procitaj_vise(hashevi):
+    """{pdf_hash: rezultat} za hasheve koji su u kešu - jedan upit na bazu"""
+    from .models import ParsiranIzvod
+
+    pronadjeni = {}
+    nedostaju = []
+    for pdf_hash in set(hashevi):
+        rezultat = _memorija.get(pdf_hash)
+        if rezultat is not None:
+            pronadjeni[pdf_hash] = rezultat
+        else:
+            nedostaju.append(pdf_hash)
+
+    if not nedostaju:
+        return pronadjeni
+
+    sada = timezone.now()
+    zastarjeli = []
+    for pk, pdf_hash, podaci, koristen in ParsiranIzvod.objects.filter(
+        pdf_hash__in=nedostaju, verzija_parsera=VERZIJA_PARSERA
+    ).values_list("pk", "pdf_hash", "rezultat", "posljednje_koristenje"):
+        rezultat = _iz_jsona(podaci)
+        _memorija.set(pdf_hash, rezultat)
+        pronadjeni[pdf_hash] = rezultat
+        if sada - koristen > OSVJEZAVANJE_KORISTENJA:
+            zastarjeli.append(pk)
+
+    if zastarjeli:
+        ParsiranIzvod.objects.filter(pk__in=zastarjeli).update(
+            posljednje_koristenje=sada
+        )
+
+    return pronadjeni
+
+
+def procitaj(pdf_hash):
+    """Rezultat iz keša ili None"""
+    return procitaj_vise([pdf_hash]).get(pdf_hash)
+
+
+def sacuvaj(pdf_hash, rezultat):
+    """Upisuje rezultat u memoriju i bazu, pa po potrebi čisti stare unose"""
+    from .models import ParsiranIzvod
+
+    _memorija.set(pdf_hash, rezultat)
+
+    podaci = _u_json(rezultat)
+    try:
+        with transaction.atomic():
+            ParsiranIzvod.objects.create(
+                pdf_hash=pdf_hash,
+                verzija_parsera=VERZIJA_PARSERA,
+                rezultat=podaci,
+                velicina=len(json.dumps(podaci)),
+            )
+    except IntegrityError:
+        # Isti PDF je paralelno parsiran u drugom requestu
+        return
+
+    ocisti()
+
+
+def ocisti(max_mb=None):
+    """
+    Drži keš u bazi ispod IZVODI_CACHE_MAX_MB: prvo brišemo rezultate
+    starih verzija parsera, zatim najduže nekorištene.
+    """
+    from .models import ParsiranIzvod
+
+    if max_mb is None:
+        max_mb = getattr(settings, "IZVODI_CACHE_MAX_MB", 100)
+    limit = max_mb * 1024 * 1024
+
+    ParsiranIzvod.objects.exclude(verzija_parsera=VERZIJA_PARSERA).delete()
+
+    ukupno = ParsiranIzvod.objects.aggregate(s=Sum("velicina"))["s"] or 0
+    if ukupno <= limit:
+        return 0
+
+    # Brišemo do 90% limita da ne čistimo pri svakom sljedećem upisu
+    visak = ukupno - int(limit * 0.9)
+    za_brisanje = []
+    for pk, velicina in ParsiranIzvod.objects.order_by(
+        "posljednje_koristenje"
+    ).values_list("pk", "velicina").iterator():
+        if visak <= 0:
+            break
+        za_brisanje.append(pk)
+        visak -= velicina
+
+    ParsiranIzvod.objects.filter(pk__in=za_brisanje).delete()
+    return len(za_brisanje)
+
+
+def parsiraj_kesirano(pdf_file, pdf_hash=None, banka=None):
+    """
+    Kao parsers.parsiraj(), ali preko keša. `pdf_file` su bytes ili fajl;
+    ako je hash već poznat (EmailInbox.pdf_hash), fajl se ne čita pri pogotku.
+    Greške parsera se propuštaju pozivaocu i ne keširaju se.
+    """
+    if pdf_hash is None:
+        pdf_hash = hash_sadrzaja(pdf_file)
+
+    rezultat = procitaj(pdf_hash)
+    if rezultat is not None:
+        return rezultat
+
+    if isinstance(pdf_file, bytes):
+        pdf_file = BytesIO(pdf_file)
+
+    rezultat = parsiraj(pdf_file, banka=banka)
+    sacuvaj(pdf_hash, rezultat)
+    return rezultat
@@ -0,0 +1,98 @@
+"""
+Skladište PDF izvoda adresirano sadržajem.
+
+Svaki izvod korisnika se čuva tačno jednom (Izvod model, jedinstven po
+korisniku i SHA256), a sve transakcije iz njega ga referenciraju stranim
+ključem. Upload izvoda sa N transakcija zato piše jedan fajl, ne N kopija.
+Fajl je pod svojim SHA256, pa isti PDF kod dva korisnika dijeli fajl, ali
+ne i red - naziv fajla jednog korisnika drugi nikad ne vidi.
+
+Izvod bez ijedne transakcije se briše (core.signals poziva `pocisti_izvode`
+nakon brisanja transakcija), a fajl tek kada ga više nijedan izvod ne
+koristi.
+"""
+
+from io import BytesIO
+
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.db.models import ProtectedError
+
+from .izvodi_cache import hash_sadrzaja
+
+
+def sacuvaj_izvod(pdf_file, korisnik, naziv="", sha256=None):
+    """
+    Vraća Izvod korisnika za sadržaj (bytes ili fajl), upisujući fajl samo
+    ako taj sadržaj još nije sačuvan. Ako je hash poznat, postojeći izvod
+    se pronalazi bez čitanja fajla.
+    """
+    from .models import Izvod
+
+    if sha256 is None:
+        sha256 = hash_sadrzaja(pdf_file)
+
+    izvod = Izvod.objects.filter(korisnik=korisnik, sha256=sha256).first()
+    if izvod:
+        return izvod
+
+    if isinstance(pdf_file, bytes):
+        pdf_file = BytesIO(pdf_file)
+    pdf_file.seek(0, 2)
+    velicina = pdf_file.tell()
+    pdf_file.seek(0)
+
+    izvod = Izvod(
+        korisnik=korisnik, sha256=sha256, naziv=(naziv or "")[:255], velicina=velicina
+    )
+    putanja = izvod.fajl.field.generate_filename(izvod, "")
+    try:
+        with transaction.atomic():
+            if izvod.fajl.storage.exists(putanja):
+                # Isti sadržaj već postoji (drugi korisnik ili ostatak od
+                # ranije) - ne pišemo ga ponovo
+                izvod.fajl.name = putanja
+                izvod.save()
+            else:
+                izvod.fajl.save(putanja, File(pdf_file), save=True)
+    except IntegrityError:
+        # Isti izvod je paralelno sačuvan u drugom requestu; storage je našu
+        # kopiju upisao pod drugim imenom
+        if izvod.fajl.name and izvod.fajl.name != putanja:
+            izvod.fajl.storage.delete(izvod.fajl.name)
+        return Izvod.objects.get(korisnik=korisnik, sha256=sha256)
+
+    return izvod
+
+
+def _obrisi_fajl_ako_nije_koristen(fajl):
+    """Briše fajl izvoda ako ga nijedan (drugi) izvod više ne koristi"""
+    from .models import Izvod
+
+    if not Izvod.objects.filter(fajl=fajl.name).exists():
+        fajl.storage.delete(fajl.name)
+
+
+def pocisti_izvode(izvod_ids=None):
+    """
+    Briše izvode na koje ne pokazuje nijedna transakcija (bez `izvod_ids`
+    provjerava sve). Fajl se briše nakon commit-a, i to samo ako ga ne
+    koristi izvod drugog korisnika. Vraća broj obrisanih.
+    """
+    from .models import Izvod
+
+    bez_transakcija = Izvod.objects.filter(transakcije__isnull=True)
+    if izvod_ids is not None:
+        bez_transakcija = bez_transakcija.filter(pk__in=set(izvod_ids))
+
+    obrisano = 0
+    for izvod in bez_transakcija:
+        fajl = izvod.fajl
+        try:
+            izvod.delete()
+        except ProtectedError:
+            # U međuvremenu je uvezena nova transakcija iz istog izvoda
+            continue
+        transaction.on_commit(lambda fajl=fajl: _obrisi_fajl_ako_nije_koristen(fajl))
+        obrisano += 1
+    return obrisano
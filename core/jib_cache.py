@@ -0,0 +1,85 @@
+"""
+Razrješavanje JIB -> (korisnik_id, plan) za dolazne emailove.
+
+Dva nivoa keša: dict u memoriji procesa (kratak TTL) i Django cache koji
+dijele svi procesi. Pamte se i promašaji, pa nepostojeći JIB-ovi (spam,
+pogrešne adrese) ne idu u bazu pri svakom emailu. Signali u core.signals
+brišu unos nakon commit-a izmjene ili brisanja korisnika.
+
+Brisanje stiže do dijeljenog keša i memorije procesa koji je korisnika
+izmijenio, ali ne i do memorije ostalih procesa. Tamo stara vrijednost
+živi najviše JIB_CACHE_LOKALNO_TTL (60 s) - svjesno prihvaćeno: posljedica
+je da email na novi/promijenjeni JIB ili promjena plana djeluje najviše
+minut kasnije, a zauzvrat većina emailova ne ide ni u dijeljeni keš.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Oznaka promašaja u kešu (None znači "nema u kešu")
+NEPOSTOJECI = "-"
+
+# Gornja granica lokalnog keša - štiti od naleta nasumičnih JIB-ova
+MAX_LOKALNO = 10000
+
+_lokalno = {}
+_lock = threading.Lock()
+
+
+def _ttl_lokalno():
+    return getattr(settings, "JIB_CACHE_LOKALNO_TTL", 60)
+
+
+def _ttl_dijeljeno():
+    return getattr(settings, "JIB_CACHE_TTL", 3600)
+
+
+def _ttl_promasaj():
+    return getattr(settings, "JIB_CACHE_PROMASAJ_TTL", 300)
+
+
+def _kljuc(jib):
+    return f"jib:{jib}"
+
+
+def _zapamti_lokalno(jib, vrijednost):
+    with _lock:
+        if len(_lokalno) >= MAX_LOKALNO:
+            _lokalno.clear()
+        _lokalno[jib] = (time.monotonic() + _ttl_lokalno(), vrijednost)
+
+
+def razrijesi_jib(jib):
+    """(korisnik_id, plan) za JIB, ili None ako korisnik ne postoji"""
+    from .models import Korisnik
+
+    unos = _lokalno.get(jib)
+    if unos and unos[0] > time.monotonic():
+        vrijednost = unos[1]
+    else:
+        vrijednost = cache.get(_kljuc(jib))
+        if vrijednost is None:
+            red = (
+                Korisnik.objects.filter(jib=jib).values_list("id", "plan").first()
+            )
+            vrijednost = tuple(red) if red else NEPOSTOJECI
+            cache.set(
+                _kljuc(jib),
+                vrijednost,
+                _ttl_dijeljeno() if red else _ttl_promasaj(),
+            )
+        _zapamti_lokalno(jib, vrijednost)
+
+    return None if vrijednost == NEPOSTOJECI else vrijednost
+
+
+def zaboravi_jib(*jibovi):
+    """Briše JIB-ove iz oba nivoa keša (poziva se iz signala)"""
+    jibovi = [jib for jib in jibovi if jib]
+    with _lock:
+        for jib in jibovi:
+            _lokalno.pop(jib, None)
+    cache.delete_many([_kljuc(jib) for jib in jibovi])
@@ -0,0 +1,966 @@
+import itertools
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from core import izvodi_cache
+from core.izvodi_batch import parsiraj_izvode
+from core.parsers import (
+    BankParser,
+    PdfStranice,
+    Registar,
+    parsiraj_stranice,
+    registar,
+)
+from core.parsers.base import promet_pattern
+from core.parsers.testni import KLIJENTI, generisi_izvod, generisi_korpus
+from core.utils import parsiraj_izvod
+
+# ============================================
+# KORISNICI
+# ============================================
+
+_jibovi = itertools.count(1)
+
+
+def benchmark_korisnik(**polja):
+    """Novi User + Korisnik sa jedinstvenim JIB-om - (user, korisnik)"""
+    from django.contrib.auth.models import User
+
+    from core.models import Korisnik
+
+    broj = next(_jibovi)
+    user = User.objects.create_user(f"benchmark-{time.time_ns()}-{broj}")
+    korisnik = Korisnik.objects.create(
+        user=user, ime="Benchmark", jib=f"49{broj:011d}", racun="0", **polja
+    )
+    return user, korisnik
+
+
+# ============================================
+# SINTETIČKI EMAILOVI (izvodi iz core.parsers.testni)
+# ============================================
+
+
+def cloudmailin_polja(jib, broj_emaila, pdf_po_emailu=1, stranice=1):
+    """
+    Polja multipart POST-a u CloudMailin formatu - (polja, prilozi) za
+    svaki email; prilozi su trojke (ime polja, naziv fajla, bytes).
+    """
+    for i in range(broj_emaila):
+        polja = {
+            "envelope[to]": f"izvodi+{jib}@cloudmailin.net",
+            "envelope[from]": "izvodi@nlbbanka.ba",
+            "headers[Subject]": f"Izvod {i + 1} JIB:{jib}",
+            "headers[Message-ID]": f"<izvod-{jib}-{i}-{time.time_ns()}@nlbbanka.ba>",
+        }
+        prilozi = [
+            (
+                f"attachments[{j}]",
+                f"izvod-{i}-{j}.pdf",
+                generisi_izvod(
+                    "nlb" if (i + j) % 2 else "atos", stranice, seed=i * 10 + j
+                ),
+            )
+            for j in range(pdf_po_emailu)
+        ]
+        yield polja, prilozi
+
+
+def percentili(trajanja):
+    """p50/p95/p99/max u milisekundama"""
+    trajanja = sorted(trajanja)
+
+    def p(procenat):
+        return trajanja[min(len(trajanja) - 1, int(len(trajanja) * procenat))]
+
+    return {
+        "p50": p(0.50) * 1000,
+        "p95": p(0.95) * 1000,
+        "p99": p(0.99) * 1000,
+        "max": trajanja[-1] * 1000,
+    }
+
+
+def ispisi_percentile(command, naziv, trajanja):
+    pc = percentili(trajanja)
+    command.stdout.write(
+        f"  {naziv:<12} p50 {pc['p50']:8.1f} ms | p95 {pc['p95']:8.1f} ms | "
+        f"p99 {pc['p99']:8.1f} ms | max {pc['max']:8.1f} ms"
+    )
+
+
+# ============================================
+# SCENARIJI
+# ============================================
+
+
+def benchmark_parsiranje(command, options):
+    """Serijsko vs paralelno parsiranje korpusa izvoda"""
+    korpus = generisi_korpus(options["broj"], options["stranice"])
+    command.stdout.write(
+        f"📄 Korpus: {len(korpus)} izvoda x {options['stranice']} stranica"
+    )
+
+    start = time.perf_counter()
+    for naziv, sadrzaj in korpus:
+        parsiraj_izvod(BytesIO(sadrzaj))
+    serijski = time.perf_counter() - start
+
+    start = time.perf_counter()
+    greske = [
+        r
+        for r in parsiraj_izvode(korpus, max_workers=options["workers"], kes=False)
+        if r["greska"]
+    ]
+    paralelno = time.perf_counter() - start
+
+    command.stdout.write(
+        f"  Serijski:  {serijski:8.2f} s ({len(korpus) / serijski:6.1f} fajlova/s)"
+    )
+    command.stdout.write(
+        f"  Paralelno: {paralelno:8.2f} s ({len(korpus) / paralelno:6.1f} fajlova/s)"
+    )
+    command.stdout.write(f"  Ubrzanje:  {serijski / paralelno:8.2f}x")
+
+    if greske:
+        command.stdout.write(command.style.WARNING(f"⚠️  {len(greske)} grešaka"))
+
+
+class _TekstStranice(PdfStranice):
+    """PdfStranice nad unaprijed izvučenim stranicama - mjeri samo parser"""
+
+    def __init__(self, stranice):
+        self._sve = stranice
+        self._stranice = {}
+
+    def __len__(self):
+        return len(self._sve)
+
+    def _izvuci(self, indeks):
+        return self._sve[indeks]
+
+    def close(self):
+        pass
+
+
+def _registar_velicine(velicina):
+    """Pravi registar sa postojećim bankama + izmišljenim do `velicina`"""
+    reg = Registar()
+    for parser in registar:
+        reg.registruj(parser)
+
+    for i in range(velicina - len(reg)):
+        klasa = type(
+            f"Banka{i}Parser",
+            (BankParser,),
+            {
+                "kljuc": f"banka{i}",
+                "naziv": f"Banka {i}",
+                "oznaka": f"Banka {i}",
+                "otisci": (f"banka{i}",),
+                "promet_pattern": promet_pattern(rf"Ukupno\s+banka{i}"),
+            },
+        )
+        reg.registruj(klasa())
+    return reg
+
+
+def benchmark_registar(command, options):
+    """Trošak parsiranja po dokumentu u zavisnosti od veličine registra"""
+    korpus = generisi_korpus(options["broj"], options["stranice"])
+
+    # Tekst izvlačimo jednom - mjerimo prepoznavanje banke i parser, ne pdfplumber
+    dokumenti = []
+    for naziv, sadrzaj in korpus:
+        with PdfStranice(BytesIO(sadrzaj)) as stranice:
+            dokumenti.append(
+                [(stranice.redovi(i), stranice.tekst(i)) for i in range(len(stranice))]
+            )
+
+    ponavljanja = max(1, 2000 // len(dokumenti))
+    command.stdout.write(
+        f"📄 Korpus: {len(dokumenti)} izvoda x {options['stranice']} stranica, "
+        f"{ponavljanja} ponavljanja"
+    )
+
+    for velicina in (len(registar), 50, 500, 5000):
+        reg = _registar_velicine(velicina)
+
+        start = time.perf_counter()
+        for _ in range(ponavljanja):
+            for stranice in dokumenti:
+                rezultat = parsiraj_stranice(_TekstStranice(stranice), registar=reg)
+        trajanje = time.perf_counter() - start
+
+        po_dokumentu = trajanje / (ponavljanja * len(dokumenti)) * 1_000_000
+        command.stdout.write(
+            f"  {len(reg):5d} parsera: {po_dokumentu:8.1f} µs/izvod "
+            f"(posljednji: {rezultat['banka']})"
+        )
+
+
+def benchmark_kes(command, options):
+    """Parsiranje bez keša vs pogodak u bazi vs pogodak u memoriji procesa"""
+    from core.models import ParsiranIzvod
+
+    korpus = generisi_korpus(options["broj"], options["stranice"])
+    hashevi = [izvodi_cache.hash_sadrzaja(sadrzaj) for _, sadrzaj in korpus]
+    command.stdout.write(
+        f"📄 Korpus: {len(korpus)} izvoda x {options['stranice']} stranica"
+    )
+
+    ParsiranIzvod.objects.filter(pdf_hash__in=hashevi).delete()
+    izvodi_cache._memorija.clear()
+
+    def mjeri(naziv):
+        start = time.perf_counter()
+        for pdf_hash, (_, sadrzaj) in zip(hashevi, korpus):
+            izvodi_cache.parsiraj_kesirano(sadrzaj, pdf_hash=pdf_hash)
+        trajanje = (time.perf_counter() - start) / len(korpus) * 1_000_000
+        command.stdout.write(f"  {naziv:<18} {trajanje:12.1f} µs/izvod")
+
+    try:
+        mjeri("Bez keša:")
+        izvodi_cache._memorija.clear()
+        mjeri("Keš u bazi:")
+        mjeri("Keš u memoriji:")
+    finally:
+        ParsiranIzvod.objects.filter(pdf_hash__in=hashevi).delete()
+        izvodi_cache._memorija.clear()
+
+
+def benchmark_webhook(command, options):
+    """Latencija email_webhook-a pod naletom emailova + vrijeme pražnjenja reda"""
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.test import Client
+
+    from core.inbox_queue import obradi_sljedece
+    from core.models import EmailInbox, InboxPosao
+
+    user, korisnik = benchmark_korisnik(plan="Business")
+    emailovi = list(
+        cloudmailin_polja(korisnik.jib, options["broj"], stranice=options["stranice"])
+    )
+    command.stdout.write(
+        f"📧 Nalet: {len(emailovi)} emailova x {options['stranice']} stranica"
+    )
+
+    try:
+        client = Client(SERVER_NAME="localhost")
+        trajanja = []
+        statusi = {}
+        for polja, prilozi in emailovi:
+            data = dict(polja)
+            for polje, naziv, sadrzaj in prilozi:
+                data[polje] = SimpleUploadedFile(
+                    naziv, sadrzaj, content_type="application/pdf"
+                )
+
+            start = time.perf_counter()
+            response = client.post("/inbox/webhook/", data)
+            trajanja.append(time.perf_counter() - start)
+            statusi[response.status_code] = statusi.get(response.status_code, 0) + 1
+
+        command.stdout.write(f"  Statusi:     {statusi}")
+        ispisi_percentile(command, "Webhook:", trajanja)
+
+        start = time.perf_counter()
+        while sum(obradi_sljedece(limit=50)):
+            pass
+        command.stdout.write(
+            f"  Worker:      {time.perf_counter() - start:8.2f} s za "
+            f"{EmailInbox.objects.filter(korisnik=korisnik).count()} izvoda"
+        )
+    finally:
+        for inbox in EmailInbox.objects.filter(korisnik=korisnik):
+            inbox.pdf_fajl.delete(save=False)
+        for posao in InboxPosao.objects.filter(korisnik=korisnik):
+            for prilog in posao.prilozi.all():
+                prilog.fajl.delete(save=False)
+        user.delete()
+
+
+def _transakcije_json(broj, seed=0):
+    """Sintetičke transakcije u formatu EmailInbox.transakcije_json"""
+    rng = random.Random(seed)
+    start = date(2025, 1, 1)
+    transakcije = []
+    for i in range(broj):
+        iznos = round(rng.uniform(5, 5000), 2)
+        prihod = rng.random() < 0.6
+        transakcije.append(
+            {
+                "datum": (start + timedelta(days=i % 365)).isoformat(),
+                "opis": f"{rng.choice(KLIJENTI)} ({seed}-{i})",
+                "iznos": iznos if prihod else -iznos,
+                "tip": "prihod" if prihod else "rashod",
+            }
+        )
+    return transakcije
+
+
+def _uvoz_red_po_red(korisnik, inboxi):
+    """Stari uvoz: exists() + create() po transakciji, save() po inboxu"""
+    from django.utils import timezone
+
+    from core.models import Prihod
+
+    for inbox in inboxi:
+        for trans in inbox.transakcije_json:
+            datum = date.fromisoformat(trans["datum"])
+            iznos = Decimal(str(abs(trans["iznos"])))
+            if Prihod.objects.filter(
+                korisnik=korisnik,
+                datum=datum,
+                iznos=iznos,
+                vrsta=trans["tip"],
+                opis=trans["opis"],
+            ).exists():
+                continue
+            Prihod.objects.create(
+                korisnik=korisnik,
+                datum=datum,
+                mjesec=datum.strftime("%Y-%m"),
+                iznos=iznos,
+                vrsta=trans["tip"],
+                opis=trans["opis"],
+            )
+        inbox.procesuirano = True
+        inbox.datum_odobravanja = timezone.now()
+        inbox.save()
+
+
+def benchmark_uvoz(command, options):
+    """Potvrda inboxa: red po red vs core.uvoz (broj upita i trajanje)"""
+    from django.db import connection, transaction
+    from django.test.utils import CaptureQueriesContext
+
+    from core.models import EmailInbox
+    from core.uvoz import Uvoz
+
+    po_izvodu = options["stranice"] * 30
+    command.stdout.write(
+        f"📥 Uvoz: {options['broj']} izvoda x {po_izvodu} transakcija"
+    )
+
+    def mjeri(naziv, uvezi):
+        with transaction.atomic():
+            user, korisnik = benchmark_korisnik()
+            inboxi = [
+                EmailInbox.objects.create(
+                    korisnik=korisnik,
+                    from_email="benchmark@example.com",
+                    subject="Izvod",
+                    banka_naziv="Benchmark",
+                    pdf_hash=f"benchmark-{i}",
+                    # Svaki drugi izvod ponavlja prethodni (duplikati)
+                    transakcije_json=_transakcije_json(po_izvodu, seed=i // 2),
+                )
+                for i in range(options["broj"])
+            ]
+
+            with CaptureQueriesContext(connection) as upiti:
+                start = time.perf_counter()
+                uvezi(korisnik, inboxi)
+                trajanje = time.perf_counter() - start
+
+            command.stdout.write(
+                f"  {naziv:<14} {len(upiti):8} upita {trajanje * 1000:10.1f} ms"
+            )
+            transaction.set_rollback(True)
+
+    def bulk(korisnik, inboxi):
+        uvoz = Uvoz(korisnik)
+        for inbox in inboxi:
+            uvoz.dodaj_inbox(inbox)
+        uvoz.sacuvaj()
+
+    mjeri("Red po red:", _uvoz_red_po_red)
+    mjeri("Bulk uvoz:", bulk)
+
+
+def benchmark_pregledi(command, options):
+    """Latencija i broj upita stranica sa zbirovima za korisnika sa dugom istorijom"""
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    from core.uvoz import Uvoz
+
+    broj = options["broj"] * 100
+    user, korisnik = benchmark_korisnik(plan="Business")
+
+    try:
+        # Transakcije raspoređene kroz 5 godina
+        rng = random.Random(0)
+        uvoz = Uvoz(korisnik)
+        for i in range(broj):
+            uvoz.dodaj(
+                date(2021, 1, 1) + timedelta(days=rng.randrange(5 * 365)),
+                Decimal(rng.randrange(500, 500000)) / 100,
+                "prihod" if rng.random() < 0.6 else "rashod",
+                f"{rng.choice(KLIJENTI)} ({i})",
+            )
+        uvoz.sacuvaj()
+        command.stdout.write(f"📊 Korisnik sa {broj} transakcija (5 godina)")
+
+        client = Client(SERVER_NAME="localhost")
+        client.force_login(user)
+        for url in (
+            "/dashboard/?godina=all",
+            "/prihodi/",
+            "/prihodi/?search=MEGA&godina=2024",
+            "/prihodi/?search=150",
+            "/izvodi/?od=2021-01-15&do=2025-06-10",
+        ):
+            client.get(url)  # zagrijavanje
+            with CaptureQueriesContext(connection) as upiti:
+                start = time.perf_counter()
+                client.get(url)
+                trajanje = time.perf_counter() - start
+            command.stdout.write(
+                f"  {url:<40} {len(upiti):4} upita {trajanje * 1000:8.1f} ms"
+            )
+    finally:
+        user.delete()
+
+
+# Gornja granica broja upita za /dashboard/ - ne smije rasti sa podacima
+MAX_UPITA_DASHBOARD = 12
+
+
+def benchmark_dashboard(command, options):
+    """
+    Broj upita za dashboard (hladan i topao keš): isti za praznog i
+    korisnika sa puno podataka
+    """
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    from core.dashboard_cache import zastarjelo
+    from core.models import EmailInbox, Faktura
+    from core.uvoz import Uvoz
+
+    user, korisnik = benchmark_korisnik()
+    client = Client(SERVER_NAME="localhost")
+    client.force_login(user)
+
+    def izmjeri(opis):
+        rezultati = []
+        for url in ("/dashboard/", "/dashboard/?godina=all"):
+            client.get(url)  # zagrijavanje
+            for kes in ("hladan keš", "keš"):
+                if kes == "hladan keš":
+                    zastarjelo(korisnik.pk)
+                with CaptureQueriesContext(connection) as upiti:
+                    start = time.perf_counter()
+                    odgovor = client.get(url)
+                    trajanje = time.perf_counter() - start
+                if odgovor.status_code != 200:
+                    raise CommandError(f"❌ {url}: status {odgovor.status_code}")
+                command.stdout.write(
+                    f"  {opis:<20} {url:<24} {kes:<11} {len(upiti):4} upita "
+                    f"{trajanje * 1000:8.1f} ms"
+                )
+                rezultati.append(len(upiti))
+        return rezultati
+
+    try:
+        prazan = izmjeri("Bez podataka:")
+
+        rng = random.Random(0)
+        uvoz = Uvoz(korisnik)
+        broj = options["broj"] * 100
+        for i in range(broj):
+            uvoz.dodaj(
+                date(2021, 1, 1) + timedelta(days=rng.randrange(5 * 365)),
+                Decimal(rng.randrange(500, 500000)) / 100,
+                "prihod" if rng.random() < 0.6 else "rashod",
+                f"{rng.choice(KLIJENTI)} ({i})",
+            )
+        uvoz.sacuvaj()
+        for i in range(options["broj"]):
+            EmailInbox.objects.create(
+                korisnik=korisnik,
+                from_email="benchmark@example.com",
+                subject="Izvod",
+                banka_naziv="Benchmark",
+                pdf_hash=f"benchmark-{i}",
+            )
+            Faktura.objects.create(
+                user=user,
+                broj_fakture=f"B-{i}",
+                datum_izdavanja=date(2025, 1, 1),
+                primalac_naziv=rng.choice(KLIJENTI),
+            )
+
+        pun = izmjeri(f"{broj} transakcija:")
+    finally:
+        user.delete()
+
+    if prazan != pun or max(pun) > MAX_UPITA_DASHBOARD:
+        raise CommandError(
+            f"❌ Dashboard: {prazan} upita bez podataka, {pun} sa podacima "
+            f"(dozvoljeno najviše {MAX_UPITA_DASHBOARD}, nezavisno od podataka)"
+        )
+    command.stdout.write(f"✅ Dashboard: {max(pun)} upita, nezavisno od podataka")
+
+
+def benchmark_plan_upita(command, options):
+    """EXPLAIN čestih upita nad Prihod - svaki mora ići preko indeksa"""
+    from django.db.models import Q
+
+    from core.models import Prihod
+    from core.uvoz import Uvoz, otisak_transakcije
+
+    user, korisnik = benchmark_korisnik()
+
+    try:
+        uvoz = Uvoz(korisnik)
+        for trans in _transakcije_json(options["broj"] * 100):
+            uvoz.dodaj(
+                date.fromisoformat(trans["datum"]),
+                trans["iznos"],
+                trans["tip"],
+                trans["opis"],
+            )
+        uvoz.sacuvaj()
+
+        transakcije = Prihod.objects.filter(korisnik=korisnik)
+        upiti = [
+            # (naziv, queryset, očekivani indeks - None: bilo koji)
+            (
+                "salda.zbir_perioda",
+                transakcije.filter(
+                    vrsta__in=["prihod", "rashod"],
+                    datum__gte=date(2025, 3, 10),
+                    datum__lte=date(2025, 3, 31),
+                ).order_by(),
+                "prihod_korisnik_vrsta_datum",
+            ),
+            (
+                "salda.obnovi",
+                transakcije.filter(
+                    period__in=[date(2025, 3, 1), date(2025, 4, 1)]
+                ).order_by(),
+                "prihod_korisnik_period",
+            ),
+            (
+                "Uvoz._postojeci",
+                transakcije.filter(
+                    otisak__in=[
+                        otisak_transakcije(korisnik.pk, date(2025, 1, 1), 1, "prihod", "")
+                    ]
+                ),
+                # Jedinstveno ograničenje - ime indeksa zavisi od baze
+                None,
+            ),
+            (
+                "prihodi (pretraga)",
+                transakcije.filter(
+                    vrsta="prihod",
+                    period__gte=date(2025, 1, 1),
+                    period__lt=date(2026, 1, 1),
+                ),
+                None,
+            ),
+            (
+                "izvodi (stranica)",
+                transakcije.filter(
+                    Q(datum__lt=date(2025, 6, 1))
+                    | Q(datum=date(2025, 6, 1), id__lt=10**9),
+                    datum__lte=date(2025, 6, 1),
+                ).order_by("-datum", "-id")[:21],
+                "prihod_korisnik_datum_id",
+            ),
+        ]
+
+        puni_prolazi = []
+        for naziv, qs, indeks in upiti:
+            plan = qs.explain()
+            if indeks:
+                ok = indeks in plan
+            else:
+                ok = "index" in plan.lower()
+            command.stdout.write(
+                f"  {'✅' if ok else '❌'} {naziv:<24} {' | '.join(plan.splitlines())}"
+            )
+            if not ok:
+                puni_prolazi.append(naziv)
+    finally:
+        user.delete()
+
+    if puni_prolazi:
+        raise CommandError(f"❌ Upiti bez indeksa: {', '.join(puni_prolazi)}")
+
+
+def _serija_prihoda(rng, godina, broj_mjeseci):
+    """OrderedDict {mjesec: prihod} od januara `godina`, sa praznim mjesecima"""
+    serija = {}
+    for i in range(broj_mjeseci):
+        if rng.random() < 0.15:
+            continue
+        mjesec = f"{godina + i // 12}-{i % 12 + 1:02d}"
+        serija[mjesec] = Decimal(rng.randrange(0, 2000000)) / 100
+    return serija
+
+
+def _stari_obracun(serija, tip, stopa_mali, stopa_veliki, doprinos, godisnji_prihod):
+    """Formule iz prihodi_view prije core.tax - referenca za provjeru"""
+    redovi = []
+    for mjesec, prihod in sorted(serija.items()):
+        if tip == "mali":
+            porez = prihod * stopa_mali
+        elif mjesec.endswith("-03"):
+            porez = godisnji_prihod * stopa_veliki
+        else:
+            porez = Decimal("0")
+        redovi.append((mjesec, prihod, porez, doprinos, prihod - porez - doprinos))
+    return redovi
+
+
+def benchmark_porez(command, options):
+    """
+    core.tax za 10.000 sintetičkih korisnika - serijski po korisniku i
+    mjesecu naspram obracunaj_sve (ispravnost provjerava core.tests.ObracunTest)
+    """
+    from core import tax
+
+    parametri = tax.Parametri()
+    stopa_mali, stopa_veliki = parametri.stopa_mali, parametri.stopa_veliki
+    doprinos = parametri.mjesecni_doprinosi
+
+    rng = random.Random(0)
+
+    # 10.000 korisnika, 12-60 mjeseci
+    serije = [
+        (
+            _serija_prihoda(rng, 2021, rng.randrange(12, 61)),
+            rng.choice((tax.MALI, tax.VELIKI)),
+            None,
+        )
+        for _ in range(10000)
+    ]
+    mjeseci = sum(len(s) for s, _, _ in serije)
+
+    start = time.perf_counter()
+    for serija, tip, _ in serije:
+        godisnji = tax.po_godinama(serija)
+        for mjesec, prihod in sorted(serija.items()):
+            _stari_obracun(
+                {mjesec: prihod},
+                tip,
+                stopa_mali,
+                stopa_veliki,
+                doprinos,
+                godisnji[int(mjesec[:4])],
+            )
+    serijski = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tax.obracunaj_sve(serije, parametri)
+    prolaz = time.perf_counter() - start
+
+    command.stdout.write(
+        f"  {len(serije)} korisnika, {mjeseci} mjeseci:\n"
+        f"  Po korisniku i mjesecu: {serijski * 1000:8.1f} ms\n"
+        f"  obracunaj_sve:          {prolaz * 1000:8.1f} ms"
+    )
+
+
+# Nova faktura (core.fakture) - broj upita ne smije rasti sa brojem stavki
+MAX_UPITA_FAKTURA = 8
+
+
+def benchmark_faktura(command, options):
+    """
+    Nova faktura sa 200 stavki: NovaFaktura (bulk_create) naspram stavki
+    koje se čuvaju jedna po jedna - broj upita, trajanje i isti zbirovi.
+    Izmjena svih stavki u jednoj transakciji - jedan obračun zbirova.
+    """
+    from django.db import connection, transaction
+    from django.test.utils import CaptureQueriesContext
+
+    from core.fakture import NovaFaktura
+    from core.models import Faktura, StavkaFakture
+
+    user, _ = benchmark_korisnik()
+
+    rng = random.Random(0)
+    stavke = [
+        (
+            f"Usluga {i}",
+            Decimal(rng.randrange(1, 1000)) / 100,
+            Decimal(rng.randrange(1, 100000)) / 100,
+            rng.choice((0, 17)),
+        )
+        for i in range(200)
+    ]
+    zaglavlje = {
+        "datum_izdavanja": date(2025, 1, 1),
+        "izdavalac_naziv": "Benchmark",
+        "primalac_naziv": rng.choice(KLIJENTI),
+    }
+
+    def jedna_po_jedna():
+        faktura = Faktura.objects.create(
+            user=user, broj_fakture="B-1", **zaglavlje
+        )
+        for i, (opis, kolicina, cijena, pdv) in enumerate(stavke):
+            StavkaFakture.objects.create(
+                faktura=faktura,
+                redni_broj=i + 1,
+                opis=opis,
+                kolicina=kolicina,
+                cijena_po_jedinici=cijena,
+                pdv_stopa=pdv,
+            )
+        faktura.izracunaj_ukupno()
+        return faktura
+
+    def builder():
+        nova = NovaFaktura(user, broj_fakture="B-2", **zaglavlje)
+        for opis, kolicina, cijena, pdv in stavke:
+            nova.dodaj_stavku(opis, kolicina, cijena, pdv_stopa=pdv)
+        return nova.sacuvaj()
+
+    try:
+        rezultati = {}
+        for naziv, kreiraj in (
+            ("Stavka po stavka:", jedna_po_jedna),
+            ("NovaFaktura:", builder),
+        ):
+            with CaptureQueriesContext(connection) as upiti:
+                start = time.perf_counter()
+                faktura = kreiraj()
+                trajanje = time.perf_counter() - start
+            faktura.refresh_from_db()
+            rezultati[naziv] = (
+                len(upiti),
+                (faktura.ukupno_bez_pdv, faktura.pdv_iznos, faktura.ukupno_sa_pdv),
+                list(faktura.stavke.values_list("ukupna_cijena", "pdv_iznos")),
+            )
+            command.stdout.write(
+                f"  {naziv:<18} {len(stavke)} stavki {len(upiti):6} upita "
+                f"{trajanje * 1000:8.1f} ms"
+            )
+
+        # Izmjena svih stavki u jednoj transakciji (kao admin inline)
+        with CaptureQueriesContext(connection) as upiti:
+            with transaction.atomic():
+                for stavka in faktura.stavke.all():
+                    stavka.kolicina += 1
+                    stavka.save()
+        obracuna = sum(1 for u in upiti if u["sql"].startswith('UPDATE "faktura"'))
+        faktura.refresh_from_db()
+        ocekivano = faktura.izracunaj_ukupno()["ukupno_sa_pdv"]
+        command.stdout.write(
+            f"  {'Izmjena stavki:':<18} {len(stavke)} stavki {obracuna:6} obračun zbirova"
+        )
+    finally:
+        user.delete()
+
+    if obracuna != 1 or faktura.ukupno_sa_pdv != ocekivano:
+        raise CommandError(
+            f"❌ Izmjena stavki: {obracuna} obračuna zbirova (očekivan 1), "
+            f"zbir {faktura.ukupno_sa_pdv} umjesto {ocekivano}"
+        )
+
+    (_, zbir_staro, stavke_staro), (broj, zbir, stavke_novo) = rezultati.values()
+    if zbir != zbir_staro or stavke_novo != stavke_staro:
+        raise CommandError(
+            f"❌ Zbirovi se razlikuju: {zbir} (NovaFaktura), {zbir_staro} (stavka po stavka)"
+        )
+    if broj > MAX_UPITA_FAKTURA:
+        raise CommandError(
+            f"❌ NovaFaktura: {broj} upita za {len(stavke)} stavki "
+            f"(dozvoljeno najviše {MAX_UPITA_FAKTURA})"
+        )
+    command.stdout.write(f"✅ NovaFaktura: {broj} upita, isti zbirovi")
+
+
+def benchmark_faktura_dokument(command, options):
+    """
+    generate_invoice_doc za 10, 1.000 i 10.000 stavki - vrijeme po stavci
+    mora ostati približno isto (linearno), a tekst korisnika escape-ovan.
+    Uz to trajanje DOCX i PDF renderovanja.
+    """
+    from core.models import Faktura, StavkaFakture
+    from core.utils import generate_invoice_doc
+
+    faktura = Faktura(
+        broj_fakture="B-1",
+        datum_izdavanja=date(2025, 1, 1),
+        izdavalac_naziv="Benchmark <b>",
+        primalac_naziv="MEGA & SINOVI",
+        ukupno_sa_pdv=Decimal("0"),
+    )
+    rng = random.Random(0)
+
+    po_stavci = {}
+    for broj in (10, 1000, 10000):
+        stavke = []
+        for i in range(broj):
+            stavka = StavkaFakture(
+                redni_broj=i + 1,
+                opis=f"<script>alert({i})</script> {rng.choice(KLIJENTI)}",
+                kolicina=Decimal(rng.randrange(1, 1000)) / 100,
+                cijena_po_jedinici=Decimal(rng.randrange(1, 100000)) / 100,
+            )
+            stavka.izracunaj()
+            stavke.append(stavka)
+
+        generate_invoice_doc(faktura, stavke)  # zagrijavanje (kompajliranje)
+        start = time.perf_counter()
+        html = generate_invoice_doc(faktura, stavke)
+        trajanje = time.perf_counter() - start
+        po_stavci[broj] = trajanje / broj
+
+        if "<script>" in html or "<b>" in html or html.count("&lt;script&gt;") != broj:
+            raise CommandError(f"❌ {broj} stavki: tekst korisnika nije escape-ovan")
+        command.stdout.write(
+            f"  {broj:6} stavki {trajanje * 1000:9.1f} ms "
+            f"{po_stavci[broj] * 1e6:7.1f} µs/stavka {len(html) / 1024:8.0f} KB"
+        )
+
+    # Kvadratno vrijeme bi 10x više stavki platilo ~10x po stavci
+    if po_stavci[10000] > 3 * po_stavci[1000]:
+        raise CommandError("❌ Vrijeme po stavci raste sa brojem stavki")
+    command.stdout.write("✅ Linearno: vrijeme po stavci ne raste sa brojem stavki")
+
+    # DOCX i PDF za 1.000 stavki (izdate fakture se renderuju samo jednom)
+    from core.utils import generate_invoice_docx, generate_invoice_pdf
+
+    for naziv, renderer in (("DOCX", generate_invoice_docx), ("PDF", generate_invoice_pdf)):
+        start = time.perf_counter()
+        velicina = len(renderer(faktura, stavke[:1000]).getvalue())
+        command.stdout.write(
+            f"  {naziv:<5} 1000 stavki {(time.perf_counter() - start) * 1000:9.1f} ms "
+            f"{velicina / 1024:8.0f} KB"
+        )
+
+
+def benchmark_fakture_zip(command, options):
+    """
+    ZIP izvoz `--broj` x 10 PDF faktura: serijski vs pool procesa, uz vršnu
+    memoriju glavnog procesa. Granicu memorije po dokumentu provjerava
+    core.tests.FaktureZipTest.
+    """
+    import tracemalloc
+    import zipfile
+
+    from core.fakture import NovaFaktura
+    from core.fakture_izvoz import zip_stream
+    from core.models import Faktura
+
+    user, _ = benchmark_korisnik()
+
+    rng = random.Random(0)
+    broj = options["broj"] * 10
+    for i in range(broj):
+        nova = NovaFaktura(
+            user,
+            broj_fakture=f"B-{i}",
+            datum_izdavanja=date(2025, 1, 1) + timedelta(days=i % 365),
+            izdavalac_naziv="Benchmark",
+            primalac_naziv=rng.choice(KLIJENTI),
+            status="draft",
+        )
+        for j in range(rng.randrange(5, 60)):
+            nova.dodaj_stavku(f"Usluga {j}", "1", Decimal(rng.randrange(1, 100000)) / 100)
+        nova.sacuvaj()
+
+    def izvezi(fakture, oblik, workers):
+        """Arhiva ide u privremeni fajl na disku - (dokumenata, bajtova)"""
+        with tempfile.TemporaryFile() as arhiva:
+            for dio in zip_stream(fakture, oblik, workers):
+                arhiva.write(dio)
+            return len(zipfile.ZipFile(arhiva).namelist()), arhiva.tell()
+
+    try:
+        fakture = Faktura.objects.filter(user=user)
+        for naziv, workers in (("Serijski:", 1), ("Pool:", options["workers"])):
+            start = time.perf_counter()
+            dokumenata, velicina = izvezi(fakture, "pdf", workers)
+            command.stdout.write(
+                f"  {naziv:<10} {dokumenata} PDF faktura "
+                f"{(time.perf_counter() - start) * 1000:9.1f} ms, arhiva {velicina / 1024:8.0f} KB"
+            )
+            if dokumenata != broj:
+                raise CommandError(f"❌ {naziv} {dokumenata} dokumenata umjesto {broj}")
+
+        # Memorija se mjeri na DOC formatu (tracemalloc usporava reportlab)
+        tracemalloc.start()
+        try:
+            izvezi(fakture, "doc", 1)
+            vrsna = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        command.stdout.write(
+            f"  Memorija: {broj:5} faktura, vršna {vrsna / 1024:8.0f} KB "
+            f"({vrsna / broj / 1024:.1f} KB po fakturi)"
+        )
+    finally:
+        user.delete()
+
+
+SCENARIJI = {
+    "parsiranje": benchmark_parsiranje,
+    "registar": benchmark_registar,
+    "kes": benchmark_kes,
+    "webhook": benchmark_webhook,
+    "uvoz": benchmark_uvoz,
+    "pregledi": benchmark_pregledi,
+    "plan_upita": benchmark_plan_upita,
+    "dashboard": benchmark_dashboard,
+    "porez": benchmark_porez,
+    "faktura": benchmark_faktura,
+    "faktura_dokument": benchmark_faktura_dokument,
+    "fakture_zip": benchmark_fakture_zip,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark performansi kritičnih dijelova sistema - radi nad privremenom "
+        "test bazom i privremenim MEDIA_ROOT-om, stvarni podaci se ne diraju"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("scenario", choices=sorted(SCENARIJI))
+        parser.add_argument("--broj", type=int, default=30, help="Veličina uzorka")
+        parser.add_argument(
+            "--stranice", type=int, default=3, help="Broj stranica po izvodu"
+        )
+        parser.add_argument(
+            "--workers", type=int, default=None, help="Broj worker procesa"
+        )
+
+    def handle(self, *args, **options):
+        scenario = SCENARIJI.get(options["scenario"])
+        if not scenario:
+            raise CommandError(f"Nepoznat scenario: {options['scenario']}")
+
+        self.stdout.write(f"⏱️  Benchmark: {options['scenario']}")
+
+        # Test baza kao kod `manage.py test` - nestaje i kada scenario padne
+        runner = DiscoverRunner(verbosity=0)
+        runner.setup_test_environment()
+        baze = runner.setup_databases()
+        try:
+            with tempfile.TemporaryDirectory() as media, override_settings(
+                MEDIA_ROOT=media
+            ):
+                scenario(self, options)
+        finally:
+            runner.teardown_databases(baze)
+            runner.teardown_test_environment()
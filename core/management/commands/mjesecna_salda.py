@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import salda
+
+
+class Command(BaseCommand):
+    help = "Ponovo izgradi ili provjeri mjesečna salda (MjesecniSaldo) iz transakcija"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--provjeri",
+            action="store_true",
+            help="Samo uporedi salda sa transakcijama, bez izmjena",
+        )
+        parser.add_argument(
+            "--korisnik", type=int, default=None, help="ID korisnika (default: svi)"
+        )
+
+    def handle(self, *args, **options):
+        korisnik_id = options["korisnik"]
+
+        if not options["provjeri"]:
+            broj = salda.obnovi(korisnik_id)
+            self.stdout.write(self.style.SUCCESS(f"✅ Izgrađeno {broj} salda"))
+            return
+
+        razlike = salda.razlike(korisnik_id)
+        for (k_id, mjesec, vrsta), ocekivano, u_tabeli in razlike[:50]:
+            self.stdout.write(
+                f"  ⚠️  korisnik={k_id} {mjesec} {vrsta}: "
+                f"očekivano {ocekivano}, u tabeli {u_tabeli}"
+            )
+
+        if razlike:
+            raise CommandError(
+                f"❌ {len(razlike)} salda se ne slaže sa transakcijama "
+                "(pokrenite bez --provjeri za ponovnu izgradnju)"
+            )
+
+        self.stdout.write(self.style.SUCCESS("✅ Salda se slažu sa transakcijama"))
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.inbox_queue import obradi_sljedece
+
+
+class Command(BaseCommand):
+    help = "Worker za red email izvoda - parsira PDF priloge iz email_webhook-a"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--jednom",
+            action="store_true",
+            help="Obradi sve spremne poslove i izađi (za cron)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Sekundi čekanja kada je red prazan",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=10, help="Poslova po jednom preuzimanju"
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("📥 Inbox worker pokrenut")
+
+        ukupno_uspjesno = ukupno_neuspjesno = 0
+        try:
+            while True:
+                uspjesno, neuspjesno = obradi_sljedece(options["limit"])
+                ukupno_uspjesno += uspjesno
+                ukupno_neuspjesno += neuspjesno
+
+                if uspjesno or neuspjesno:
+                    self.stdout.write(
+                        f"  ✅ {uspjesno} obrađeno, ⚠️  {neuspjesno} za ponavljanje"
+                    )
+                    continue
+
+                if options["jednom"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Gotovo: {ukupno_uspjesno} poslova obrađeno, "
+                f"{ukupno_neuspjesno} neuspjelih pokušaja"
+            )
+        )
@@ -0,0 +1,56 @@
+import posixpath
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from core.models import Izvod
+
+KORIJEN = "izvodi"
+
+
+def fajlovi(direktorij):
+    """Svi fajlovi ispod direktorija u storage-u (rekurzivno)"""
+    try:
+        poddirektoriji, imena = default_storage.listdir(direktorij)
+    except FileNotFoundError:
+        return
+    for ime in imena:
+        yield posixpath.join(direktorij, ime)
+    for poddirektorij in poddirektoriji:
+        yield from fajlovi(posixpath.join(direktorij, poddirektorij))
+
+
+class Command(BaseCommand):
+    help = (
+        "Pronađi (i uz --obrisi obriši) PDF fajlove u izvodi/ koje ne koristi "
+        "nijedan Izvod - npr. stare kopije po transakciji nakon migracije 0020"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--obrisi",
+            action="store_true",
+            help="Obriši pronađene fajlove (bez ovoga se samo ispisuju)",
+        )
+
+    def handle(self, *args, **options):
+        koristeni = set(Izvod.objects.values_list("fajl", flat=True))
+        visak = [ime for ime in fajlovi(KORIJEN) if ime not in koristeni]
+
+        for ime in visak[:50]:
+            self.stdout.write(f"  🗑️  {ime}")
+        if len(visak) > 50:
+            self.stdout.write(f"  ... i još {len(visak) - 50}")
+
+        if not options["obrisi"]:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"✅ {len(visak)} nekorištenih fajlova "
+                    "(pokrenite sa --obrisi za brisanje)"
+                )
+            )
+            return
+
+        for ime in visak:
+            default_storage.delete(ime)
+        self.stdout.write(self.style.SUCCESS(f"✅ Obrisano {len(visak)} fajlova"))
@@ -2,8 +2,8 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.core.mail import send_mail
 from django.conf import settings
+from core import salda, tax
 from core.models import Korisnik, UserPreferences, EmailNotification
-from decimal import Decimal
 from datetime import datetime
 
 class Command(BaseCommand):
@@ -22,6 +22,7 @@ class Command(BaseCommand):
             trenutni_mjesec = f'{today.year}-{str(today.month).zfill(2)}'
             
             korisnici = Korisnik.objects.all()
+            parametri = tax.Parametri.iz_sistemskih()
             sent_count = 0
             skipped_count = 0
             
@@ -36,17 +37,23 @@ class Command(BaseCommand):
                 except UserPreferences.DoesNotExist:
                     pass  # Default: pošalji
                 
-                # Provjeri da li ima prihod za ovaj mjesec
-                prihod = korisnik.prihodi.filter(mjesec=trenutni_mjesec).first()
+                # Provjeri da li ima prihod za ovaj mjesec (zbir iz salda)
+                prihod = salda.ukupno(korisnik, 'prihod', mjesec=trenutni_mjesec)
                 
                 if not prihod:
                     self.stdout.write(f'  ⏭️  {korisnik.ime} - Nema prihoda za {trenutni_mjesec}')
                     skipped_count += 1
                     continue
                 
-                # Kalkuliši iznose
-                porez = prihod.iznos * Decimal('0.02')
-                doprinosi = Decimal(str(settings.PROSJECNA_BRUTO_PLATA)) * Decimal('0.70')
+                # Kalkuliši iznose (veliki: porez na godišnji prihod u mjesecu plaćanja)
+                godisnji = None
+                if korisnik.tip_preduzetnika == tax.VELIKI:
+                    godisnji = {today.year: salda.ukupno(korisnik, 'prihod', godina=today.year)}
+                obracun = tax.obracunaj(
+                    {trenutni_mjesec: prihod}, korisnik.tip_preduzetnika, parametri, godisnji
+                )
+                porez = obracun.ukupno_porez
+                doprinosi = obracun.ukupno_doprinosi
                 ukupno = porez + doprinosi
                 
                 # Email sadržaj
@@ -60,10 +67,10 @@ Podsjetnik za uplatu poreza i doprinosa za mjesec {trenutni_mjesec}.
 IZNOSI ZA UPLATU:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
-• Porez na dohodak (2%): {porez} KM
-• Doprinosi za zdravstvo (70%): {doprinosi} KM
+• Porez na dohodak: {porez:.2f} KM
+• Doprinosi: {doprinosi:.2f} KM
 
-UKUPNO ZA UPLATU: {ukupno} KM
+UKUPNO ZA UPLATU: {ukupno:.2f} KM
 
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 ⚠️  ROK ZA UPLATU: 10. {today.month + 1}. 2025.
@@ -0,0 +1,71 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand
+
+from core.management.commands.benchmark import cloudmailin_polja, ispisi_percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Lokalna zamjena za CloudMailin - šalje nalet emailova sa sintetičkim "
+        "izvodima na webhook i mjeri latenciju odgovora"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("jib", help="JIB korisnika kome se šalju izvodi")
+        parser.add_argument(
+            "--url",
+            default="http://127.0.0.1:8000/inbox/webhook/",
+            help="Adresa email_webhook-a",
+        )
+        parser.add_argument("--broj", type=int, default=50, help="Broj emailova")
+        parser.add_argument(
+            "--paralelno", type=int, default=10, help="Istovremenih zahtjeva"
+        )
+        parser.add_argument("--pdf", type=int, default=1, help="PDF-ova po emailu")
+        parser.add_argument(
+            "--stranice", type=int, default=3, help="Broj stranica po izvodu"
+        )
+        parser.add_argument(
+            "--timeout", type=float, default=30, help="Timeout kao kod CloudMailin-a"
+        )
+
+    def handle(self, *args, **options):
+        emailovi = list(
+            cloudmailin_polja(
+                options["jib"], options["broj"], options["pdf"], options["stranice"]
+            )
+        )
+        self.stdout.write(
+            f"📧 Šaljem {len(emailovi)} emailova na {options['url']} "
+            f"({options['paralelno']} paralelno)"
+        )
+
+        def posalji(email):
+            polja, prilozi = email
+            files = [
+                (polje, (naziv, sadrzaj, "application/pdf"))
+                for polje, naziv, sadrzaj in prilozi
+            ]
+            start = time.perf_counter()
+            try:
+                response = requests.post(
+                    options["url"], data=polja, files=files, timeout=options["timeout"]
+                )
+                status = response.status_code
+            except requests.RequestException as e:
+                status = type(e).__name__
+            return status, time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=options["paralelno"]) as pool:
+            rezultati = list(pool.map(posalji, emailovi))
+
+        statusi = Counter(status for status, _ in rezultati)
+        self.stdout.write(f"  Statusi:     {dict(statusi)}")
+        ispisi_percentile(self, "Latencija:", [t for _, t in rezultati])
+
+        if set(statusi) - {200, 202}:
+            self.stdout.write(self.style.WARNING("⚠️  Neki zahtjevi nisu prihvaćeni"))
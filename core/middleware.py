@@ -1,10 +1,25 @@
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.functional import SimpleLazyObject
+
+from . import pretplata
 from .models import Korisnik
 
 
+def _korisnik(request):
+    """Korisnik profil ulogovanog korisnika (isti objekat kao request.user.korisnik)"""
+    if not request.user.is_authenticated:
+        return None
+    try:
+        return request.user.korisnik
+    except Korisnik.DoesNotExist:
+        return None
+
+
 class SubscriptionMiddleware:
-    """Middleware koji provjerava da li je korisnikova pretplata aktivna"""
+    """
+    Middleware koji provjerava da li je korisnikova pretplata aktivna.
+    Stanje pretplate dolazi iz sesije (core.pretplata) - bez upita u bazu.
+    """
 
     def __init__(self, get_response):
         self.get_response = get_response
@@ -21,22 +36,17 @@ class SubscriptionMiddleware:
         ]
 
     def __call__(self, request):
+        # Korisnik se učitava tek kada ga view zatraži
+        request.korisnik = SimpleLazyObject(lambda: _korisnik(request))
+
         # Provjeri da li je korisnik ulogovan
         if request.user.is_authenticated and not request.user.is_staff:
             # Provjeri da li path nije u allowed paths
             if not any(request.path.startswith(path) for path in self.allowed_paths):
-                try:
-                    korisnik = Korisnik.objects.get(user=request.user)
-
-                    # Izračunaj datum isteka
-                    if korisnik.trial_end_date:
-                        datum_isteka = korisnik.trial_end_date
-                    else:
-                        # Ako nema trial_end_date, postavi default od registracije
-                        datum_isteka = korisnik.registrovan + timedelta(days=30)
-                        korisnik.trial_end_date = datum_isteka
-                        korisnik.save()
+                stanje = pretplata.stanje(request)
 
+                if stanje and stanje["trial_end"]:
+                    datum_isteka = stanje["trial_end"]
                     today = timezone.now().date()
 
                     # Provjeri da li je pretplata istekla
@@ -47,8 +57,5 @@ class SubscriptionMiddleware:
                     else:
                         request.subscription_expired = False
 
-                except Korisnik.DoesNotExist:
-                    pass
-
         response = self.get_response(request)
         return response
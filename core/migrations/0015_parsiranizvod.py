@@ -0,0 +1,31 @@
+# Generated by Django 5.0.1 on 2026-10-17 18:15
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_remove_uplatnica_primalac_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParsiranIzvod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pdf_hash', models.CharField(max_length=64, verbose_name='PDF Hash')),
+                ('verzija_parsera', models.CharField(max_length=20, verbose_name='Verzija parsera')),
+                ('rezultat', models.JSONField(verbose_name='Rezultat parsiranja')),
+                ('velicina', models.PositiveIntegerField(default=0, verbose_name='Veličina rezultata (bytes)')),
+                ('datum_kreiranja', models.DateTimeField(auto_now_add=True)),
+                ('posljednje_koristenje', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Parsiran izvod',
+                'verbose_name_plural': 'Parsirani izvodi (keš)',
+                'unique_together': {('pdf_hash', 'verzija_parsera')},
+            },
+        ),
+    ]
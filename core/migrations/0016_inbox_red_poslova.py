@@ -0,0 +1,59 @@
+# Generated by Django 5.0.1 on 2026-10-17 18:17
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_parsiranizvod'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InboxPosao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_email', models.CharField(blank=True, max_length=255, verbose_name='Od koga')),
+                ('subject', models.CharField(blank=True, max_length=255, verbose_name='Naslov')),
+                ('message_id', models.CharField(blank=True, max_length=255, verbose_name='Message-ID (za duplikate)')),
+                ('status', models.CharField(choices=[('na_cekanju', 'Na čekanju'), ('u_obradi', 'U obradi'), ('zavrsen', 'Završen'), ('neuspjesan', 'Neuspješan')], default='na_cekanju', max_length=20)),
+                ('pokusaji', models.PositiveIntegerField(default=0, verbose_name='Broj pokušaja')),
+                ('sljedeci_pokusaj', models.DateTimeField(default=django.utils.timezone.now)),
+                ('zakljucano_do', models.DateTimeField(blank=True, null=True, verbose_name='Worker drži posao do')),
+                ('greska', models.TextField(blank=True, verbose_name='Posljednja greška')),
+                ('datum_kreiranja', models.DateTimeField(auto_now_add=True)),
+                ('datum_zavrsetka', models.DateTimeField(blank=True, null=True)),
+                ('korisnik', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_poslovi', to='core.korisnik')),
+            ],
+            options={
+                'verbose_name': 'Inbox posao',
+                'verbose_name_plural': 'Inbox red poslova',
+                'ordering': ['-datum_kreiranja'],
+            },
+        ),
+        migrations.CreateModel(
+            name='InboxPrilog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('naziv', models.CharField(max_length=255, verbose_name='Naziv fajla')),
+                ('fajl', models.FileField(upload_to='inbox_queue/%Y/%m/')),
+                ('obradjen', models.BooleanField(default=False)),
+                ('posao', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prilozi', to='core.inboxposao')),
+            ],
+            options={
+                'verbose_name': 'Inbox prilog',
+                'verbose_name_plural': 'Inbox prilozi',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='inboxposao',
+            index=models.Index(fields=['status', 'sljedeci_pokusaj'], name='core_inboxp_status_c66f65_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inboxposao',
+            index=models.Index(fields=['korisnik', 'message_id'], name='core_inboxp_korisni_198968_idx'),
+        ),
+    ]
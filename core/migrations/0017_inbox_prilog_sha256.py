@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-17 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_inbox_red_poslova'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inboxprilog',
+            name='sha256',
+            field=models.CharField(blank=True, max_length=64, verbose_name='SHA256'),
+        ),
+        migrations.AlterField(
+            model_name='inboxprilog',
+            name='fajl',
+            field=models.FileField(upload_to='inbox_pdf/%Y/%m/'),
+        ),
+    ]
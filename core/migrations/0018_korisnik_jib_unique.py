@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-17 18:21
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def provjeri_duplikate_jib(apps, schema_editor):
+    """Jasna poruka umjesto IntegrityError ako dva korisnika dijele JIB"""
+    Korisnik = apps.get_model("core", "Korisnik")
+    duplikati = list(
+        Korisnik.objects.values("jib")
+        .annotate(broj=Count("id"))
+        .filter(broj__gt=1)
+        .values_list("jib", flat=True)[:20]
+    )
+    if duplikati:
+        raise RuntimeError(
+            "JIB mora biti jedinstven - ispravite korisnike sa dupliranim "
+            f"JIB-om prije migracije: {', '.join(duplikati)}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_inbox_prilog_sha256'),
+    ]
+
+    operations = [
+        migrations.RunPython(provjeri_duplikate_jib, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='korisnik',
+            name='jib',
+            field=models.CharField(max_length=13, unique=True),
+        ),
+    ]
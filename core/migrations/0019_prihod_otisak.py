@@ -0,0 +1,75 @@
+# Generated by Django 5.0.1 on 2026-10-17 18:25
+
+import hashlib
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def otisak_transakcije(korisnik_id, datum, iznos, vrsta, opis, izvor="izvod"):
+    """
+    Zamrznuta kopija core.uvoz.otisak_transakcije u trenutku migracije -
+    kasnije izmjene formule ne smiju mijenjati šta je ova migracija upisala
+    """
+    opis = " ".join((opis or "").split()).casefold()[:500]
+    dijelovi = [
+        str(korisnik_id),
+        datum.isoformat() if datum else "",
+        str(abs(Decimal(str(iznos))).quantize(Decimal("0.01"))),
+        vrsta,
+        opis,
+        izvor,
+    ]
+    return hashlib.sha256("\x1f".join(dijelovi).encode("utf-8")).hexdigest()
+
+
+def popuni_otiske(apps, schema_editor):
+    """
+    Otisak za postojeće transakcije iz izvoda (one imaju datum). Duplikati
+    ostaju bez otiska - ne brišemo podatke u migraciji, samo se ne
+    računaju u jedinstvenost.
+    """
+    Prihod = apps.get_model("core", "Prihod")
+
+    vidjeno = set()
+    za_upis = []
+    for prihod in (
+        Prihod.objects.filter(datum__isnull=False)
+        .only("id", "korisnik_id", "datum", "iznos", "vrsta", "opis")
+        .order_by("id")
+        .iterator(chunk_size=2000)
+    ):
+        otisak = otisak_transakcije(
+            prihod.korisnik_id, prihod.datum, prihod.iznos, prihod.vrsta, prihod.opis
+        )
+        if (prihod.korisnik_id, otisak) in vidjeno:
+            continue
+        vidjeno.add((prihod.korisnik_id, otisak))
+
+        prihod.otisak = otisak
+        za_upis.append(prihod)
+        if len(za_upis) >= 1000:
+            Prihod.objects.bulk_update(za_upis, ["otisak"])
+            za_upis = []
+
+    Prihod.objects.bulk_update(za_upis, ["otisak"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_korisnik_jib_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prihod',
+            name='otisak',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(popuni_otiske, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='prihod',
+            constraint=models.UniqueConstraint(fields=('korisnik', 'otisak'), name='prihod_otisak_jedinstven'),
+        ),
+    ]
@@ -0,0 +1,113 @@
+# Generated by Django 5.0.1 on 2026-10-17 18:28
+
+import hashlib
+import posixpath
+from collections import defaultdict
+
+import core.models
+import django.db.models.deletion
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def sazmi_izvode(apps, schema_editor):
+    """
+    Svaka transakcija je imala svoju kopiju PDF-a (izvodi/<naziv>_xyz.pdf).
+    Kopije istog sadržaja postaju jedan Izvod. Stare kopije ostaju na disku
+    (migracija se može vratiti) - briše ih `manage.py pocisti_izvode_fajlove`.
+    """
+    Prihod = apps.get_model("core", "Prihod")
+    Izvod = apps.get_model("core", "Izvod")
+
+    po_hashu = {}  # sha256 -> izvod_id
+    po_fajlu = {}  # stari naziv -> izvod_id (None ako fajl ne postoji)
+    transakcije = defaultdict(list)  # izvod_id -> [prihod_id]
+
+    for pk, ime in (
+        Prihod.objects.exclude(izvod_fajl="")
+        .exclude(izvod_fajl=None)
+        .values_list("pk", "izvod_fajl")
+        .iterator(chunk_size=2000)
+    ):
+        if ime not in po_fajlu:
+            try:
+                sha256 = hashlib.sha256()
+                with default_storage.open(ime, "rb") as f:
+                    for chunk in iter(lambda: f.read(65536), b""):
+                        sha256.update(chunk)
+            except OSError:
+                print(f"⚠️ Izvod {ime} ne postoji - transakcija ostaje bez PDF-a")
+                po_fajlu[ime] = None
+                continue
+            sha256 = sha256.hexdigest()
+
+            putanja = f"izvodi/{sha256[:2]}/{sha256}.pdf"
+            if sha256 not in po_hashu:
+                if not default_storage.exists(putanja):
+                    with default_storage.open(ime, "rb") as f:
+                        putanja = default_storage.save(putanja, f)
+                po_hashu[sha256] = Izvod.objects.create(
+                    sha256=sha256,
+                    fajl=putanja,
+                    naziv=posixpath.basename(ime)[:255],
+                    velicina=default_storage.size(putanja),
+                ).pk
+
+            po_fajlu[ime] = po_hashu[sha256]
+
+        if po_fajlu[ime]:
+            transakcije[po_fajlu[ime]].append(pk)
+
+    for izvod_id, pks in transakcije.items():
+        for start in range(0, len(pks), 500):
+            Prihod.objects.filter(pk__in=pks[start : start + 500]).update(
+                izvod_id=izvod_id
+            )
+
+
+def vrati_izvod_fajl(apps, schema_editor):
+    """Svaka transakcija ponovo dobija izvod_fajl - putanju fajla svog Izvoda"""
+    Prihod = apps.get_model("core", "Prihod")
+    Izvod = apps.get_model("core", "Izvod")
+
+    Prihod.objects.filter(izvod__isnull=False).update(
+        izvod_fajl=Subquery(
+            Izvod.objects.filter(pk=OuterRef("izvod_id")).values("fajl")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_prihod_otisak'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Izvod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('fajl', models.FileField(upload_to=core.models.putanja_izvoda)),
+                ('naziv', models.CharField(blank=True, max_length=255)),
+                ('velicina', models.PositiveIntegerField(default=0)),
+                ('datum_kreiranja', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Izvod',
+                'verbose_name_plural': 'Izvodi (PDF)',
+            },
+        ),
+        migrations.AddField(
+            model_name='prihod',
+            name='izvod',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='transakcije', to='core.izvod'),
+        ),
+        migrations.RunPython(sazmi_izvode, vrati_izvod_fajl),
+        migrations.RemoveField(
+            model_name='prihod',
+            name='izvod_fajl',
+        ),
+    ]
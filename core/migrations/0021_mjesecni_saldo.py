@@ -0,0 +1,56 @@
+# Generated by Django 5.0.1 on 2026-10-17 18:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+
+
+def izgradi_salda(apps, schema_editor):
+    """Početna salda iz postojećih transakcija (isto kao core.salda.obnovi)"""
+    Prihod = apps.get_model("core", "Prihod")
+    MjesecniSaldo = apps.get_model("core", "MjesecniSaldo")
+
+    MjesecniSaldo.objects.bulk_create(
+        [
+            MjesecniSaldo(**red)
+            for red in Prihod.objects.order_by()
+            .values("korisnik_id", "mjesec", "vrsta")
+            .annotate(
+                suma=Sum("iznos"),
+                broj=Count("id"),
+                prvi_datum=Min("datum"),
+                zadnji_datum=Max("datum"),
+            )
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_izvod_skladiste'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MjesecniSaldo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mjesec', models.CharField(max_length=7)),
+                ('vrsta', models.CharField(choices=[('prihod', 'Prihod'), ('rashod', 'Rashod')], max_length=10)),
+                ('suma', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('broj', models.PositiveIntegerField(default=0)),
+                ('prvi_datum', models.DateField(blank=True, null=True)),
+                ('zadnji_datum', models.DateField(blank=True, null=True)),
+                ('korisnik', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mjesecna_salda', to='core.korisnik')),
+            ],
+            options={
+                'verbose_name': 'Mjesečni saldo',
+                'verbose_name_plural': 'Mjesečna salda',
+                'ordering': ['mjesec'],
+                'unique_together': {('korisnik', 'mjesec', 'vrsta')},
+            },
+        ),
+        migrations.RunPython(izgradi_salda, migrations.RunPython.noop),
+    ]
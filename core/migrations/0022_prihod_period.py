@@ -0,0 +1,42 @@
+# Generated by Django 5.0.1 on 2026-10-17 18:34
+
+from datetime import date
+
+from django.db import migrations, models
+
+
+def popuni_period(apps, schema_editor):
+    """Period iz mjeseca - jedan UPDATE po mjesecu, ne po transakciji"""
+    Prihod = apps.get_model("core", "Prihod")
+
+    for mjesec in Prihod.objects.order_by().values_list("mjesec", flat=True).distinct():
+        try:
+            period = date(int(mjesec[:4]), int(mjesec[5:7]), 1)
+        except (TypeError, ValueError):
+            print(f"⚠️ Neispravan mjesec '{mjesec}' - period ostaje prazan")
+            continue
+        Prihod.objects.filter(mjesec=mjesec).update(period=period)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_mjesecni_saldo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prihod',
+            name='period',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(popuni_period, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='prihod',
+            index=models.Index(fields=['korisnik', 'vrsta', 'datum'], name='prihod_korisnik_vrsta_datum'),
+        ),
+        migrations.AddIndex(
+            model_name='prihod',
+            index=models.Index(fields=['korisnik', 'period'], name='prihod_korisnik_period'),
+        ),
+    ]
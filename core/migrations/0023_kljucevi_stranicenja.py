@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-17 18:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_prihod_period'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='faktura',
+            index=models.Index(fields=['user', 'datum_izdavanja', 'id'], name='faktura_user_datum_id'),
+        ),
+        migrations.AddIndex(
+            model_name='prihod',
+            index=models.Index(fields=['korisnik', 'datum', 'id'], name='prihod_korisnik_datum_id'),
+        ),
+        migrations.AddIndex(
+            model_name='systemlog',
+            index=models.Index(fields=['timestamp', 'id'], name='systemlog_timestamp_id'),
+        ),
+    ]
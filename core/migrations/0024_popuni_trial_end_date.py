@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-17 19:05
+
+from datetime import timedelta
+
+from django.db import migrations
+
+
+def popuni_trial_end_date(apps, schema_editor):
+    """Kraj trial-a = registracija + 30 dana - jedan UPDATE po datumu registracije"""
+    Korisnik = apps.get_model("core", "Korisnik")
+
+    bez_datuma = Korisnik.objects.filter(trial_end_date__isnull=True)
+    for registrovan in bez_datuma.order_by().values_list(
+        "registrovan", flat=True
+    ).distinct():
+        bez_datuma.filter(registrovan=registrovan).update(
+            trial_end_date=registrovan + timedelta(days=30)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_kljucevi_stranicenja'),
+    ]
+
+    operations = [
+        migrations.RunPython(popuni_trial_end_date, migrations.RunPython.noop),
+    ]
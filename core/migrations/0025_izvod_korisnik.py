@@ -0,0 +1,92 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def razdvoji_izvode(apps, schema_editor):
+    """
+    Izvod je bio zajednički za sve korisnike sa istim PDF-om. Pripada
+    korisniku čija je transakcija prva uvezena, a ostali korisnici dobijaju
+    svoj red (isti fajl, bez tuđeg naziva). Izvod bez transakcija se briše;
+    fajl ostaje za `manage.py pocisti_izvode_fajlove`.
+    """
+    Izvod = apps.get_model("core", "Izvod")
+    Prihod = apps.get_model("core", "Prihod")
+
+    Izvod.objects.filter(transakcije__isnull=True).delete()
+
+    parovi = (
+        Prihod.objects.filter(izvod__isnull=False)
+        .order_by("izvod_id", "pk")
+        .values_list("izvod_id", "korisnik_id")
+        .distinct()
+    )
+    vlasnik = {}  # izvod_id -> korisnik_id prve transakcije
+    ostali = set()  # (izvod_id, korisnik_id)
+    for izvod_id, korisnik_id in parovi:
+        if izvod_id not in vlasnik:
+            vlasnik[izvod_id] = korisnik_id
+        elif korisnik_id != vlasnik[izvod_id]:
+            ostali.add((izvod_id, korisnik_id))
+
+    for korisnik_id in set(vlasnik.values()):
+        Izvod.objects.filter(
+            pk__in=[i for i, k in vlasnik.items() if k == korisnik_id]
+        ).update(korisnik_id=korisnik_id)
+
+    for izvod_id, korisnik_id in ostali:
+        izvod = Izvod.objects.get(pk=izvod_id)
+        kopija = Izvod.objects.create(
+            korisnik_id=korisnik_id,
+            sha256=izvod.sha256,
+            fajl=izvod.fajl.name,
+            velicina=izvod.velicina,
+        )
+        Prihod.objects.filter(izvod_id=izvod_id, korisnik_id=korisnik_id).update(
+            izvod_id=kopija.pk
+        )
+
+
+def spoji_izvode(apps, schema_editor):
+    """Izvodi istog sadržaja se spajaju u najstariji red"""
+    Izvod = apps.get_model("core", "Izvod")
+    Prihod = apps.get_model("core", "Prihod")
+
+    prvi = {}  # sha256 -> izvod_id
+    for pk, sha256 in Izvod.objects.order_by("pk").values_list("pk", "sha256"):
+        if sha256 not in prvi:
+            prvi[sha256] = pk
+            continue
+        Prihod.objects.filter(izvod_id=pk).update(izvod_id=prvi[sha256])
+        Izvod.objects.filter(pk=pk).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_popuni_trial_end_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='izvod',
+            name='korisnik',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='izvodi', to='core.korisnik'),
+        ),
+        migrations.AlterField(
+            model_name='izvod',
+            name='sha256',
+            field=models.CharField(max_length=64),
+        ),
+        migrations.RunPython(razdvoji_izvode, spoji_izvode),
+        migrations.AlterField(
+            model_name='izvod',
+            name='korisnik',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='izvodi', to='core.korisnik'),
+        ),
+        migrations.AddConstraint(
+            model_name='izvod',
+            constraint=models.UniqueConstraint(fields=('korisnik', 'sha256'), name='izvod_korisnik_sha256'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.1 on 2026-10-17 19:25
+
+from django.db import migrations, models
+
+
+def ukloni_duple_message_id(apps, schema_editor):
+    """
+    Paralelne isporuke istog emaila su ranije mogle upisati dva posla.
+    Svi se zadržavaju, ali samo najstariji zadržava Message-ID.
+    """
+    InboxPosao = apps.get_model("core", "InboxPosao")
+
+    vidjeno = set()
+    visak = []
+    for pk, korisnik_id, message_id in (
+        InboxPosao.objects.exclude(message_id="")
+        .order_by("pk")
+        .values_list("pk", "korisnik_id", "message_id")
+        .iterator(chunk_size=2000)
+    ):
+        if (korisnik_id, message_id) in vidjeno:
+            visak.append(pk)
+        vidjeno.add((korisnik_id, message_id))
+
+    for start in range(0, len(visak), 500):
+        InboxPosao.objects.filter(pk__in=visak[start : start + 500]).update(
+            message_id=""
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_izvod_korisnik'),
+    ]
+
+    operations = [
+        migrations.RunPython(ukloni_duple_message_id, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='inboxposao',
+            name='core_inboxp_korisni_198968_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='inboxposao',
+            constraint=models.UniqueConstraint(condition=models.Q(('message_id', ''), _negated=True), fields=('korisnik', 'message_id'), name='inbox_posao_message_id'),
+        ),
+    ]
@@ -1,8 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
-from datetime import timedelta
-from decimal import Decimal
+from datetime import date, timedelta
+from decimal import ROUND_HALF_EVEN, Decimal
 from django.core.validators import MinValueValidator
 import json
 import hashlib
@@ -28,7 +28,7 @@ class Korisnik(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     ime = models.CharField(max_length=200)
     plan = models.CharField(max_length=20, choices=PLAN_CHOICES, default="Starter")
-    jib = models.CharField(max_length=13)
+    jib = models.CharField(max_length=13, unique=True)
     racun = models.CharField(max_length=20)
     registrovan = models.DateField(auto_now_add=True)
 
@@ -52,6 +52,14 @@ class Korisnik(models.Model):
         help_text="Da li je admin ručno produžio trial period",
     )
 
+    def save(self, *args, **kwargs):
+        # Trial traje 30 dana od registracije, ako nije drugačije postavljeno
+        if self.trial_end_date is None:
+            self.trial_end_date = (self.registrovan or date.today()) + timedelta(
+                days=30
+            )
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.ime} ({self.plan})"
 
@@ -68,6 +76,49 @@ class Korisnik(models.Model):
         verbose_name_plural = "Korisnici"
 
 
+def putanja_izvoda(instance, filename):
+    """Izvod se čuva pod svojim SHA256 - isti sadržaj, isti fajl"""
+    return f"izvodi/{instance.sha256[:2]}/{instance.sha256}.pdf"
+
+
+class Izvod(models.Model):
+    """
+    PDF bankovnog izvoda korisnika, jednom po sadržaju (core.izvodi_skladiste).
+    Transakcije ga referenciraju, a briše se sa posljednjom transakcijom.
+    Fajl je adresiran sadržajem, pa ga korisnici sa istim PDF-om dijele, ali
+    svaki ima svoj red (i svoj naziv fajla).
+    """
+
+    korisnik = models.ForeignKey(
+        Korisnik, on_delete=models.CASCADE, related_name="izvodi"
+    )
+    sha256 = models.CharField(max_length=64)
+    fajl = models.FileField(upload_to=putanja_izvoda)
+    naziv = models.CharField(max_length=255, blank=True)  # Originalni naziv fajla
+    velicina = models.PositiveIntegerField(default=0)
+    datum_kreiranja = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.naziv or self.sha256[:16]} ({self.velicina} B)"
+
+    class Meta:
+        verbose_name = "Izvod"
+        verbose_name_plural = "Izvodi (PDF)"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["korisnik", "sha256"], name="izvod_korisnik_sha256"
+            ),
+        ]
+
+
+def period_mjeseca(mjesec):
+    """Prvi dan mjeseca za "2025-01" (Prihod.period), None za neispravan mjesec"""
+    try:
+        return date(int(mjesec[:4]), int(mjesec[5:7]), 1)
+    except (TypeError, ValueError):
+        return None
+
+
 class Prihod(models.Model):
     VRSTA_CHOICES = [
         ("prihod", "Prihod"),
@@ -78,24 +129,87 @@ class Prihod(models.Model):
         Korisnik, on_delete=models.CASCADE, related_name="prihodi"
     )
     mjesec = models.CharField(max_length=7)  # Format: 2025-01
+    # Prvi dan mjeseca - isto što i `mjesec`, ali kao datum za indeksirane opsege
+    period = models.DateField(null=True, blank=True, editable=False)
     datum = models.DateField(null=True, blank=True)  # NOVO - tačan datum transakcije
     iznos = models.DecimalField(max_digits=10, decimal_places=2)
     vrsta = models.CharField(
         max_length=10, choices=VRSTA_CHOICES, default="prihod"
     )  # NOVO
     opis = models.CharField(max_length=500, blank=True)  # NOVO
-    izvod_fajl = models.FileField(
-        upload_to="izvodi/", blank=True, null=True
-    )  # NOVO - PDF izvoda
+    izvod = models.ForeignKey(
+        Izvod,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="transakcije",
+    )  # PDF izvoda iz kojeg je transakcija uvezena
+    # SHA256 normalizovane transakcije (core.uvoz.otisak_transakcije);
+    # prazan za ručno unesene stavke
+    otisak = models.CharField(max_length=64, null=True, blank=True, editable=False)
     datum_kreiranja = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         znak = "+" if self.vrsta == "prihod" else "-"
         return f"{znak}{self.iznos} KM - {self.opis[:50]}"
 
+    def save(self, *args, **kwargs):
+        """Period se uvijek računa iz mjeseca"""
+        self.period = period_mjeseca(self.mjesec)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "mjesec" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "period"}
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ["-datum", "-mjesec"]
         verbose_name_plural = "Prihodi i Rashodi"
+        indexes = [
+            # Zbirovi i liste po vrsti u opsegu datuma
+            models.Index(
+                fields=["korisnik", "vrsta", "datum"],
+                name="prihod_korisnik_vrsta_datum",
+            ),
+            # Mjesečni opsezi (salda, godine, podsjetnici)
+            models.Index(fields=["korisnik", "period"], name="prihod_korisnik_period"),
+            # Straničenje po ključu (datum, id) - core.stranicenje
+            models.Index(
+                fields=["korisnik", "datum", "id"], name="prihod_korisnik_datum_id"
+            ),
+        ]
+        constraints = [
+            # Ista transakcija iz izvoda se ne može uvesti dva puta
+            models.UniqueConstraint(
+                fields=["korisnik", "otisak"], name="prihod_otisak_jedinstven"
+            ),
+        ]
+
+
+class MjesecniSaldo(models.Model):
+    """
+    Zbir Prihod stavki po korisniku, mjesecu i vrsti (core.salda).
+    Ažurira se pri svakoj izmjeni transakcija; pregledi čitaju ovu tabelu
+    umjesto da svaki put sabiraju sve transakcije.
+    """
+
+    korisnik = models.ForeignKey(
+        Korisnik, on_delete=models.CASCADE, related_name="mjesecna_salda"
+    )
+    mjesec = models.CharField(max_length=7)  # Format: 2025-01, kao Prihod.mjesec
+    vrsta = models.CharField(max_length=10, choices=Prihod.VRSTA_CHOICES)
+    suma = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    broj = models.PositiveIntegerField(default=0)
+    prvi_datum = models.DateField(null=True, blank=True)
+    zadnji_datum = models.DateField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.korisnik_id} {self.mjesec} {self.vrsta}: {self.suma} KM ({self.broj})"
+
+    class Meta:
+        unique_together = ["korisnik", "mjesec", "vrsta"]
+        ordering = ["mjesec"]
+        verbose_name = "Mjesečni saldo"
+        verbose_name_plural = "Mjesečna salda"
 
 
 # ============================================
@@ -190,18 +304,30 @@ class Faktura(models.Model):
         verbose_name_plural = "Fakture"
         ordering = ["-datum_izdavanja", "-broj_fakture"]
         unique_together = ["user", "broj_fakture"]
+        indexes = [
+            # Straničenje po ključu (datum_izdavanja, id) - core.stranicenje
+            models.Index(
+                fields=["user", "datum_izdavanja", "id"],
+                name="faktura_user_datum_id",
+            ),
+        ]
 
     def __str__(self):
         return f"Faktura {self.broj_fakture} - {self.primalac_naziv}"
 
     def izracunaj_ukupno(self):
-        """Izračunava ukupne iznose fakture uključujući PDV i dinamičku valutu"""
-        stavke = self.stavke.all()
-
-        # Računanje suma na osnovu stavki
-        # Prema tvom modelu StavkaFakture: koristimo cijena_po_jedinici, kolicina i pdv_iznos
-        ukupno_bez_pdv = sum(stavka.ukupna_cijena for stavka in stavke)
-        pdv_iznos = sum(stavka.pdv_iznos for stavka in stavke)
+        """
+        Izračunava ukupne iznose fakture uključujući PDV i dinamičku valutu -
+        zbirovi stavki jednim aggregate() upitom
+        """
+        zbirovi = self.stavke.aggregate(
+            ukupno_bez_pdv=models.Sum("ukupna_cijena"),
+            pdv_iznos=models.Sum("pdv_iznos"),
+        )
+        # SQLite vraća SUM decimala kao float - vrati na fening
+        cent = Decimal("0.01")
+        ukupno_bez_pdv = (zbirovi["ukupno_bez_pdv"] or Decimal("0")).quantize(cent)
+        pdv_iznos = (zbirovi["pdv_iznos"] or Decimal("0")).quantize(cent)
         ukupno_sa_pdv = ukupno_bez_pdv + pdv_iznos
 
         # Ažuriranje numeričkih polja u modelu Faktura
@@ -281,16 +407,32 @@ class StavkaFakture(models.Model):
     def __str__(self):
         return f"{self.redni_broj}. {self.opis}"
 
+    def izracunaj(self):
+        """Iznosi stavke iz količine, cijene i PDV stope (zaokruženo na fening)"""
+        cent = Decimal("0.01")
+        ukupna_cijena = Decimal(self.kolicina) * Decimal(self.cijena_po_jedinici)
+        pdv_iznos = ukupna_cijena * Decimal(self.pdv_stopa) / Decimal(100)
+        # Nezaokruženi iznosi se zaokružuju kao pri upisu DecimalField-a
+        # (ROUND_HALF_EVEN) - isti feninzi kao ranije upisani u bazu
+        self.ukupna_cijena = ukupna_cijena.quantize(cent, ROUND_HALF_EVEN)
+        self.pdv_iznos = pdv_iznos.quantize(cent, ROUND_HALF_EVEN)
+        self.ukupna_cijena_sa_pdv = (ukupna_cijena + pdv_iznos).quantize(
+            cent, ROUND_HALF_EVEN
+        )
+
     def save(self, *args, **kwargs):
-        """Override save da automatski računa iznose"""
-        self.ukupna_cijena = self.kolicina * self.cijena_po_jedinici
-        self.pdv_iznos = self.ukupna_cijena * (Decimal(self.pdv_stopa) / Decimal(100))
-        self.ukupna_cijena_sa_pdv = self.ukupna_cijena + self.pdv_iznos
+        """
+        Override save da automatski računa iznose. Za izmjenu jedne stavke;
+        nova faktura sa stavkama se pravi sa core.fakture.NovaFaktura.
+        """
+        from .fakture import osvjezi_zbirove_nakon_commita
+
+        self.izracunaj()
 
         super().save(*args, **kwargs)
 
-        # Ažuriraj ukupne iznose fakture
-        self.faktura.izracunaj_ukupno()
+        # Zbirovi fakture se računaju jednom, nakon commit-a
+        osvjezi_zbirove_nakon_commita(self.faktura_id)
 
 
 # ============================================
@@ -686,12 +828,21 @@ class EmailInbox(models.Model):
 
     def parse_pdf(self):
         """Parsuj PDF i sačuvaj transakcije"""
-        from .utils import parse_bank_statement_pdf
+        from .izvodi_cache import parsiraj_kesirano
 
         if not self.pdf_fajl:
             return []
 
-        transakcije = parse_bank_statement_pdf(self.pdf_fajl)
+        try:
+            rezultat = parsiraj_kesirano(
+                self.pdf_fajl, pdf_hash=self.pdf_hash or None, banka=self.banka_naziv
+            )
+        except Exception as e:
+            print(f"❌ Parser error: {str(e)}")
+            rezultat = {"transakcije": [], "pouzdanost": 0}
+
+        transakcije = rezultat["transakcije"]
+        self.confidence = rezultat["pouzdanost"]
 
         # Konvertuj u JSON-friendly format
         self.transakcije_json = [
@@ -700,6 +851,8 @@ class EmailInbox(models.Model):
                 "opis": t["opis"],
                 "iznos": float(t["iznos"]),
                 "tip": "prihod" if t["iznos"] > 0 else "rashod",
+                "partner": t.get("partner", ""),
+                "referenca": t.get("referenca", ""),
             }
             for t in transakcije
         ]
@@ -748,6 +901,110 @@ class EmailInbox(models.Model):
         )
 
 
+class ParsiranIzvod(models.Model):
+    """Keš rezultata parsiranja izvoda - ključ je SHA256 PDF-a i verzija parsera"""
+
+    pdf_hash = models.CharField(max_length=64, verbose_name="PDF Hash")
+    verzija_parsera = models.CharField(max_length=20, verbose_name="Verzija parsera")
+    rezultat = models.JSONField(verbose_name="Rezultat parsiranja")
+    velicina = models.PositiveIntegerField(
+        default=0, verbose_name="Veličina rezultata (bytes)"
+    )
+    datum_kreiranja = models.DateTimeField(auto_now_add=True)
+    posljednje_koristenje = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        unique_together = ["pdf_hash", "verzija_parsera"]
+        verbose_name = "Parsiran izvod"
+        verbose_name_plural = "Parsirani izvodi (keš)"
+
+    def __str__(self):
+        return f"{self.pdf_hash[:16]}... (v{self.verzija_parsera})"
+
+
+class InboxPosao(models.Model):
+    """
+    Posao u redu za obradu dolaznog emaila sa izvodima.
+
+    Webhook samo upiše posao i priloge i odmah odgovori; parsiranje radi
+    management komanda `obradi_inbox`, sa ponavljanjem i backoff-om.
+    """
+
+    STATUS_CHOICES = [
+        ("na_cekanju", "Na čekanju"),
+        ("u_obradi", "U obradi"),
+        ("zavrsen", "Završen"),
+        ("neuspjesan", "Neuspješan"),
+    ]
+
+    korisnik = models.ForeignKey(
+        Korisnik, on_delete=models.CASCADE, related_name="inbox_poslovi"
+    )
+
+    # Email metadata
+    from_email = models.CharField(max_length=255, blank=True, verbose_name="Od koga")
+    subject = models.CharField(max_length=255, blank=True, verbose_name="Naslov")
+    message_id = models.CharField(
+        max_length=255, blank=True, verbose_name="Message-ID (za duplikate)"
+    )
+
+    # Stanje posla
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default="na_cekanju"
+    )
+    pokusaji = models.PositiveIntegerField(default=0, verbose_name="Broj pokušaja")
+    sljedeci_pokusaj = models.DateTimeField(default=timezone.now)
+    zakljucano_do = models.DateTimeField(
+        blank=True, null=True, verbose_name="Worker drži posao do"
+    )
+    greska = models.TextField(blank=True, verbose_name="Posljednja greška")
+
+    datum_kreiranja = models.DateTimeField(auto_now_add=True)
+    datum_zavrsetka = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["-datum_kreiranja"]
+        verbose_name = "Inbox posao"
+        verbose_name_plural = "Inbox red poslova"
+        indexes = [
+            models.Index(fields=["status", "sljedeci_pokusaj"]),
+        ]
+        constraints = [
+            # Ponovljena isporuka istog emaila (core.inbox_queue.zakazi);
+            # email bez Message-ID se ne provjerava
+            models.UniqueConstraint(
+                fields=["korisnik", "message_id"],
+                condition=~models.Q(message_id=""),
+                name="inbox_posao_message_id",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Posao #{self.pk} ({self.status}) - {self.korisnik.ime}"
+
+
+class InboxPrilog(models.Model):
+    """
+    PDF prilog emaila sačuvan uz posao dok ga worker ne obradi. Isti fajl
+    postaje EmailInbox.pdf_fajl - ne kopira se.
+    """
+
+    posao = models.ForeignKey(
+        InboxPosao, on_delete=models.CASCADE, related_name="prilozi"
+    )
+    naziv = models.CharField(max_length=255, verbose_name="Naziv fajla")
+    fajl = models.FileField(upload_to="inbox_pdf/%Y/%m/")
+    sha256 = models.CharField(max_length=64, blank=True, verbose_name="SHA256")
+    obradjen = models.BooleanField(default=False)
+
+    class Meta:
+        verbose_name = "Inbox prilog"
+        verbose_name_plural = "Inbox prilozi"
+
+    def __str__(self):
+        return self.naziv
+
+
 class SystemLog(models.Model):
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     action = models.CharField(max_length=100)
@@ -762,6 +1019,10 @@ class SystemLog(models.Model):
     class Meta:
         ordering = ["-timestamp"]
         verbose_name_plural = "System Logs"
+        indexes = [
+            # Straničenje po ključu (timestamp, id) - core.stranicenje
+            models.Index(fields=["timestamp", "id"], name="systemlog_timestamp_id"),
+        ]
 
 
 class FailedRequest(models.Model):
@@ -963,9 +1224,13 @@ class SistemskiParametri(models.Model):
 
     @classmethod
     def get_parametri(cls):
-        """Helper metod - vraća parametre ili kreira default ako ne postoje"""
-        parametri, created = cls.objects.get_or_create(pk=1)
-        return parametri
+        """
+        Trenutni parametri kao keširan snimak samo za čitanje
+        (core.parametri_cache); za izmjenu učitati red iz baze
+        """
+        from .parametri_cache import parametri
+
+        return parametri()
 
     def save(self, *args, **kwargs):
         # Dozvoli samo jedan red
@@ -0,0 +1,115 @@
+"""
+Keš sistemskih parametara (SistemskiParametri) - jedan red, čita se skoro
+na svakoj stranici.
+
+Parametri se čitaju kao nepromjenljiv snimak (`Snimak`) koji se drži u
+memoriji procesa i u Django cache-u, pod trenutnom verzijom. Proces vjeruje
+svom snimku `PARAMETRI_CACHE_LOKALNO_TTL` sekundi, a onda samo provjeri
+verziju u dijeljenom kešu - baza se čita tek kada se verzija promijeni.
+Signal u core.signals nakon commit-a postavlja novu verziju, pa svi procesi
+vide izmjenu najkasnije nakon lokalnog TTL-a (proces koji je sačuvao -
+odmah).
+"""
+
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERZIJA = "parametri:verzija"
+
+_lokalno = None  # (vazi_do, verzija, snimak)
+_lock = threading.Lock()
+
+
+def _ttl_lokalno():
+    return getattr(settings, "PARAMETRI_CACHE_LOKALNO_TTL", 5)
+
+
+def _kljuc(verzija):
+    return f"parametri:{verzija}"
+
+
+class Snimak:
+    """Vrijednosti SistemskiParametri u trenutku čitanja - samo za čitanje"""
+
+    def __init__(self, vrijednosti):
+        self.__dict__.update(vrijednosti)
+
+    def __setattr__(self, ime, vrijednost):
+        raise AttributeError("Snimak parametara se ne mijenja - koristi model")
+
+    def __delattr__(self, ime):
+        raise AttributeError("Snimak parametara se ne mijenja - koristi model")
+
+    def __repr__(self):
+        return f"<Snimak parametara: doprinosi {self.mjesecni_doprinosi} KM>"
+
+
+def _iz_baze():
+    """Vrijednosti iz baze (kreira red sa default vrijednostima ako ga nema)"""
+    from .models import SistemskiParametri
+
+    red, _ = SistemskiParametri.objects.select_related("azurirao").get_or_create(
+        pk=1
+    )
+    vrijednosti = {
+        polje.attname: getattr(red, polje.attname)
+        for polje in SistemskiParametri._meta.concrete_fields
+        if not polje.is_relation
+    }
+    # Korisničko ime umjesto User objekta - snimak ne vuče relacije
+    vrijednosti["azurirao"] = red.azurirao.username if red.azurirao else None
+    return vrijednosti
+
+
+def _zapamti_lokalno(verzija, snimak):
+    global _lokalno
+    with _lock:
+        _lokalno = (time.monotonic() + _ttl_lokalno(), verzija, snimak)
+
+
+def parametri():
+    """Trenutni sistemski parametri (Snimak) - bez upita u stabilnom stanju"""
+    unos = _lokalno
+    if unos and unos[0] > time.monotonic():
+        return unos[2]
+
+    verzija = cache.get(VERZIJA)
+    if unos and verzija == unos[1]:
+        _zapamti_lokalno(verzija, unos[2])
+        return unos[2]
+
+    if verzija is None:
+        verzija = uuid.uuid4().hex
+        if not cache.add(VERZIJA, verzija, None):
+            verzija = cache.get(VERZIJA)
+
+    vrijednosti = cache.get(_kljuc(verzija))
+    if vrijednosti is None:
+        # Verzija je pročitana prije baze: ako se parametri u međuvremenu
+        # promijene, nova verzija zamjenjuje ovaj unos
+        vrijednosti = _iz_baze()
+        cache.set(_kljuc(verzija), vrijednosti, None)
+
+    snimak = Snimak(vrijednosti)
+    _zapamti_lokalno(verzija, snimak)
+    return snimak
+
+
+def zastarjelo():
+    """Nova verzija nakon commit-a - svi procesi ponovo čitaju parametre"""
+
+    def nova_verzija():
+        global _lokalno
+        stara = cache.get(VERZIJA)
+        cache.set(VERZIJA, uuid.uuid4().hex, None)
+        if stara:
+            cache.delete(_kljuc(stara))
+        with _lock:
+            _lokalno = None
+
+    transaction.on_commit(nova_verzija)
@@ -0,0 +1,83 @@
+"""
+Parseri bankovnih izvoda, jedan modul po banci.
+
+Banka se prepoznaje po prvoj stranici izvoda i pokreće se samo njen parser.
+Nova banka se dodaje kao modul sa podklasom BankParser označenom sa
+@registruj i importom ispod.
+"""
+
+from .base import BankParser, PdfStranice, Registar, registar, registruj
+
+__all__ = [
+    "VERZIJA_PARSERA",
+    "BankParser",
+    "PdfStranice",
+    "Registar",
+    "registar",
+    "registruj",
+    "prepoznaj_banku",
+    "parsiraj",
+    "parsiraj_stranice",
+]
+
+# Povećati pri svakoj promjeni koja mijenja rezultat parsiranja - keš
+# (core.izvodi_cache) tada ignoriše rezultate stare verzije
+VERZIJA_PARSERA = "2"
+
+# Redoslijed importa je i redoslijed pokušaja kada se banka ne prepozna
+from . import atos, nlb  # noqa: F401,E402 - registracija parsera
+from . import (  # noqa: F401,E402
+    hypo,
+    intesa,
+    komercijalna,
+    raiffeisen,
+    sparkasse,
+    unicredit,
+)
+
+
+def prepoznaj_banku(tekst):
+    """Naziv banke iz email adrese, naslova ili naziva fajla, ili None"""
+    tekst = tekst.lower()
+
+    # Podstring a ne cijela riječ - adrese su tipa izvodi@nlbbanka.ba
+    for parser in registar:
+        if any(otisak in tekst for otisak in parser.otisci):
+            return parser.naziv
+    return None
+
+
+def parsiraj(pdf_file, banka=None, registar=registar):
+    """
+    Parsira izvod i vraća {"banka", "transakcije", "pouzdanost"}. Greške
+    se propuštaju pozivaocu.
+
+    Transakcija je dict {"datum", "opis", "iznos"} (iznos sa predznakom,
+    rashodi su negativni); stavke iz tabele imaju i "partner" i "referenca".
+
+    `banka` je ključ ili naziv banke poznat od ranije (npr. iz emaila) i
+    koristi se samo kada se banka ne prepozna na prvoj stranici.
+    """
+    with PdfStranice(pdf_file) as stranice:
+        return parsiraj_stranice(stranice, banka=banka, registar=registar)
+
+
+def parsiraj_stranice(stranice, banka=None, registar=registar):
+    """Kao parsiraj(), nad već otvorenim PdfStranice"""
+    if not len(stranice):
+        return {"banka": None, "transakcije": [], "pouzdanost": 0}
+
+    parser = registar.prepoznaj(stranice.tekst(0))
+    if parser is None and banka:
+        parser = registar.get(banka)
+
+    if parser:
+        return {"banka": parser.naziv, **parser.parsiraj(stranice)}
+
+    # Nepoznat izgled - probamo redom, stranice su već keširane
+    for parser in registar:
+        rezultat = parser.parsiraj(stranice)
+        if rezultat["transakcije"]:
+            return {"banka": parser.naziv, **rezultat}
+
+    return {"banka": None, "transakcije": [], "pouzdanost": 0}
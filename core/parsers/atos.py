@@ -0,0 +1,23 @@
+"""Atos Bank a.d. Banja Luka - iznosi u formatu 1,234.56"""
+
+import re
+
+from .base import IZNOS_ENGLESKI, BankParser, iznos_engleski, registruj
+
+# Tražimo red koji sadrži PROMET i dva decimalna broja na kraju
+# Poboljšani regex koji ignoriše sve između riječi PROMET i cifara
+PROMET_PATTERN = re.compile(
+    r"UKUPAN\s+PROMET.*?([\d\.,]+\.\d{2})\s+([\d\.,]+\.\d{2})",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+@registruj
+class AtosParser(BankParser):
+    kljuc = "atos"
+    naziv = "Atos Banka"
+    oznaka = "Atos"
+    otisci = ("atos",)
+    promet_pattern = PROMET_PATTERN
+    format_iznosa = IZNOS_ENGLESKI
+    pretvori_iznos = staticmethod(iznos_engleski)
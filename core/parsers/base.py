@@ -0,0 +1,454 @@
+"""
+Zajednička infrastruktura parsera bankovnih izvoda: lijeno čitanje
+stranica PDF-a, bazna klasa parsera i registar sa prepoznavanjem banke.
+"""
+
+import re
+from datetime import date
+from decimal import Decimal
+
+import PyPDF2
+
+# ============================================
+# STRANICE PDF-a
+# ============================================
+
+
+class PdfStranice:
+    """
+    Lijeno izvlačenje teksta iz PDF-a, stranicu po stranicu.
+
+    Svaka stranica se obrađuje najviše jednom i tek kada je zatražena
+    (prepoznavanje banke čita samo prvu). BankParser čita sve stranice jer
+    su stavke na svim stranicama, ali nijednu dva puta. Uz tekst se čuvaju
+    i redovi riječi sa koordinatama (za čitanje tabele transakcija).
+    """
+
+    # Riječi čiji se vrh razlikuje do ovoliko tačaka su u istom redu
+    TOLERANCIJA_REDA = 3
+
+    def __init__(self, pdf_file):
+        import pdfplumber
+
+        pdf_file.seek(0)
+        self.pdf_file = pdf_file
+        self.pdf = pdfplumber.open(pdf_file)
+        self._stranice = {}
+        self._pypdf_reader = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.pdf.pages)
+
+    def close(self):
+        self.pdf.close()
+
+    def tekst(self, indeks):
+        """Tekst jedne stranice (keširano)"""
+        return self._stranica(indeks)[1]
+
+    def redovi(self, indeks):
+        """Redovi stranice - liste riječi pdfplumber-a sortirane po x (keširano)"""
+        return self._stranica(indeks)[0]
+
+    def _stranica(self, indeks):
+        indeks %= len(self)
+        if indeks not in self._stranice:
+            self._stranice[indeks] = self._izvuci(indeks)
+        return self._stranice[indeks]
+
+    def _izvuci(self, indeks):
+        page = self.pdf.pages[indeks]
+        redovi = self._grupisi_redove(page.extract_words())
+        # Keš karaktera stranice više ne treba - drži memoriju ravnom
+        page.flush_cache()
+
+        tekst = "\n".join(" ".join(w["text"] for w in red) for red in redovi)
+
+        # Ako pdfplumber ne izvuče ništa, probaj PyPDF2 (rezervna varijanta)
+        if not tekst.strip():
+            if self._pypdf_reader is None:
+                self.pdf_file.seek(0)
+                self._pypdf_reader = PyPDF2.PdfReader(self.pdf_file)
+            tekst = self._pypdf_reader.pages[indeks].extract_text() or ""
+
+        return redovi, tekst
+
+    @classmethod
+    def _grupisi_redove(cls, rijeci):
+        redovi = []
+        for rijec in sorted(rijeci, key=lambda w: (w["top"], w["x0"])):
+            if redovi and rijec["top"] - redovi[-1][0]["top"] <= cls.TOLERANCIJA_REDA:
+                redovi[-1].append(rijec)
+            else:
+                redovi.append([rijec])
+
+        for red in redovi:
+            red.sort(key=lambda w: w["x0"])
+        return redovi
+
+    def procitana(self, indeks):
+        """Da li je stranica već obrađena"""
+        return indeks % len(self) in self._stranice
+
+    def redoslijed(self, prioritet=(-1, 0)):
+        """Indeksi stranica - prvo prioritetne, zatim ostale redom"""
+        broj = len(self)
+        vidjeno = set()
+        for indeks in list(prioritet) + list(range(broj)):
+            if -broj <= indeks < broj:
+                indeks %= broj
+                if indeks not in vidjeno:
+                    vidjeno.add(indeks)
+                    yield indeks
+
+    def skeniraj(self, prioritet=(-1, 0)):
+        """
+        Generator (indeks, tekst stranice) u prioritetnom redoslijedu.
+        Stranica se izvlači tek kada dođe na red, pa pozivalac može stati čim
+        nađe što traži; vraća se samo nova stranica - tekst ranije pročitanih
+        se ne spaja ponovo na svakom koraku.
+        """
+        for indeks in self.redoslijed(prioritet):
+            yield indeks, self.tekst(indeks)
+
+
+# ============================================
+# ZAJEDNIČKI OBRASCI
+# ============================================
+
+DATUM_IZVODA_PATTERN = re.compile(
+    r"(?:na dan|Datum izvoda|Datum)[:\s]+(\d{2})\.(\d{2})\.(\d{4})",
+    re.IGNORECASE,
+)
+DATUM_PATTERN = re.compile(r"(\d{2})\.(\d{2})\.(\d{4})")
+DATUM_RIJEC_PATTERN = re.compile(r"^(\d{2})\.(\d{2})\.(\d{4})\.?$")
+RIJEC_PATTERN = re.compile(r"\w+")
+
+# Poziv na broj / referenca: velika slova i cifre, bar 6 znakova, bar jedna cifra
+REFERENCA_PATTERN = re.compile(r"^(?=.*\d)[A-Z0-9][A-Z0-9/\-]{5,}$")
+
+# Iznosi u domaćem (1.234,56) i engleskom (1,234.56) formatu
+IZNOS_DOMACI = r"\d{1,3}(?:\.\d{3})*,\d{2}"
+IZNOS_ENGLESKI = r"\d{1,3}(?:,\d{3})*\.\d{2}"
+
+
+def promet_pattern(*oznake, iznos=IZNOS_DOMACI):
+    """Obrazac reda sa totalima: oznaka, pa duguje i potražuje"""
+    return re.compile(
+        rf"(?:{'|'.join(oznake)})[^\d\n]*?({iznos})\s+({iznos})",
+        re.IGNORECASE,
+    )
+
+
+def iznos_domaci(tekst):
+    """'1.234,56' -> Decimal('1234.56')"""
+    return Decimal(tekst.replace(".", "").replace(",", "."))
+
+
+def iznos_engleski(tekst):
+    """'1,234.56' -> Decimal('1234.56')"""
+    return Decimal(tekst.replace(",", ""))
+
+
+def datum_izvoda(tekst):
+    """Datum izvoda iz zaglavlja, ili prvi datum u tekstu"""
+    datum_match = DATUM_IZVODA_PATTERN.search(tekst)
+    if not datum_match:
+        datum_match = DATUM_PATTERN.search(tekst)
+
+    if datum_match:
+        dan, mj, god = datum_match.groups()
+        return date(int(god), int(mj), int(dan))
+    return date.today()
+
+
+# Pouzdanost rezultata (EmailInbox.confidence) - iz usklađivanja sa totalima
+POUZDANOST_USKLADJENO = 100  # Zbir stavki odgovara totalima izvoda
+POUZDANOST_TOTALI = 70  # Samo totali - stavke nisu nađene ili se ne slažu
+POUZDANOST_BEZ_TOTALA = 40  # Stavke bez totala za provjeru
+
+
+# ============================================
+# PARSER
+# ============================================
+
+
+class BankParser:
+    """
+    Bazni parser izvoda jedne banke.
+
+    Podklasa definiše ključ, naziv, riječi po kojima se banka prepoznaje na
+    prvoj stranici, redoslijed čitanja stranica, format iznosa i (precompiled)
+    obrazac ukupnog prometa. Obrasci se kompajliraju jednom, pri importu
+    modula.
+
+    Stavke se čitaju iz tabele izvoda po koordinatama riječi: red zaglavlja
+    određuje kolone duguje/potražuje, a svaki red koji počinje datumom i ima
+    iznos u jednoj od tih kolona je transakcija. Zbir stavki se provjerava
+    totalima izvoda.
+    """
+
+    kljuc = None
+    naziv = None
+    oznaka = None  # Kratki naziv u opisu transakcije: "Ukupno prihodi (NLB)"
+    otisci = ()  # Riječi (mala slova) koje identifikuju banku
+    prioritet_stranica = (-1, 0)  # Totali na kraju, datum na početku
+    promet_pattern = None
+    format_iznosa = IZNOS_DOMACI
+    pretvori_iznos = staticmethod(iznos_domaci)
+
+    # Nazivi kolona u zaglavlju tabele (mala slova)
+    kolone_duguje = ("duguje", "isplata", "isplate", "zaduženje", "teret")
+    kolone_potrazuje = ("potražuje", "uplata", "uplate", "odobrenje", "korist")
+    kolone_ostale = ("saldo", "stanje")
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.iznos_pattern = re.compile(rf"^-?{cls.format_iznosa}$")
+
+    def ukupni_promet(self, tekst):
+        """Vraća (rashod, prihod) iz totala izvoda, ili None"""
+        match = self.promet_pattern.search(tekst)
+        if not match:
+            return None
+
+        rashod = self.pretvori_iznos(match.group(1))
+        prihod = self.pretvori_iznos(match.group(2))
+        if rashod <= 0 and prihod <= 0:
+            return None
+        return rashod, prihod
+
+    def parsiraj(self, stranice):
+        """
+        Parsira otvoreni PdfStranice i vraća {"transakcije", "pouzdanost"}.
+
+        Ako se stavke slažu sa totalima vraćaju se stavke, inače samo dva
+        reda sa totalima (kao ranije) i niža pouzdanost.
+        """
+        # Stavke su u tabeli koja se proteže kroz sve stranice, pa se za
+        # njih izvod uvijek čita cijeli - svaka stranica jednom (keš u
+        # PdfStranice). Rano zaustavljanje važi samo za traženje totala.
+        stavke = self.stavke(stranice)
+
+        # Red sa totalima je na jednoj stranici - traži se stranica po stranica
+        promet = None
+        tekst = ""
+        for _, tekst in stranice.skeniraj(self.prioritet_stranica):
+            promet = self.ukupni_promet(tekst)
+            if promet:
+                break
+
+        if not promet:
+            if stavke:
+                return {"transakcije": stavke, "pouzdanost": POUZDANOST_BEZ_TOTALA}
+            return {"transakcije": [], "pouzdanost": 0}
+
+        rashod, prihod = promet
+        if stavke and self.uskladjeno(stavke, rashod, prihod):
+            return {"transakcije": stavke, "pouzdanost": POUZDANOST_USKLADJENO}
+
+        if stavke:
+            print(
+                f"⚠️ {self.oznaka}: {len(stavke)} stavki se ne slaže sa totalima "
+                f"izvoda - koristim totale"
+            )
+        return {
+            "transakcije": self._totali(self._datum(stranice, tekst), rashod, prihod),
+            "pouzdanost": POUZDANOST_TOTALI,
+        }
+
+    @staticmethod
+    def _datum(stranice, tekst):
+        """Datum izvoda - iz zaglavlja prve stranice, inače sa stranice totala"""
+        prva = stranice.tekst(0)
+        return datum_izvoda(prva if DATUM_PATTERN.search(prva) else tekst)
+
+    @staticmethod
+    def uskladjeno(stavke, rashod, prihod):
+        """Da li zbir stavki tačno odgovara totalima izvoda"""
+        zbir_rashoda = sum(-s["iznos"] for s in stavke if s["iznos"] < 0)
+        zbir_prihoda = sum(s["iznos"] for s in stavke if s["iznos"] > 0)
+        return zbir_rashoda == rashod and zbir_prihoda == prihod
+
+    def _totali(self, datum, rashod, prihod):
+        transakcije = []
+        if rashod > 0:
+            transakcije.append(
+                {
+                    "datum": datum,
+                    "opis": f"Ukupno rashodi ({self.oznaka})",
+                    "iznos": -rashod,
+                }
+            )
+        if prihod > 0:
+            transakcije.append(
+                {
+                    "datum": datum,
+                    "opis": f"Ukupno prihodi ({self.oznaka})",
+                    "iznos": prihod,
+                }
+            )
+        return transakcije
+
+    # ============================================
+    # STAVKE IZ TABELE
+    # ============================================
+
+    def stavke(self, stranice):
+        """
+        Sve transakcije iz tabela izvoda - jedan prolaz kroz sve stranice,
+        redom dokumenta (zaglavlje tabele se prenosi na sljedeće stranice)
+        """
+        stavke = []
+        kolone = None  # Zaglavlje se ne ponavlja uvijek na svakoj stranici
+
+        for indeks in range(len(stranice)):
+            for red in stranice.redovi(indeks):
+                zaglavlje = self._kolone(red)
+                if zaglavlje:
+                    kolone = zaglavlje
+                    continue
+
+                if kolone:
+                    stavka = self._stavka(red, kolone)
+                    if stavka:
+                        stavke.append(stavka)
+
+        return stavke
+
+    def _kolone(self, red):
+        """Lista (x1, kolona) ako je red zaglavlje tabele, inače None"""
+        kolone = []
+        for rijec in red:
+            naziv = rijec["text"].lower().strip(".:")
+            if naziv in self.kolone_duguje:
+                kolone.append((rijec["x1"], "duguje"))
+            elif naziv in self.kolone_potrazuje:
+                kolone.append((rijec["x1"], "potrazuje"))
+            elif naziv in self.kolone_ostale:
+                kolone.append((rijec["x1"], "ostalo"))
+
+        nazivi = {kolona for _, kolona in kolone}
+        if "duguje" in nazivi and "potrazuje" in nazivi:
+            return kolone
+        return None
+
+    def _stavka(self, red, kolone):
+        """Transakcija iz jednog reda tabele, ili None"""
+        datum_match = DATUM_RIJEC_PATTERN.match(red[0]["text"])
+        if not datum_match:
+            return None
+
+        iznos = None
+        rijeci = []
+        for rijec in red[1:]:
+            tekst = rijec["text"]
+            if self.iznos_pattern.match(tekst):
+                # Iznosi su poravnati desno - kolona sa najbližom desnom ivicom
+                _, kolona = min(kolone, key=lambda k: abs(k[0] - rijec["x1"]))
+                vrijednost = abs(self.pretvori_iznos(tekst))
+                if vrijednost and kolona == "duguje":
+                    iznos = -vrijednost
+                elif vrijednost and kolona == "potrazuje":
+                    iznos = vrijednost
+            elif not DATUM_RIJEC_PATTERN.match(tekst):  # Datum valute preskačemo
+                rijeci.append(tekst)
+
+        if not iznos:
+            return None
+
+        referenca = ""
+        for i in range(len(rijeci) - 1, -1, -1):
+            if REFERENCA_PATTERN.match(rijeci[i]):
+                referenca = rijeci.pop(i)
+                break
+
+        partner = " ".join(rijeci)
+        dan, mj, god = datum_match.groups()
+        return {
+            "datum": date(int(god), int(mj), int(dan)),
+            "opis": f"{partner} ({referenca})" if referenca else partner,
+            "iznos": iznos,
+            "partner": partner,
+            "referenca": referenca,
+        }
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.kljuc}>"
+
+
+# ============================================
+# REGISTAR
+# ============================================
+
+
+class Registar:
+    """
+    Registar parsera po ključu banke.
+
+    Prepoznavanje banke je jedan prolaz kroz riječi teksta sa lookup-om u
+    dict, pa trošak ne raste sa brojem registrovanih banaka.
+    """
+
+    def __init__(self):
+        self.parseri = {}
+        self._otisci = {}
+        self._nazivi = {}
+
+    def registruj(self, parser):
+        if parser.kljuc in self.parseri:
+            raise ValueError(f"Parser '{parser.kljuc}' je već registrovan")
+
+        for otisak in parser.otisci:
+            if otisak in self._otisci:
+                raise ValueError(
+                    f"Otisak '{otisak}' već koristi parser "
+                    f"'{self._otisci[otisak].kljuc}'"
+                )
+
+        self.parseri[parser.kljuc] = parser
+        self._nazivi[parser.naziv] = parser
+        for otisak in parser.otisci:
+            self._otisci[otisak] = parser
+        return parser
+
+    def ukloni(self, kljuc):
+        parser = self.parseri.pop(kljuc)
+        self._nazivi.pop(parser.naziv, None)
+        for otisak in parser.otisci:
+            self._otisci.pop(otisak, None)
+
+    def __iter__(self):
+        return iter(self.parseri.values())
+
+    def __len__(self):
+        return len(self.parseri)
+
+    def get(self, kljuc_ili_naziv):
+        """Parser po ključu ("nlb") ili nazivu banke ("NLB Banka")"""
+        return self.parseri.get(kljuc_ili_naziv) or self._nazivi.get(
+            kljuc_ili_naziv
+        )
+
+    def prepoznaj(self, tekst):
+        """Parser prve banke koja se spominje u tekstu, ili None"""
+        for rijec in RIJEC_PATTERN.findall(tekst.lower()):
+            parser = self._otisci.get(rijec)
+            if parser:
+                return parser
+        return None
+
+
+registar = Registar()
+
+
+def registruj(klasa):
+    """Dekorator - registruje parser banke u globalni registar"""
+    registar.registruj(klasa())
+    return klasa
@@ -0,0 +1,14 @@
+"""Hypo Alpe Adria (Addiko) - iznosi u formatu 1.234,56"""
+
+from .base import BankParser, promet_pattern, registruj
+
+PROMET_PATTERN = promet_pattern(r"Ukupan\s+promet", r"Ukupno")
+
+
+@registruj
+class HypoParser(BankParser):
+    kljuc = "hypo"
+    naziv = "Hypo Alpe Adria"
+    oznaka = "Hypo"
+    otisci = ("hypo", "addiko")
+    promet_pattern = PROMET_PATTERN
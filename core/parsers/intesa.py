@@ -0,0 +1,14 @@
+"""Intesa Sanpaolo Banka - iznosi u formatu 1.234,56"""
+
+from .base import BankParser, promet_pattern, registruj
+
+PROMET_PATTERN = promet_pattern(r"Ukupan\s+promet", r"Promet\s+računa")
+
+
+@registruj
+class IntesaParser(BankParser):
+    kljuc = "intesa"
+    naziv = "Intesa Sanpaolo"
+    oznaka = "Intesa"
+    otisci = ("intesa",)
+    promet_pattern = PROMET_PATTERN
@@ -0,0 +1,14 @@
+"""Komercijalna banka - iznosi u formatu 1.234,56"""
+
+from .base import BankParser, promet_pattern, registruj
+
+PROMET_PATTERN = promet_pattern(r"Ukupan\s+promet", r"Ukupno")
+
+
+@registruj
+class KomercijalnaParser(BankParser):
+    kljuc = "komercijalna"
+    naziv = "Komercijalna Banka"
+    oznaka = "Komercijalna"
+    otisci = ("komercijalna",)
+    promet_pattern = PROMET_PATTERN
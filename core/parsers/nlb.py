@@ -0,0 +1,20 @@
+"""NLB Banka a.d. Banja Luka - iznosi u formatu 1.234,56"""
+
+import re
+
+from .base import IZNOS_DOMACI, BankParser, registruj
+
+# Red sa totalima: duguje, potražuje, saldo pa tekst "Ukupno duguje"
+PROMET_PATTERN = re.compile(
+    rf"({IZNOS_DOMACI})\s+({IZNOS_DOMACI})\s+{IZNOS_DOMACI}\s*Ukupno duguje"
+)
+
+
+@registruj
+class NLBParser(BankParser):
+    kljuc = "nlb"
+    naziv = "NLB Banka"
+    oznaka = "NLB"
+    otisci = ("nlb",)
+    promet_pattern = PROMET_PATTERN
+
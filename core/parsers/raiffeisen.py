@@ -0,0 +1,14 @@
+"""Raiffeisen Bank - iznosi u formatu 1.234,56"""
+
+from .base import BankParser, promet_pattern, registruj
+
+PROMET_PATTERN = promet_pattern(r"Ukupan\s+promet", r"Promet\s+u\s+periodu")
+
+
+@registruj
+class RaiffeisenParser(BankParser):
+    kljuc = "raiffeisen"
+    naziv = "Raiffeisen"
+    oznaka = "Raiffeisen"
+    otisci = ("raiffeisen",)
+    promet_pattern = PROMET_PATTERN
@@ -0,0 +1,14 @@
+"""Sparkasse Bank - iznosi u formatu 1.234,56"""
+
+from .base import BankParser, promet_pattern, registruj
+
+PROMET_PATTERN = promet_pattern(r"Promet\s+ukupno", r"Ukupan\s+promet")
+
+
+@registruj
+class SparkasseParser(BankParser):
+    kljuc = "sparkasse"
+    naziv = "Sparkasse"
+    oznaka = "Sparkasse"
+    otisci = ("sparkasse",)
+    promet_pattern = PROMET_PATTERN
@@ -0,0 +1,125 @@
+"""
+Sintetički PDF izvodi (Atos i NLB izgled) za testove i benchmark.
+
+Izvod ima zaglavlje banke na svakoj stranici, datum izvoda na prvoj i red
+sa ukupnim prometom na posljednjoj - kao pravi izvodi koje parseri čitaju.
+Isti `seed` daje iste bajtove.
+"""
+
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.pdfgen import canvas as pdf_canvas
+
+KLIJENTI = [
+    "MEGA DOO BANJA LUKA",
+    "TELEKOM SRPSKE AD",
+    "LECIC MIRJANA",
+    "PTT-RADENKO BRKIC",
+    "ELEKTROKRAJINA AD",
+    "GOOGLE IRELAND LIMITED",
+]
+
+
+def _iznos_atos(iznos):
+    """Atos format: 1,234.56"""
+    return f"{iznos:,.2f}"
+
+
+def _iznos_nlb(iznos):
+    """NLB format: 1.234,56"""
+    return f"{iznos:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def generisi_izvod(banka, broj_stranica=3, redova_po_stranici=30, seed=0):
+    """Generiši sintetički PDF izvod (Atos ili NLB) - vraća bytes"""
+    rnd = random.Random(seed)
+    datum_izvoda = date(2025, 1, 1) + timedelta(days=rnd.randint(0, 360))
+    formatiraj = _iznos_atos if banka == "atos" else _iznos_nlb
+
+    buffer = BytesIO()
+    p = pdf_canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+
+    duguje = Decimal("0")
+    potrazuje = Decimal("0")
+
+    for stranica in range(1, broj_stranica + 1):
+        y = height - 2 * cm
+        p.setFont("Helvetica-Bold", 12)
+        if banka == "atos":
+            p.drawString(2 * cm, y, "ATOS BANK a.d. Banja Luka")
+        else:
+            p.drawString(2 * cm, y, "NLB Banka a.d. Banja Luka")
+        y -= 0.7 * cm
+
+        p.setFont("Helvetica", 9)
+        if stranica == 1:
+            p.drawString(
+                2 * cm, y, f"Izvod broj {seed + 1} na dan {datum_izvoda:%d.%m.%Y}"
+            )
+            y -= 0.7 * cm
+
+        p.drawString(2 * cm, y, "Datum")
+        p.drawString(4.5 * cm, y, "Partner")
+        p.drawString(10 * cm, y, "Referenca")
+        p.drawRightString(14 * cm, y, "Duguje")
+        p.drawRightString(17 * cm, y, "Potražuje")
+        if banka == "nlb":
+            p.drawRightString(19.5 * cm, y, "Saldo")
+        y -= 0.5 * cm
+
+        for _ in range(redova_po_stranici):
+            iznos = Decimal(rnd.randint(1000, 500000)) / 100
+            je_prihod = rnd.random() < 0.6
+            if je_prihod:
+                potrazuje += iznos
+            else:
+                duguje += iznos
+
+            p.drawString(2 * cm, y, datum_izvoda.strftime("%d.%m.%Y"))
+            p.drawString(4.5 * cm, y, rnd.choice(KLIJENTI))
+            p.drawString(10 * cm, y, f"{rnd.randint(10 ** 9, 10 ** 10 - 1)}")
+            kolona = 17 * cm if je_prihod else 14 * cm
+            p.drawRightString(kolona, y, formatiraj(iznos))
+            if banka == "nlb":
+                p.drawRightString(19.5 * cm, y, formatiraj(abs(potrazuje - duguje)))
+            y -= 0.5 * cm
+
+        if stranica == broj_stranica:
+            y -= 0.5 * cm
+            p.setFont("Helvetica-Bold", 9)
+            if banka == "atos":
+                p.drawString(
+                    2 * cm,
+                    y,
+                    f"UKUPAN PROMET {formatiraj(duguje)} {formatiraj(potrazuje)}",
+                )
+            else:
+                saldo = potrazuje - duguje
+                p.drawString(
+                    2 * cm,
+                    y,
+                    f"{formatiraj(duguje)} {formatiraj(potrazuje)} "
+                    f"{formatiraj(abs(saldo))} Ukupno duguje",
+                )
+
+        p.showPage()
+
+    p.save()
+    return buffer.getvalue()
+
+
+def generisi_korpus(broj, broj_stranica=3):
+    """Lista (naziv, bytes) - naizmjenično Atos i NLB izvodi"""
+    korpus = []
+    for i in range(broj):
+        banka = "atos" if i % 2 == 0 else "nlb"
+        korpus.append(
+            (f"{banka}-{i}.pdf", generisi_izvod(banka, broj_stranica, seed=i))
+        )
+    return korpus
@@ -0,0 +1,14 @@
+"""UniCredit Bank - iznosi u formatu 1.234,56"""
+
+from .base import BankParser, promet_pattern, registruj
+
+PROMET_PATTERN = promet_pattern(r"Ukupan\s+promet", r"Ukupno")
+
+
+@registruj
+class UniCreditParser(BankParser):
+    kljuc = "unicredit"
+    naziv = "UniCredit"
+    oznaka = "UniCredit"
+    otisci = ("unicredit",)
+    promet_pattern = PROMET_PATTERN
@@ -0,0 +1,89 @@
+"""
+Stanje pretplate ulogovanog korisnika (korisnik_id, plan, kraj trial-a).
+
+SubscriptionMiddleware ga čita na svakom zahtjevu, pa se ne uzima iz baze
+nego iz sesije: unos važi `PRETPLATA_SESSION_TTL` sekundi i dok se slaže
+verzija korisnika u Django cache-u. Signal u core.signals mijenja verziju
+nakon svakog čuvanja Korisnik-a (plaćanje, promjena plana, produženje
+trial-a iz admin panela), pa se izmjena vidi već na sljedećem zahtjevu -
+i u sesijama na drugim uređajima.
+"""
+
+import time
+import uuid
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+KLJUC_SESIJE = "pretplata"
+
+
+def _ttl():
+    return getattr(settings, "PRETPLATA_SESSION_TTL", 300)
+
+
+def _kljuc_verzije(user_id):
+    return f"pretplata:verzija:{user_id}"
+
+
+def _verzija(user_id):
+    kljuc = _kljuc_verzije(user_id)
+    verzija = cache.get(kljuc)
+    if verzija is None:
+        verzija = uuid.uuid4().hex
+        if not cache.add(kljuc, verzija, None):
+            verzija = cache.get(kljuc)
+    return verzija
+
+
+def stanje(request):
+    """
+    {"korisnik_id", "plan", "trial_end"} za ulogovanog korisnika, ili None
+    ako nema Korisnik profil. `trial_end` je date.
+    """
+    from .models import Korisnik
+
+    user_id = request.user.pk
+    verzija = _verzija(user_id)
+    unos = request.session.get(KLJUC_SESIJE)
+    if (
+        not unos
+        or unos["user_id"] != user_id
+        or unos["verzija"] != verzija
+        or unos["vazi_do"] < time.time()
+    ):
+        red = (
+            Korisnik.objects.filter(user_id=user_id)
+            .values_list("pk", "plan", "trial_end_date")
+            .first()
+        )
+        unos = {
+            "user_id": user_id,
+            "verzija": verzija,
+            "vazi_do": time.time() + _ttl(),
+            "korisnik_id": red[0] if red else None,
+            "plan": red[1] if red else None,
+            "trial_end": red[2].isoformat() if red and red[2] else None,
+        }
+        request.session[KLJUC_SESIJE] = unos
+
+    if unos["korisnik_id"] is None:
+        return None
+    return {
+        "korisnik_id": unos["korisnik_id"],
+        "plan": unos["plan"],
+        "trial_end": date.fromisoformat(unos["trial_end"])
+        if unos["trial_end"]
+        else None,
+    }
+
+
+def zastarjelo(*user_ids):
+    """Nova verzija nakon commit-a - sesije ponovo čitaju stanje iz baze"""
+    kljucevi = {_kljuc_verzije(u) for u in user_ids if u}
+    if kljucevi:
+        transaction.on_commit(
+            lambda: cache.set_many({k: uuid.uuid4().hex for k in kljucevi}, None)
+        )
@@ -0,0 +1,63 @@
+"""
+Prijem PDF priloga bez kopiranja u memoriji.
+
+Prilog se u jednom prolazu snima u privremeni fajl na disku i usput mu se
+računa SHA256. Isti fajl zatim ide u storage (FileSystemStorage ga samo
+premjesti) i parseru, pa je u memoriji u svakom trenutku najviše jedan
+chunk, bez obzira na veličinu izvoda.
+"""
+
+import base64
+import hashlib
+
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+# Dužina base64 teksta koji se dekodira odjednom (djeljiva sa 4)
+BASE64_CHUNK = 64 * 1024
+
+
+class HashUploadHandler(TemporaryFileUploadHandler):
+    """
+    Multipart upload ide direktno na disk (i kada je manji od
+    FILE_UPLOAD_MAX_MEMORY_SIZE), a gotov fajl ima atribut `sha256`.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self._sha256 = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self._sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        fajl = super().file_complete(file_size)
+        fajl.sha256 = self._sha256.hexdigest()
+        return fajl
+
+
+def base64_u_fajl(content_base64, naziv, content_type="application/pdf"):
+    """
+    Dekodira base64 prilog (JSON format CloudMailin-a) u privremeni fajl,
+    chunk po chunk, i računa SHA256. Vraća TemporaryUploadedFile sa `sha256`.
+    """
+    # Prelomi linija bi pomjerili granice base64 grupa
+    if "\n" in content_base64 or "\r" in content_base64:
+        content_base64 = "".join(content_base64.split())
+
+    fajl = TemporaryUploadedFile(naziv, content_type, 0, None)
+    sha256 = hashlib.sha256()
+    try:
+        for start in range(0, len(content_base64), BASE64_CHUNK):
+            chunk = base64.b64decode(content_base64[start : start + BASE64_CHUNK])
+            sha256.update(chunk)
+            fajl.write(chunk)
+    except Exception:
+        fajl.close()
+        raise
+
+    fajl.size = fajl.tell()
+    fajl.seek(0)
+    fajl.sha256 = sha256.hexdigest()
+    return fajl
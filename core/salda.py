@@ -0,0 +1,299 @@
+"""
+Mjesečna salda - zbirovi Prihod stavki po korisniku, mjesecu i vrsti.
+
+Pregledi (dashboard, prihodi, izvodi, bilans, godišnji izvještaj) čitaju
+MjesecniSaldo, pa je cijena stranice O(broj mjeseci), ne O(broj transakcija).
+Tabela se održava u hodu:
+  - nova transakcija (signal) - jedan UPDATE sa F() izrazima, ili INSERT
+  - izmjena (signal) - ponovo se sabira samo taj mjesec
+  - brisanje (signal) - mjeseci se pamte i sabiraju jednom nakon commit-a
+  - masovni uvoz (core.uvoz) - ponovo se sabiraju uvezeni mjeseci
+`manage.py mjesecna_salda` gradi tabelu iznova ili je provjerava.
+"""
+
+import threading
+from calendar import monthrange
+from collections import OrderedDict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+
+NULA = Decimal("0")
+
+# Mjeseci za obnavljanje nakon commit-a - {korisnik_id: {mjesec}}
+_na_cekanju = threading.local()
+
+
+def mjesec_datuma(datum):
+    """2025-01 za datum (format Prihod.mjesec)"""
+    return datum.strftime("%Y-%m")
+
+
+def _opseg_godine(godina):
+    return {"mjesec__gte": f"{godina}-01", "mjesec__lte": f"{godina}-12"}
+
+
+# ============================================
+# ODRŽAVANJE
+# ============================================
+
+
+def dodaj(korisnik_id, mjesec, vrsta, iznos, datum=None):
+    """Dodaje jednu novu transakciju u saldo njenog mjeseca"""
+    from .models import MjesecniSaldo
+
+    izmjene = {"suma": F("suma") + iznos, "broj": F("broj") + 1}
+    if datum:
+        izmjene["prvi_datum"] = Least(Coalesce("prvi_datum", Value(datum)), Value(datum))
+        izmjene["zadnji_datum"] = Greatest(
+            Coalesce("zadnji_datum", Value(datum)), Value(datum)
+        )
+
+    saldo = MjesecniSaldo.objects.filter(
+        korisnik_id=korisnik_id, mjesec=mjesec, vrsta=vrsta
+    )
+    if saldo.update(**izmjene):
+        return
+
+    try:
+        with transaction.atomic():
+            MjesecniSaldo.objects.create(
+                korisnik_id=korisnik_id,
+                mjesec=mjesec,
+                vrsta=vrsta,
+                suma=iznos,
+                broj=1,
+                prvi_datum=datum,
+                zadnji_datum=datum,
+            )
+    except IntegrityError:
+        # Saldo je u međuvremenu kreirala druga transakcija
+        saldo.update(**izmjene)
+
+
+def _obnovi_na_cekanju():
+    mjeseci = getattr(_na_cekanju, "mjeseci", None)
+    _na_cekanju.mjeseci = {}
+    for korisnik_id, mjeseci_korisnika in (mjeseci or {}).items():
+        obnovi(korisnik_id, mjeseci_korisnika)
+
+
+def obnovi_nakon_commita(korisnik_id, mjesec):
+    """
+    Saldo mjeseca se ponovo sabira nakon commit-a; brisanje N transakcija u
+    istoj transakciji daje jedno obnavljanje po korisniku (van transakcije -
+    odmah)
+    """
+    if not hasattr(_na_cekanju, "mjeseci"):
+        _na_cekanju.mjeseci = {}
+    _na_cekanju.mjeseci.setdefault(korisnik_id, set()).add(mjesec)
+    # Prvi callback obnovi sve zapamćene mjesece, ostali nemaju šta da rade
+    transaction.on_commit(_obnovi_na_cekanju)
+
+
+def obnovi(korisnik_id=None, mjeseci=None):
+    """
+    Ponovo sabira salda iz transakcija - za jednog korisnika i/ili samo
+    navedene mjesece (bez argumenata: cijela tabela). Vraća broj salda.
+    """
+    from .models import MjesecniSaldo, Prihod, period_mjeseca
+
+    opseg = Q()
+    if korisnik_id is not None:
+        opseg &= Q(korisnik_id=korisnik_id)
+    transakcije = Prihod.objects.filter(opseg)
+    if mjeseci is not None:
+        mjeseci = set(mjeseci)
+        opseg &= Q(mjesec__in=mjeseci)
+        # Indeks (korisnik, period)
+        transakcije = transakcije.filter(
+            period__in={period_mjeseca(m) for m in mjeseci}
+        )
+
+    salda = [
+        MjesecniSaldo(**red)
+        for red in transakcije
+        .order_by()
+        .values("korisnik_id", "mjesec", "vrsta")
+        .annotate(
+            suma=Sum("iznos"),
+            broj=Count("id"),
+            prvi_datum=Min("datum"),
+            zadnji_datum=Max("datum"),
+        )
+    ]
+
+    with transaction.atomic():
+        MjesecniSaldo.objects.filter(opseg).delete()
+        MjesecniSaldo.objects.bulk_create(salda, batch_size=500)
+
+    return len(salda)
+
+
+def razlike(korisnik_id=None):
+    """Salda koja se ne slažu sa transakcijama - lista (ključ, očekivano, u tabeli)"""
+    from .models import MjesecniSaldo, Prihod
+
+    polja = ("suma", "broj", "prvi_datum", "zadnji_datum")
+    opseg = Q() if korisnik_id is None else Q(korisnik_id=korisnik_id)
+
+    ocekivano = {
+        (r["korisnik_id"], r["mjesec"], r["vrsta"]): tuple(r[p] for p in polja)
+        for r in Prihod.objects.filter(opseg)
+        .order_by()
+        .values("korisnik_id", "mjesec", "vrsta")
+        .annotate(
+            suma=Sum("iznos"),
+            broj=Count("id"),
+            prvi_datum=Min("datum"),
+            zadnji_datum=Max("datum"),
+        )
+    }
+    u_tabeli = {
+        (r["korisnik_id"], r["mjesec"], r["vrsta"]): tuple(r[p] for p in polja)
+        for r in MjesecniSaldo.objects.filter(opseg).values(
+            "korisnik_id", "mjesec", "vrsta", *polja
+        )
+    }
+
+    return [
+        (kljuc, ocekivano.get(kljuc), u_tabeli.get(kljuc))
+        for kljuc in sorted(set(ocekivano) | set(u_tabeli))
+        if ocekivano.get(kljuc) != u_tabeli.get(kljuc)
+    ]
+
+
+# ============================================
+# ČITANJE
+# ============================================
+
+
+def po_mjesecima(korisnik, vrsta="prihod", godina=None, od=None, do=None):
+    """OrderedDict {mjesec: suma} hronološki; `od`/`do` su mjeseci (2025-01)"""
+    from .models import MjesecniSaldo
+
+    salda = MjesecniSaldo.objects.filter(korisnik=korisnik, vrsta=vrsta)
+    if godina:
+        salda = salda.filter(**_opseg_godine(godina))
+    if od:
+        salda = salda.filter(mjesec__gte=od)
+    if do:
+        salda = salda.filter(mjesec__lte=do)
+
+    return OrderedDict(salda.order_by("mjesec").values_list("mjesec", "suma"))
+
+
+def ukupno(korisnik, vrsta="prihod", godina=None, mjesec=None):
+    """Zbir za godinu, mjesec ili sve - Decimal"""
+    from .models import MjesecniSaldo
+
+    salda = MjesecniSaldo.objects.filter(korisnik=korisnik, vrsta=vrsta)
+    if godina:
+        salda = salda.filter(**_opseg_godine(godina))
+    if mjesec:
+        salda = salda.filter(mjesec=mjesec)
+    return salda.aggregate(s=Sum("suma"))["s"] or NULA
+
+
+def godine(korisnik):
+    """Godine za koje korisnik ima transakcije, od najnovije"""
+    from .models import MjesecniSaldo
+
+    mjeseci = MjesecniSaldo.objects.filter(korisnik=korisnik).values_list(
+        "mjesec", flat=True
+    )
+    return sorted({int(m[:4]) for m in mjeseci}, reverse=True)
+
+
+def zbir_perioda(korisnik, od=None, do=None):
+    """
+    {"prihod", "rashod", "broj"} za transakcije sa datumom u [od, do].
+    Cijeli mjeseci dolaze iz salda, a samo djelimični mjeseci na krajevima
+    perioda se sabiraju iz transakcija. Stavke bez datuma (ručni mjesečni
+    unos) nisu ni u jednom periodu, pa se oduzimaju od salda cijelih mjeseci.
+    """
+    from .models import MjesecniSaldo, Prihod
+
+    # Prvi i posljednji mjesec koji period pokriva u cijelosti
+    prvi_cijeli = od if od is None or od.day == 1 else _sljedeci_mjesec(od)
+    if do is None:
+        zadnji_cijeli = None
+    elif do.day == monthrange(do.year, do.month)[1]:
+        zadnji_cijeli = do
+    else:
+        zadnji_cijeli = do.replace(day=1) - timedelta(days=1)
+
+    zbir = {"prihod": NULA, "rashod": NULA, "broj": 0}
+
+    def saberi(redovi, znak=1):
+        for vrsta, suma, broj in redovi:
+            zbir[vrsta] = zbir.get(vrsta, NULA) + znak * (suma or NULA)
+            zbir["broj"] += znak * (broj or 0)
+
+    if (
+        prvi_cijeli is None
+        or zadnji_cijeli is None
+        or mjesec_datuma(prvi_cijeli) <= mjesec_datuma(zadnji_cijeli)
+    ):
+        salda = MjesecniSaldo.objects.filter(korisnik=korisnik)
+        if prvi_cijeli:
+            salda = salda.filter(mjesec__gte=mjesec_datuma(prvi_cijeli))
+        if zadnji_cijeli:
+            salda = salda.filter(mjesec__lte=mjesec_datuma(zadnji_cijeli))
+        saberi(
+            salda.order_by()
+            .values("vrsta")
+            .annotate(s=Sum("suma"), b=Sum("broj"))
+            .values_list("vrsta", "s", "b")
+        )
+
+        # Salda cijelih mjeseci sadrže i stavke bez datuma - indeks
+        # (korisnik, period)
+        bez_datuma = Prihod.objects.filter(korisnik=korisnik, datum__isnull=True)
+        if prvi_cijeli:
+            bez_datuma = bez_datuma.filter(period__gte=prvi_cijeli)
+        if zadnji_cijeli:
+            bez_datuma = bez_datuma.filter(period__lte=zadnji_cijeli)
+        saberi(
+            bez_datuma.order_by()
+            .values("vrsta")
+            .annotate(s=Sum("iznos"), b=Count("id"))
+            .values_list("vrsta", "s", "b"),
+            znak=-1,
+        )
+
+        # Djelimični mjeseci na početku i kraju perioda
+        djelimicno = []
+        if od and od != prvi_cijeli:
+            djelimicno.append(Q(datum__gte=od, datum__lt=prvi_cijeli))
+        if do and do != zadnji_cijeli:
+            djelimicno.append(Q(datum__gt=zadnji_cijeli, datum__lte=do))
+    else:
+        # Period ne pokriva nijedan cijeli mjesec
+        djelimicno = [Q(datum__gte=od, datum__lte=do)]
+
+    if djelimicno:
+        uslov = djelimicno[0]
+        for q in djelimicno[1:]:
+            uslov |= q
+        saberi(
+            # vrsta__in drži upit na indeksu (korisnik, vrsta, datum)
+            Prihod.objects.filter(
+                uslov,
+                korisnik=korisnik,
+                vrsta__in=[v for v, _ in Prihod.VRSTA_CHOICES],
+            )
+            .order_by()
+            .values("vrsta")
+            .annotate(s=Sum("iznos"), b=Count("id"))
+            .values_list("vrsta", "s", "b")
+        )
+
+    return zbir
+
+
+def _sljedeci_mjesec(datum):
+    return (datum.replace(day=28) + timedelta(days=4)).replace(day=1)
@@ -0,0 +1,189 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import parametri_cache, pretplata, salda
+from .dashboard_cache import sve_zastarjelo, zastarjelo
+from .fakture import osvjezi_zbirove_nakon_commita
+from .fakture_skladiste import obrisi_dokumente
+from .izvodi_skladiste import pocisti_izvode
+from .jib_cache import zaboravi_jib
+from .models import (
+    EmailInbox,
+    Faktura,
+    Korisnik,
+    Prihod,
+    SistemskiParametri,
+    StavkaFakture,
+    Uplatnica,
+)
+
+# ============================================
+# JIB KEŠ
+# ============================================
+
+
+@receiver(pre_save, sender=Korisnik)
+def korisnik_stari_jib(sender, instance, **kwargs):
+    """Pamti JIB prije izmjene da bi se i on izbacio iz keša"""
+    instance._stari_jib = None
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and "jib" not in update_fields:
+        return
+    if instance.pk:
+        instance._stari_jib = (
+            Korisnik.objects.filter(pk=instance.pk)
+            .values_list("jib", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Korisnik)
+def korisnik_sacuvan(sender, instance, **kwargs):
+    # Nakon commit-a - inače paralelni request ponovo upiše staru vrijednost
+    jibovi = (instance.jib, getattr(instance, "_stari_jib", None))
+    transaction.on_commit(lambda: zaboravi_jib(*jibovi))
+
+
+@receiver(post_delete, sender=Korisnik)
+def korisnik_obrisan(sender, instance, **kwargs):
+    jib = instance.jib
+    transaction.on_commit(lambda: zaboravi_jib(jib))
+
+
+# ============================================
+# SKLADIŠTE IZVODA
+# ============================================
+
+
+@receiver(post_delete, sender=Prihod)
+def prihod_obrisan(sender, instance, **kwargs):
+    """Izvod bez preostalih transakcija se briše nakon commit-a"""
+    if instance.izvod_id:
+        izvod_id = instance.izvod_id
+        transaction.on_commit(lambda: pocisti_izvode([izvod_id]))
+
+
+# ============================================
+# MJESEČNA SALDA
+# ============================================
+
+POLJA_SALDA = ("korisnik_id", "mjesec", "vrsta", "iznos", "datum")
+
+
+@receiver(pre_save, sender=Prihod)
+def prihod_stare_vrijednosti(sender, instance, **kwargs):
+    """Pamti vrijednosti prije izmjene - saldo starog mjeseca se ispravlja"""
+    instance._staro_salda = None
+    if instance.pk and not instance._state.adding:
+        instance._staro_salda = (
+            Prihod.objects.filter(pk=instance.pk).values_list(*POLJA_SALDA).first()
+        )
+
+
+@receiver(post_save, sender=Prihod)
+def prihod_sacuvan_saldo(sender, instance, created, **kwargs):
+    staro = getattr(instance, "_staro_salda", None)
+    if created or staro is None:
+        salda.dodaj(
+            instance.korisnik_id,
+            instance.mjesec,
+            instance.vrsta,
+            instance.iznos,
+            instance.datum,
+        )
+        return
+
+    novo = tuple(getattr(instance, polje) for polje in POLJA_SALDA)
+    if staro == novo:
+        return
+
+    salda.obnovi(instance.korisnik_id, [instance.mjesec, staro[1]])
+    if staro[0] != instance.korisnik_id:
+        salda.obnovi(staro[0], [staro[1]])
+
+
+def _brise_se_korisnik(origin):
+    """Brisanje korisnika briše i njegova salda - nema šta da se ažurira"""
+    if isinstance(origin, QuerySet):
+        return issubclass(origin.model, (Korisnik, User))
+    return isinstance(origin, (Korisnik, User))
+
+
+@receiver(post_delete, sender=Prihod)
+def prihod_obrisan_saldo(sender, instance, origin=None, **kwargs):
+    if not _brise_se_korisnik(origin):
+        salda.obnovi_nakon_commita(instance.korisnik_id, instance.mjesec)
+
+
+# ============================================
+# KEŠ DASHBOARDA
+# ============================================
+
+
+@receiver(post_save, sender=Prihod)
+@receiver(post_delete, sender=Prihod)
+@receiver(post_save, sender=Uplatnica)
+@receiver(post_delete, sender=Uplatnica)
+@receiver(post_save, sender=EmailInbox)
+@receiver(post_delete, sender=EmailInbox)
+def dashboard_podaci_izmijenjeni(sender, instance, **kwargs):
+    zastarjelo(instance.korisnik_id)
+
+
+@receiver(post_save, sender=Korisnik)
+def dashboard_korisnik_izmijenjen(sender, instance, **kwargs):
+    zastarjelo(instance.pk)
+
+
+@receiver(post_save, sender=Faktura)
+@receiver(post_delete, sender=Faktura)
+def dashboard_faktura_izmijenjena(sender, instance, **kwargs):
+    zastarjelo(
+        Korisnik.objects.filter(user_id=instance.user_id)
+        .values_list("pk", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=SistemskiParametri)
+def dashboard_parametri_izmijenjeni(sender, instance, **kwargs):
+    sve_zastarjelo()
+
+
+# ============================================
+# KEŠ SISTEMSKIH PARAMETARA
+# ============================================
+
+
+@receiver(post_save, sender=SistemskiParametri)
+@receiver(post_delete, sender=SistemskiParametri)
+def parametri_izmijenjeni(sender, instance, **kwargs):
+    parametri_cache.zastarjelo()
+
+
+# ============================================
+# STANJE PRETPLATE (SESIJA)
+# ============================================
+
+
+@receiver(post_save, sender=Korisnik)
+def pretplata_izmijenjena(sender, instance, **kwargs):
+    pretplata.zastarjelo(instance.user_id)
+
+
+# ============================================
+# ZBIROVI FAKTURE
+# ============================================
+
+
+@receiver(post_delete, sender=StavkaFakture)
+def stavka_fakture_obrisana(sender, instance, **kwargs):
+    osvjezi_zbirove_nakon_commita(instance.faktura_id)
+
+
+@receiver(post_delete, sender=Faktura)
+def faktura_obrisana_dokumenti(sender, instance, **kwargs):
+    obrisi_dokumente(instance.pk)
@@ -0,0 +1,101 @@
+"""
+Brojke za dashboard.
+
+Sve brojke iz knjige (prihod i rashod po mjesecu, dostupne godine) dolaze iz
+jednog upita nad mjesečnim saldima (core.salda): uslovni zbirovi
+`Sum(..., filter=Q(vrsta=...))` grupisani po mjesecu. Isti rezultat koriste
+i kartice sa zbirovima i grafikon. Brojači (inbox, fakture, uplatnice) su
+jedan upit sa podupitima, pa broj upita ne zavisi od količine podataka.
+"""
+
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+NULA = Decimal("0")
+
+
+def _broj(qs, polje):
+    """Podupit COUNT(*) za redove povezane preko `polje` sa OuterRef"""
+    return Coalesce(
+        Subquery(
+            qs.order_by().values(polje).annotate(n=Count("pk")).values("n"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def mjesecni_zbirovi(korisnik):
+    """
+    OrderedDict {mjesec: (prihod, rashod)} za sve mjesece korisnika,
+    hronološki - jedan upit
+    """
+    from .models import MjesecniSaldo
+
+    redovi = (
+        MjesecniSaldo.objects.filter(korisnik=korisnik)
+        .order_by("mjesec")
+        .values("mjesec")
+        .annotate(
+            prihod=Sum("suma", filter=Q(vrsta="prihod")),
+            rashod=Sum("suma", filter=Q(vrsta="rashod")),
+        )
+        .values_list("mjesec", "prihod", "rashod")
+    )
+    return OrderedDict((mjesec, (prihod, rashod)) for mjesec, prihod, rashod in redovi)
+
+
+def brojaci(korisnik):
+    """{"inbox_count", "fakture_count", "uplatnice_count"} - jedan upit"""
+    from .models import EmailInbox, Faktura, Korisnik, Uplatnica
+
+    return (
+        Korisnik.objects.filter(pk=korisnik.pk)
+        .values(
+            inbox_count=_broj(
+                EmailInbox.objects.filter(
+                    korisnik=OuterRef("pk"), procesuirano=False
+                ),
+                "korisnik",
+            ),
+            fakture_count=_broj(Faktura.objects.filter(user=OuterRef("user")), "user"),
+            uplatnice_count=_broj(
+                Uplatnica.objects.filter(korisnik=OuterRef("pk")), "korisnik"
+            ),
+        )
+        .get()
+    )
+
+
+def statistika_dashboarda(korisnik, godina=None):
+    """
+    Brojke za dashboard; `godina=None` znači sve godine.
+
+    Vraća dict:
+      prihod, rashod   - zbirovi za izabrani period (Decimal)
+      prihodi          - OrderedDict {mjesec: prihod} za grafikon
+      godine           - godine sa transakcijama, od najnovije
+      inbox_count, fakture_count, uplatnice_count - brojači
+    """
+    zbirovi = mjesecni_zbirovi(korisnik)
+
+    prefiks = f"{godina}-" if godina else ""
+    prihodi = OrderedDict()
+    rashod = NULA
+    for mjesec, (p, r) in zbirovi.items():
+        if not mjesec.startswith(prefiks):
+            continue
+        if p is not None:
+            prihodi[mjesec] = p
+        rashod += r or NULA
+
+    return {
+        "prihod": sum(prihodi.values(), NULA),
+        "rashod": rashod,
+        "prihodi": prihodi,
+        "godine": sorted({int(m[:4]) for m in zbirovi}, reverse=True),
+        **brojaci(korisnik),
+    }
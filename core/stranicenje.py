@@ -0,0 +1,175 @@
+"""
+Straničenje po ključu (keyset / seek) za duge liste.
+
+Umjesto OFFSET-a, sljedeća stranica se traži uslovom nad poljima sortiranja
+- npr. (datum, id) < (datum, id) posljednjeg reda - pa je svaka stranica
+jedan indeksirani upit sa LIMIT-om, jednako brz na prvoj i na hiljaditoj
+stranici. Kursor je potpisan i neproziran (django.core.signing); neispravan
+kursor vraća prvu stranicu. Ukupan broj se ne broji uz svaku stranicu -
+pozivalac ga prosljeđuje (npr. iz salda) ili se kešira (`kesirani_broj`).
+
+Prikaz "Sve" zamjenjuje `csv_odgovor`: redovi se čitaju iteratorom i
+šalju kao stream, pa memorija ne raste sa brojem redova.
+"""
+
+import csv
+import hashlib
+
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+
+SALT = "core.stranicenje"
+
+# Smjerovi kursora
+POSLIJE = "poslije"
+PRIJE = "prije"
+KRAJ = "kraj"
+
+
+def _obrni(polje):
+    return polje[1:] if polje.startswith("-") else f"-{polje}"
+
+
+def _uslov(polja, vrijednosti):
+    """Redovi iza `vrijednosti` u redoslijedu `polja` (bez NULL vrijednosti)"""
+    uslov = Q()
+    jednako = {}
+    for polje, vrijednost in zip(polja, vrijednosti):
+        ime = polje.lstrip("-")
+        lookup = "lt" if polje.startswith("-") else "gt"
+        uslov |= Q(**jednako, **{f"{ime}__{lookup}": vrijednost})
+        jednako[ime] = vrijednost
+
+    # Granica na prvom polju je suvišna, ali bazi daje opseg indeksa
+    prvo = polja[0].lstrip("-")
+    lookup = "lte" if polja[0].startswith("-") else "gte"
+    return Q(**{f"{prvo}__{lookup}": vrijednosti[0]}) & uslov
+
+
+def _kursor(smjer, vrijednosti=()):
+    return signing.dumps(
+        [smjer, [str(v) for v in vrijednosti]], salt=SALT, compress=True
+    )
+
+
+def _procitaj_kursor(kursor, model, polja):
+    """(smjer, vrijednosti) iz kursora; prva stranica za prazan/neispravan"""
+    if not kursor:
+        return POSLIJE, None
+    try:
+        smjer, vrijednosti = signing.loads(kursor, salt=SALT)
+        if smjer == KRAJ:
+            return KRAJ, None
+        if smjer not in (POSLIJE, PRIJE) or len(vrijednosti) != len(polja):
+            raise ValueError(smjer)
+        return smjer, [
+            model._meta.get_field(polje.lstrip("-")).to_python(v)
+            for polje, v in zip(polja, vrijednosti)
+        ]
+    except Exception:
+        return POSLIJE, None
+
+
+class Stranica:
+    """Jedna stranica liste - iterira se kao lista objekata"""
+
+    def __init__(self, objekti, polja, ukupno, ima_prethodnu, ima_sljedecu):
+        self.object_list = objekti
+        self.ukupno = ukupno
+        self.ima_prethodnu = ima_prethodnu and bool(objekti)
+        self.ima_sljedecu = ima_sljedecu and bool(objekti)
+        self.prethodni_kursor = self.sljedeci_kursor = None
+        if self.ima_prethodnu:
+            self.prethodni_kursor = _kursor(PRIJE, self._kljuc(objekti[0], polja))
+        if self.ima_sljedecu:
+            self.sljedeci_kursor = _kursor(POSLIJE, self._kljuc(objekti[-1], polja))
+        self.zadnji_kursor = _kursor(KRAJ)
+
+    @staticmethod
+    def _kljuc(objekat, polja):
+        return [getattr(objekat, polje.lstrip("-")) for polje in polja]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def stranica_po_kljucu(qs, kursor, polja, po_stranici=20, ukupno=None):
+    """
+    Stranica `qs` sortiranog po `polja` (npr. ("-datum", "-id")); posljednje
+    polje mora biti jedinstveno, a nijedno ne smije biti NULL. `ukupno` je
+    broj ili funkcija koja ga vraća (poziva se jednom po stranici).
+
+    Posljednja stranica (KRAJ) je ista kao pri listanju naprijed - 45 redova
+    po 20 daje 20/20/5, pa i "Posljednja" prikazuje 5. Bez `ukupno` je to
+    posljednjih `po_stranici` redova.
+    """
+    smjer, vrijednosti = _procitaj_kursor(kursor, qs.model, polja)
+    if callable(ukupno):
+        ukupno = ukupno()
+
+    velicina = po_stranici
+    if smjer == KRAJ and ukupno:
+        velicina = ukupno % po_stranici or po_stranici
+
+    # Stranice unazad (i posljednja) se čitaju obrnutim redoslijedom
+    redoslijed = list(polja) if smjer == POSLIJE else [_obrni(p) for p in polja]
+    if vrijednosti:
+        qs = qs.filter(_uslov(redoslijed, vrijednosti))
+
+    objekti = list(qs.order_by(*redoslijed)[: velicina + 1])
+    ima_jos = len(objekti) > velicina
+    objekti = objekti[:velicina]
+
+    if smjer == POSLIJE:
+        ima_prethodnu, ima_sljedecu = vrijednosti is not None, ima_jos
+    else:
+        objekti.reverse()
+        ima_prethodnu, ima_sljedecu = ima_jos, smjer == PRIJE
+
+    return Stranica(objekti, polja, ukupno, ima_prethodnu, ima_sljedecu)
+
+
+def upit_bez(parametri, *izostavi):
+    """Query string trenutnog zahtjeva bez kursora - osnova za linkove stranica"""
+    upit = parametri.copy()
+    for ime in izostavi:
+        upit.pop(ime, None)
+    return upit.urlencode()
+
+
+def kesirani_broj(qs, kljuc, ttl=60):
+    """COUNT(*) keširan `ttl` sekundi - za velike tabele gdje je približno dovoljno"""
+    kljuc = f"broj:{hashlib.sha256(kljuc.encode('utf-8')).hexdigest()}"
+    return cache.get_or_set(kljuc, qs.count, ttl)
+
+
+# ============================================
+# IZVOZ (umjesto prikaza "Sve")
+# ============================================
+
+
+class _Odjek:
+    """Pseudo-fajl za csv.writer - vraća red umjesto da ga piše"""
+
+    def write(self, vrijednost):
+        return vrijednost
+
+
+def csv_odgovor(naziv_fajla, zaglavlje, redovi):
+    """StreamingHttpResponse sa CSV-om; `redovi` je iterator (npr. qs.iterator())"""
+    pisac = csv.writer(_Odjek())
+
+    def sadrzaj():
+        yield "\ufeff"  # BOM - Excel prepoznaje UTF-8
+        yield pisac.writerow(zaglavlje)
+        for red in redovi:
+            yield pisac.writerow(red)
+
+    odgovor = StreamingHttpResponse(sadrzaj(), content_type="text/csv; charset=utf-8")
+    odgovor["Content-Disposition"] = f'attachment; filename="{naziv_fajla}"'
+    return odgovor
@@ -0,0 +1,175 @@
+"""
+Obračun poreza i doprinosa za paušalce - jedino mjesto sa tim formulama.
+
+Ulaz je mjesečna serija prihoda korisnika ({mjesec: prihod}, npr. iz
+core.salda), tip preduzetnika i snimak sistemskih parametara (`Parametri`).
+Izlaz su serije porez / doprinosi / neto, poravnate sa mjesecima, i zbirovi.
+
+  - mali preduzetnik: porez_mali_preduzetnik % prihoda, svaki mjesec
+  - veliki preduzetnik: porez_veliki_preduzetnik % godišnjeg prihoda, cijeli
+    iznos u mjesecu plaćanja (mjesec_placanja_poreza, default mart)
+  - doprinosi: mjesecni_doprinosi za svaki mjesec serije
+
+`obracunaj_sve` računa više serija (korisnika) u jednom prolazu - stope se
+pripreme jednom, a po mjesecu ostaje samo množenje i oduzimanje.
+"""
+
+from decimal import Decimal
+
+MALI = "mali"
+VELIKI = "veliki"
+
+NULA = Decimal("0")
+STO = Decimal("100")
+
+
+class Parametri:
+    """Snimak parametara obračuna - ne čita bazu, može se dijeliti"""
+
+    __slots__ = ("stopa_mali", "stopa_veliki", "mjesecni_doprinosi", "mjesec_placanja")
+
+    def __init__(
+        self,
+        porez_mali_preduzetnik=Decimal("2.00"),
+        porez_veliki_preduzetnik=Decimal("10.00"),
+        mjesecni_doprinosi=Decimal("466.00"),
+        mjesec_placanja_poreza=3,
+    ):
+        self.stopa_mali = Decimal(porez_mali_preduzetnik) / STO
+        self.stopa_veliki = Decimal(porez_veliki_preduzetnik) / STO
+        self.mjesecni_doprinosi = Decimal(mjesecni_doprinosi)
+        self.mjesec_placanja = f"{int(mjesec_placanja_poreza):02d}"
+
+    @classmethod
+    def iz_sistemskih(cls, parametri=None):
+        """Iz SistemskiParametri (bez argumenta: trenutni parametri)"""
+        if parametri is None:
+            from .models import SistemskiParametri
+
+            parametri = SistemskiParametri.get_parametri()
+        return cls(
+            parametri.porez_mali_preduzetnik,
+            parametri.porez_veliki_preduzetnik,
+            parametri.mjesecni_doprinosi,
+            parametri.mjesec_placanja_poreza,
+        )
+
+
+class Obracun:
+    """
+    Obračun jedne serije. Liste `mjeseci`, `prihod`, `porez`, `doprinosi` i
+    `neto` su poravnate; `porez_po_godinama` je godišnja poreska obaveza
+    ({godina: iznos}) i ne zavisi od toga da li je mjesec plaćanja u seriji.
+    """
+
+    def __init__(self, mjeseci, prihod, porez, doprinosi, porez_po_godinama):
+        self.mjeseci = mjeseci
+        self.prihod = prihod
+        self.porez = porez
+        self.doprinosi = doprinosi
+        self.neto = [i - p - d for i, p, d in zip(prihod, porez, doprinosi)]
+        self.porez_po_godinama = porez_po_godinama
+
+    @property
+    def ukupno_prihod(self):
+        return sum(self.prihod, NULA)
+
+    @property
+    def ukupno_porez(self):
+        return sum(self.porez, NULA)
+
+    @property
+    def ukupno_doprinosi(self):
+        return sum(self.doprinosi, NULA)
+
+    @property
+    def ukupno_neto(self):
+        return sum(self.neto, NULA)
+
+    @property
+    def godisnji_porez(self):
+        """Ukupna poreska obaveza za godine iz serije"""
+        return sum(self.porez_po_godinama.values(), NULA)
+
+    def redovi(self):
+        """Dict po mjesecu (mjesec, prihod, porez, doprinosi, neto)"""
+        return [
+            {
+                "mjesec": m,
+                "prihod": i,
+                "porez": p,
+                "doprinosi": d,
+                "neto": n,
+            }
+            for m, i, p, d, n in zip(
+                self.mjeseci, self.prihod, self.porez, self.doprinosi, self.neto
+            )
+        ]
+
+
+def po_godinama(prihodi):
+    """{godina: zbir} iz {mjesec: prihod}"""
+    parovi = list(_parovi(prihodi))
+    return _po_godinama([m for m, _ in parovi], [Decimal(i) for _, i in parovi])
+
+
+def _po_godinama(mjeseci, iznosi):
+    # Sabira po prefiksu "2025" - int() samo jednom po godini
+    zbir = {}
+    for mjesec, iznos in zip(mjeseci, iznosi):
+        godina = mjesec[:4]
+        zbir[godina] = zbir.get(godina, NULA) + iznos
+    return {int(g): i for g, i in zbir.items()}
+
+
+def _parovi(prihodi):
+    return prihodi.items() if hasattr(prihodi, "items") else prihodi
+
+
+def obracunaj(prihodi, tip, parametri, godisnji=None):
+    """Obračun jedne serije - vidi `obracunaj_sve`"""
+    return obracunaj_sve([(prihodi, tip, godisnji)], parametri)[0]
+
+
+def obracunaj_sve(serije, parametri):
+    """
+    Lista `Obracun` za serije (prihodi, tip, godisnji):
+      prihodi  - {mjesec: prihod} ili parovi (mjesec, prihod), hronološki
+      tip      - "mali" ili "veliki" (Korisnik.tip_preduzetnika)
+      godisnji - {godina: prihod} za porez velikog preduzetnika; bez njega
+                 se godišnji prihod sabira iz same serije
+    """
+    stopa_mali = parametri.stopa_mali
+    stopa_veliki = parametri.stopa_veliki
+    doprinos = parametri.mjesecni_doprinosi
+    mjesec_placanja = parametri.mjesec_placanja
+
+    rezultati = []
+    for prihodi, tip, godisnji in serije:
+        parovi = list(_parovi(prihodi))
+        mjeseci = [m for m, _ in parovi]
+        iznosi = [Decimal(i) for _, i in parovi]
+
+        if tip == VELIKI:
+            u_seriji = _po_godinama(mjeseci, iznosi)
+            osnovica = (
+                {g: Decimal(godisnji.get(g, NULA)) for g in u_seriji}
+                if godisnji is not None
+                else u_seriji
+            )
+            porez_po_godinama = {g: i * stopa_veliki for g, i in osnovica.items()}
+            porez = [
+                porez_po_godinama[int(m[:4])] if m[5:7] == mjesec_placanja else NULA
+                for m in mjeseci
+            ]
+        else:
+            porez = [i * stopa_mali for i in iznosi]
+            porez_po_godinama = _po_godinama(mjeseci, porez)
+
+        rezultati.append(
+            Obracun(
+                mjeseci, iznosi, porez, [doprinos] * len(mjeseci), porez_po_godinama
+            )
+        )
+
+    return rezultati
@@ -1,3 +1,1135 @@
-from django.test import TestCase
+import hashlib
+import math
+import os
+import random
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from . import fakture_skladiste, izvodi_cache, parametri_cache, salda, tax
+from .dashboard_cache import zastarjelo
+from .fakture import NovaFaktura
+from .izvodi_skladiste import sacuvaj_izvod
+from .models import (
+    EmailInbox,
+    Faktura,
+    Izvod,
+    Korisnik,
+    Prihod,
+    SistemskiParametri,
+    StavkaFakture,
+)
+from .stranicenje import stranica_po_kljucu
+from .uvoz import Uvoz
+
+KLIJENTI = ["MEGA DOO BANJA LUKA", "TELEKOM SRPSKE AD", "ELEKTROKRAJINA AD"]
+
+
+def napravi_korisnika(ime="test", jib="4400000000001"):
+    """User + Korisnik za testove - (user, korisnik)"""
+    user = User.objects.create_user(ime, password="lozinka")
+    korisnik = Korisnik.objects.create(user=user, ime=ime, jib=jib, racun="0")
+    return user, korisnik
+
+
+def privremeni_media(test):
+    """MEDIA_ROOT u privremenom direktoriju do kraja testa"""
+    media = tempfile.TemporaryDirectory()
+    test.addCleanup(media.cleanup)
+    podesavanja = override_settings(MEDIA_ROOT=media.name)
+    podesavanja.enable()
+    test.addCleanup(podesavanja.disable)
+
+
+# ============================================
+# DASHBOARD - BROJ UPITA
+# ============================================
+
+
+class DashboardUpitiTest(TestCase):
+    """Broj upita dashboarda ne zavisi od količine podataka korisnika"""
+
+    # Sesija, user, korisnik, zatim keš (core.dashboard_cache)
+    UPITA_KES = 3
+    # + agregat mjesečnih salda i jedan upit za broj inboxa/faktura/uplatnica
+    UPITA_HLADAN = 5
+
+    def setUp(self):
+        cache.clear()
+        self.user, self.korisnik = napravi_korisnika()
+        self.client.force_login(self.user)
+
+    def _popuni(self, broj=300):
+        rng = random.Random(0)
+        uvoz = Uvoz(self.korisnik)
+        for i in range(broj):
+            uvoz.dodaj(
+                date(2021, 1, 1) + timedelta(days=rng.randrange(5 * 365)),
+                Decimal(rng.randrange(500, 500000)) / 100,
+                "prihod" if rng.random() < 0.6 else "rashod",
+                f"{rng.choice(KLIJENTI)} ({i})",
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            uvoz.sacuvaj()
+        for i in range(10):
+            EmailInbox.objects.create(
+                korisnik=self.korisnik,
+                from_email="test@example.com",
+                subject="Izvod",
+                banka_naziv="Test",
+                pdf_hash=f"test-{i}",
+            )
+            Faktura.objects.create(
+                user=self.user,
+                broj_fakture=f"T-{i}",
+                datum_izdavanja=date(2025, 1, 1),
+                primalac_naziv=rng.choice(KLIJENTI),
+            )
+
+    def _hladan(self, url):
+        self.client.get(url)  # sesija i parametri se pune pri prvom zahtjevu
+        with self.captureOnCommitCallbacks(execute=True):
+            zastarjelo(self.korisnik.pk)
+        with self.assertNumQueries(self.UPITA_HLADAN):
+            odgovor = self.client.get(url)
+        self.assertEqual(odgovor.status_code, 200)
+
+    def _kesiran(self, url):
+        self.client.get(url)
+        with self.assertNumQueries(self.UPITA_KES):
+            odgovor = self.client.get(url)
+        self.assertEqual(odgovor.status_code, 200)
+
+    def test_hladan_dashboard(self):
+        for url in ("/dashboard/", "/dashboard/?godina=all"):
+            with self.subTest(url=url, podaci=False):
+                self._hladan(url)
+        self._popuni()
+        for url in ("/dashboard/", "/dashboard/?godina=all"):
+            with self.subTest(url=url, podaci=True):
+                self._hladan(url)
+
+    def test_kesiran_dashboard(self):
+        for url in ("/dashboard/", "/dashboard/?godina=all"):
+            with self.subTest(url=url, podaci=False):
+                self._kesiran(url)
+        self._popuni()
+        for url in ("/dashboard/", "/dashboard/?godina=all"):
+            with self.subTest(url=url, podaci=True):
+                self._kesiran(url)
+
+
+class ParametriKesTest(TestCase):
+    """Sistemski parametri se u stabilnom stanju čitaju bez upita"""
+
+    def setUp(self):
+        cache.clear()
+        parametri_cache._lokalno = None
+
+    def test_bez_upita(self):
+        parametri_cache.parametri()
+        with self.assertNumQueries(0):
+            parametri_cache.parametri()
+
+        # Istekao lokalni snimak - samo provjera verzije u dijeljenom kešu
+        with override_settings(PARAMETRI_CACHE_LOKALNO_TTL=0):
+            with self.assertNumQueries(0):
+                parametri_cache.parametri()
+                parametri_cache.parametri()
+
+    def test_izmjena_nova_verzija(self):
+        stari = parametri_cache.parametri()
+        verzija = cache.get(parametri_cache.VERZIJA)
+
+        red = SistemskiParametri.objects.get(pk=1)
+        red.mjesecni_doprinosi = stari.mjesecni_doprinosi + 100
+        with self.captureOnCommitCallbacks(execute=True):
+            red.save()
+
+        self.assertNotEqual(cache.get(parametri_cache.VERZIJA), verzija)
+        self.assertEqual(
+            parametri_cache.parametri().mjesecni_doprinosi,
+            stari.mjesecni_doprinosi + 100,
+        )
+
+
+# ============================================
+# STANJE PRETPLATE (SESIJA)
+# ============================================
+
+
+class PretplataTest(TestCase):
+    """Middleware pretplate čita stanje iz sesije, a izmjena korisnika ga briše"""
+
+    def setUp(self):
+        cache.clear()
+        self.user, self.korisnik = napravi_korisnika()
+        self.client.force_login(self.user)
+
+    @staticmethod
+    def upiti_pretplate(upiti):
+        """Upiti core.pretplata.stanje (values_list pk, plan, trial_end_date)"""
+        return [
+            u["sql"]
+            for u in upiti
+            if '"core_korisnik"."plan", "core_korisnik"."trial_end_date" FROM'
+            in u["sql"]
+        ]
+
+    def test_bez_upita_po_stranici(self):
+        from django.test.utils import CaptureQueriesContext
+
+        # Prvi zahtjev puni sesiju (i keš dashboarda)
+        with CaptureQueriesContext(connection) as upiti:
+            self.client.get("/dashboard/")
+        self.assertEqual(len(self.upiti_pretplate(upiti)), 1)
+
+        for _ in range(3):
+            with CaptureQueriesContext(connection) as upiti:
+                with self.assertNumQueries(DashboardUpitiTest.UPITA_KES):
+                    self.client.get("/dashboard/")
+            self.assertEqual(self.upiti_pretplate(upiti), [])
+
+    def test_izmjena_korisnika_na_sljedecem_zahtjevu(self):
+        odgovor = self.client.get("/dashboard/")
+        self.assertFalse(odgovor.wsgi_request.subscription_expired)
+
+        # Trial istekao (npr. iz admin panela)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.korisnik.trial_end_date = date.today() - timedelta(days=3)
+            self.korisnik.save()
+        odgovor = self.client.get("/dashboard/")
+        self.assertTrue(odgovor.wsgi_request.subscription_expired)
+        self.assertEqual(odgovor.wsgi_request.days_expired, 3)
+
+        # Produžen trial i promjena plana
+        with self.captureOnCommitCallbacks(execute=True):
+            self.korisnik.trial_end_date = date.today() + timedelta(days=30)
+            self.korisnik.plan = "Business"
+            self.korisnik.save()
+        odgovor = self.client.get("/dashboard/")
+        self.assertFalse(odgovor.wsgi_request.subscription_expired)
+        self.assertEqual(self.client.session["pretplata"]["plan"], "Business")
+
+
+# ============================================
+# NOVA FAKTURA - BROJ UPITA
+# ============================================
+
+
+class NovaFakturaTest(TestCase):
+    """NovaFaktura upisuje fakturu i sve stavke bez upita po stavci"""
+
+    def setUp(self):
+        self.user, _ = napravi_korisnika()
+
+    def _ocekivano_upita(self, broj_stavki):
+        """
+        SAVEPOINT, INSERT fakture, korisnik za signal dashboard keša, RELEASE
+        i po jedan INSERT za svaki batch bulk_create-a (SQLite ograničava broj
+        parametara po upitu, pa batch zavisi od baze)
+        """
+        polja = [f for f in StavkaFakture._meta.concrete_fields if not f.primary_key]
+        batch = min(500, connection.ops.bulk_batch_size(polja, [None] * broj_stavki))
+        return 4 + math.ceil(broj_stavki / batch)
+
+    def _nova(self, broj_stavki):
+        rng = random.Random(0)
+        nova = NovaFaktura(
+            self.user,
+            broj_fakture=f"T-{broj_stavki}",
+            datum_izdavanja=date(2025, 1, 1),
+            izdavalac_naziv="Test",
+            primalac_naziv=rng.choice(KLIJENTI),
+        )
+        for i in range(broj_stavki):
+            nova.dodaj_stavku(
+                f"Usluga {i}",
+                kolicina=Decimal(rng.randrange(1, 1000)) / 100,
+                cijena=Decimal(rng.randrange(1, 100000)) / 100,
+                pdv_stopa=rng.choice((0, 17)),
+            )
+        return nova
+
+    def test_200_stavki(self):
+        nova = self._nova(200)
+        with self.assertNumQueries(self._ocekivano_upita(200)):
+            faktura = nova.sacuvaj()
+
+        faktura.refresh_from_db()
+        self.assertEqual(faktura.stavke.count(), 200)
+        zbirovi = faktura.izracunaj_ukupno()
+        self.assertEqual(faktura.ukupno_bez_pdv, zbirovi["ukupno_bez_pdv"])
+        self.assertEqual(faktura.pdv_iznos, zbirovi["pdv_iznos"])
+        self.assertEqual(faktura.ukupno_sa_pdv, zbirovi["ukupno_sa_pdv"])
+
+    def test_jedna_stavka(self):
+        nova = self._nova(1)
+        with self.assertNumQueries(5):
+            nova.sacuvaj()
+
+    def test_neispravna_stavka(self):
+        nova = self._nova(0)
+        for kolicina, cijena in (("abc", "1"), ("0", "1"), ("1", "-5"), ("nan", "1")):
+            with self.subTest(kolicina=kolicina, cijena=cijena):
+                with self.assertRaises(ValidationError):
+                    nova.dodaj_stavku("Usluga", kolicina, cijena)
+
+    def test_zaokruzivanje_kao_ranije(self):
+        """
+        Ranije su se nezaokruženi iznosi stavke upisivali, a zaokruživao ih
+        je DecimalField pri upisu - izracunaj() daje iste feninge
+        """
+        from django.db.backends.utils import format_number
+
+        nova = self._nova(0)
+        for kolicina, cijena, pdv_stopa in (
+            ("0.5", "0.25", 0),  # 0.125
+            ("0.5", "0.35", 0),  # 0.175
+            ("1.5", "0.83", 17),  # 1.245 + PDV
+            ("3", "1.15", 17),
+            ("0.01", "0.50", 17),
+        ):
+            stavka = nova.dodaj_stavku("Usluga", kolicina, cijena, pdv_stopa=pdv_stopa)
+            ukupna = Decimal(kolicina) * Decimal(cijena)
+            pdv = ukupna * (Decimal(pdv_stopa) / Decimal(100))
+            with self.subTest(kolicina=kolicina, cijena=cijena, pdv_stopa=pdv_stopa):
+                for vrijednost, staro in (
+                    (stavka.ukupna_cijena, ukupna),
+                    (stavka.pdv_iznos, pdv),
+                    (stavka.ukupna_cijena_sa_pdv, ukupna + pdv),
+                ):
+                    self.assertEqual(vrijednost, Decimal(format_number(staro, 12, 2)))
+
+
+# ============================================
+# DOKUMENTI FAKTURE (core.fakture_skladiste)
+# ============================================
+
+
+class FakturaDokumentTest(TestCase):
+    """Preuzimanje fakture: formati, ETag/304 i sačuvan dokument"""
+
+    def setUp(self):
+        privremeni_media(self)
+        self.user, _ = napravi_korisnika()
+        self.client.force_login(self.user)
+
+    def faktura(self, status):
+        nova = NovaFaktura(
+            self.user,
+            broj_fakture="7/2025",
+            datum_izdavanja=date(2025, 1, 1),
+            primalac_naziv=KLIJENTI[0],
+            status=status,
+        )
+        nova.dodaj_stavku("Usluga", "2", "50")
+        return nova.sacuvaj()
+
+    def preuzmi(self, faktura, oblik="doc", **zaglavlja):
+        return self.client.get(
+            f"/fakture/download/{faktura.pk}/", {"format": oblik}, **zaglavlja
+        )
+
+    def test_formati(self):
+        faktura = self.faktura("draft")
+        for oblik, pocetak in (("doc", b"<"), ("docx", b"PK"), ("pdf", b"%PDF")):
+            with self.subTest(oblik=oblik):
+                odgovor = self.preuzmi(faktura, oblik)
+                self.assertEqual(odgovor.status_code, 200)
+                self.assertEqual(
+                    odgovor["Content-Type"], fakture_skladiste.FORMATI[oblik][1]
+                )
+                self.assertIn("faktura_7-2025.", odgovor["Content-Disposition"])
+                sadrzaj = b"".join(odgovor.streaming_content)
+                self.assertTrue(sadrzaj.lstrip().startswith(pocetak))
+
+    def test_if_none_match_bez_renderovanja(self):
+        faktura = self.faktura("draft")
+        etag = self.preuzmi(faktura)["ETag"]
+
+        with mock.patch.object(fakture_skladiste, "renderuj") as renderuj:
+            odgovor = self.preuzmi(faktura, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(odgovor.status_code, 304)
+        renderuj.assert_not_called()
+
+        # Izmjena fakture pomjera updated_at, pa i ETag
+        faktura.napomena = "Izmijenjeno"
+        faktura.save()
+        odgovor = self.preuzmi(faktura, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(odgovor.status_code, 200)
+        self.assertNotEqual(odgovor["ETag"], etag)
+
+    def test_izdata_iz_storage(self):
+        faktura = self.faktura("issued")
+        prvi = b"".join(self.preuzmi(faktura, "pdf").streaming_content)
+        with fakture_skladiste.sacuvan_dokument(faktura, "pdf") as sacuvan:
+            self.assertEqual(sacuvan.read(), prvi)
+
+        with mock.patch.object(fakture_skladiste, "renderuj") as renderuj:
+            drugi = b"".join(self.preuzmi(faktura, "pdf").streaming_content)
+        renderuj.assert_not_called()
+        self.assertEqual(drugi, prvi)
+
+    def test_nacrt_se_ne_cuva(self):
+        faktura = self.faktura("draft")
+        self.preuzmi(faktura, "pdf")
+        self.preuzmi(faktura, "pdf")
+
+        self.assertIsNone(fakture_skladiste.sacuvan_dokument(faktura, "pdf"))
+        self.assertFalse(
+            default_storage.exists(f"{fakture_skladiste.FOLDER}/{faktura.pk}")
+        )
+
+    def test_doc_escape_korisnickog_teksta(self):
+        from .utils import generate_invoice_doc
+
+        nova = NovaFaktura(
+            self.user,
+            broj_fakture="8/2025",
+            datum_izdavanja=date(2025, 1, 1),
+            primalac_naziv="<b>X&Y</b>",
+        )
+        nova.dodaj_stavku("<script>alert(1)</script>", "1", "10")
+        faktura = nova.sacuvaj()
+
+        html = generate_invoice_doc(faktura)
+        self.assertIn("&lt;b&gt;X&amp;Y&lt;/b&gt;", html)
+        self.assertIn("&lt;script&gt;", html)
+        self.assertNotIn("<b>X", html)
+        self.assertNotIn("<script>", html)
+
+
+# ============================================
+# PRIHOD - UPITI PO PERIODU KORISTE INDEKS
+# ============================================
+
+
+class PlanUpitaPeriodTest(TestCase):
+    """Upiti po mjesecu (Prihod.period) idu preko prihod_korisnik_period"""
+
+    INDEKS = "prihod_korisnik_period"
+
+    @classmethod
+    def setUpTestData(cls):
+        _, cls.korisnik = napravi_korisnika()
+        _, drugi = napravi_korisnika("drugi", "4400000000002")
+        rng = random.Random(0)
+        for korisnik in (cls.korisnik, drugi):
+            uvoz = Uvoz(korisnik)
+            for i in range(300):
+                uvoz.dodaj(
+                    date(2023, 1, 1) + timedelta(days=rng.randrange(3 * 365)),
+                    Decimal(rng.randrange(500, 500000)) / 100,
+                    "prihod" if rng.random() < 0.6 else "rashod",
+                    f"{rng.choice(KLIJENTI)} ({i})",
+                )
+            uvoz.sacuvaj()
+
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            # Na maloj tabeli bi Postgres izabrao seq scan bez obzira na indeks
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertKoristiIndeks(self, qs):
+        plan = qs.explain()
+        self.assertIn(self.INDEKS, plan, plan)
+
+    def test_period_in(self):
+        # core.salda.obnovi - mjeseci koje treba ponovo sabrati
+        self.assertKoristiIndeks(
+            Prihod.objects.filter(
+                korisnik=self.korisnik,
+                period__in=[date(2025, 3, 1), date(2025, 4, 1)],
+            ).order_by()
+        )
+
+    def test_opseg_perioda(self):
+        # Godina / opseg mjeseci (godine, podsjetnici)
+        self.assertKoristiIndeks(
+            Prihod.objects.filter(
+                korisnik=self.korisnik,
+                period__gte=date(2024, 1, 1),
+                period__lt=date(2025, 1, 1),
+            ).order_by()
+        )
+
+    def test_jedan_period(self):
+        self.assertKoristiIndeks(
+            Prihod.objects.filter(
+                korisnik=self.korisnik, period=date(2024, 6, 1)
+            ).order_by()
+        )
+
+
+class GodinaUFilteruTest(TestCase):
+    """Godina iz URL-a koju date() ne može predstaviti nije greška servera"""
+
+    def setUp(self):
+        self.user, self.korisnik = napravi_korisnika()
+        self.client.force_login(self.user)
+
+    def test_prihodi_pretraga(self):
+        Prihod.objects.create(
+            korisnik=self.korisnik, mjesec="2025-01", iznos=150, opis="uplata"
+        )
+        for godina in ("0", "9999", "10000", "99999"):
+            with self.subTest(godina=godina):
+                odgovor = self.client.get(
+                    "/prihodi/", {"godina": godina, "search": "uplata"}
+                )
+                self.assertEqual(odgovor.status_code, 200)
+
+        odgovor = self.client.get("/prihodi/", {"godina": "2025", "search": "uplata"})
+        self.assertEqual(odgovor.status_code, 200)
+        self.assertContains(odgovor, "150")
+
+    def test_godisnji_izvjestaj(self):
+        for godina in (9999, 10000, 99999):
+            with self.subTest(godina=godina):
+                odgovor = self.client.get(f"/bilans/godisnji/{godina}/")
+                self.assertEqual(odgovor.status_code, 404)
+
+
+class OpsegIznosaTest(SimpleTestCase):
+    """Pretraga po iznosu - opseg [od, do) iz teksta pretrage"""
+
+    def test_broj(self):
+        from .views import _opseg_iznosa
+
+        for pojam, opseg in (
+            ("150", ("150", "151")),
+            ("150.5", ("150.5", "150.6")),
+            ("150,50", ("150.50", "150.51")),
+            (" 1 500,00 ", ("1500.00", "1500.01")),
+            ("150.555", ("150.555", "150.565")),
+            ("0", ("0", "1")),
+        ):
+            with self.subTest(pojam=pojam):
+                self.assertEqual(
+                    _opseg_iznosa(pojam), tuple(Decimal(x) for x in opseg)
+                )
+
+    def test_nije_iznos(self):
+        from .views import _opseg_iznosa
+
+        for pojam in ("-150", "-0,5", "uplata", "150 KM", "", "NaN", "inf", "1,2,3"):
+            with self.subTest(pojam=pojam):
+                self.assertIsNone(_opseg_iznosa(pojam))
+
+
+# ============================================
+# STRANIČENJE PO KLJUČU
+# ============================================
+
+
+class StranicenjeTest(TestCase):
+    """Kursori naprijed, nazad i na kraj daju iste stranice kao OFFSET"""
+
+    POLJA = ("-datum", "-id")
+
+    def setUp(self):
+        _, self.korisnik = napravi_korisnika()
+        # 45 transakcija, po 15 sa istim datumom - redoslijed drži id
+        for i in range(45):
+            Prihod.objects.create(
+                korisnik=self.korisnik,
+                mjesec="2025-01",
+                datum=date(2025, 1, 1 + i % 3),
+                iznos=i + 1,
+            )
+        self.qs = Prihod.objects.filter(korisnik=self.korisnik)
+        self.redom = list(self.qs.order_by(*self.POLJA).values_list("id", flat=True))
+
+    def stranica(self, kursor=None, ukupno=45):
+        return stranica_po_kljucu(
+            self.qs, kursor, self.POLJA, po_stranici=20, ukupno=ukupno
+        )
+
+    @staticmethod
+    def ids(stranica):
+        return [p.id for p in stranica]
+
+    def test_naprijed_i_nazad(self):
+        stranice = [self.stranica()]
+        while stranice[-1].ima_sljedecu:
+            stranice.append(self.stranica(stranice[-1].sljedeci_kursor))
+
+        self.assertEqual([len(s) for s in stranice], [20, 20, 5])
+        self.assertEqual(sum((self.ids(s) for s in stranice), []), self.redom)
+        self.assertFalse(stranice[0].ima_prethodnu)
+
+        nazad = self.stranica(stranice[2].prethodni_kursor)
+        self.assertEqual(self.ids(nazad), self.redom[20:40])
+        self.assertTrue(nazad.ima_sljedecu)
+        nazad = self.stranica(nazad.prethodni_kursor)
+        self.assertEqual(self.ids(nazad), self.redom[:20])
+        self.assertFalse(nazad.ima_prethodnu)
+
+    def test_posljednja_kao_naprijed(self):
+        kraj = self.stranica(self.stranica().zadnji_kursor)
+        self.assertEqual(self.ids(kraj), self.redom[40:])
+        self.assertTrue(kraj.ima_prethodnu)
+        self.assertFalse(kraj.ima_sljedecu)
+        self.assertEqual(
+            self.ids(self.stranica(kraj.prethodni_kursor)), self.redom[20:40]
+        )
+
+        # Bez ukupnog broja - posljednjih 20 redova
+        kraj = self.stranica(self.stranica().zadnji_kursor, ukupno=None)
+        self.assertEqual(self.ids(kraj), self.redom[25:])
+
+    def test_neispravan_kursor(self):
+        from django.core import signing
+
+        from .stranicenje import SALT
+
+        ispravan = self.stranica().sljedeci_kursor
+        for kursor in (
+            ispravan[:-2] + "xx",
+            "nije-kursor",
+            signing.dumps(["poslije", ["2025-01-01"]], salt=SALT),
+            signing.dumps(["nazad", ["2025-01-01", "1"]], salt=SALT),
+            signing.dumps(["poslije", ["nije-datum", "1"]], salt=SALT),
+        ):
+            with self.subTest(kursor=kursor):
+                stranica = self.stranica(kursor)
+                self.assertEqual(self.ids(stranica), self.redom[:20])
+                self.assertFalse(stranica.ima_prethodnu)
+
+
+# ============================================
+# POREZ I DOPRINOSI (core.tax)
+# ============================================
+
+
+def serija_prihoda(rng, godina, broj_mjeseci):
+    """{mjesec: prihod} od januara `godina`, sa praznim mjesecima"""
+    serija = {}
+    for i in range(broj_mjeseci):
+        if rng.random() < 0.15:
+            continue
+        mjesec = f"{godina + i // 12}-{i % 12 + 1:02d}"
+        serija[mjesec] = Decimal(rng.randrange(0, 2000000)) / 100
+    return serija
+
+
+def mjesecni_obracun(mjesec, prihod, tip, parametri, godisnji_prihod):
+    """Jedan mjesec po formulama iz prihodi_view prije core.tax - referenca"""
+    if tip == tax.MALI:
+        porez = prihod * parametri.stopa_mali
+    elif mjesec[5:7] == parametri.mjesec_placanja:
+        porez = godisnji_prihod * parametri.stopa_veliki
+    else:
+        porez = Decimal("0")
+    doprinos = parametri.mjesecni_doprinosi
+    return (mjesec, prihod, porez, doprinos, prihod - porez - doprinos)
+
+
+class ObracunTest(SimpleTestCase):
+    """
+    core.tax na nasumičnim serijama: isti rezultat kao mjesec-po-mjesec
+    formule, a obracunaj_sve (više serija u jednom prolazu) isto što i
+    obracunaj za svaku seriju posebno
+    """
+
+    BROJ_SERIJA = 500
+
+    def setUp(self):
+        self.rng = random.Random(0)
+        self.parametri = tax.Parametri()
+
+    def _serije(self, najvise_mjeseci):
+        for _ in range(self.BROJ_SERIJA):
+            tip = self.rng.choice((tax.MALI, tax.VELIKI))
+            godina = self.rng.randrange(2020, 2026)
+            serija = serija_prihoda(self.rng, godina, self.rng.randrange(0, najvise_mjeseci))
+            yield serija, tip, godina
+
+    @staticmethod
+    def _redovi(obracun):
+        return [
+            (r["mjesec"], r["prihod"], r["porez"], r["doprinosi"], r["neto"])
+            for r in obracun.redovi()
+        ]
+
+    def test_mjesecni_redovi_kao_referenca(self):
+        for i, (serija, tip, godina) in enumerate(self._serije(13)):
+            godisnji_prihod = sum(serija.values(), Decimal("0")) + self.rng.randrange(5000)
+            obracun = tax.obracunaj(
+                serija, tip, self.parametri, godisnji={godina: godisnji_prihod}
+            )
+            ocekivano = [
+                mjesecni_obracun(m, p, tip, self.parametri, godisnji_prihod)
+                for m, p in sorted(serija.items())
+            ]
+            with self.subTest(serija=i, tip=tip):
+                self.assertEqual(self._redovi(obracun), ocekivano)
+
+    def test_zbirovi(self):
+        for i, (serija, tip, _) in enumerate(self._serije(61)):
+            obracun = tax.obracunaj(serija, tip, self.parametri)
+            ukupno = sum(serija.values(), Decimal("0"))
+            stopa = (
+                self.parametri.stopa_mali if tip == tax.MALI else self.parametri.stopa_veliki
+            )
+            with self.subTest(serija=i, tip=tip):
+                self.assertEqual(obracun.ukupno_prihod, ukupno)
+                self.assertEqual(obracun.godisnji_porez, ukupno * stopa)
+                self.assertEqual(
+                    obracun.ukupno_doprinosi,
+                    self.parametri.mjesecni_doprinosi * len(serija),
+                )
+                self.assertEqual(
+                    obracun.ukupno_neto,
+                    obracun.ukupno_prihod - obracun.ukupno_porez - obracun.ukupno_doprinosi,
+                )
+                # Porez po godinama = zbir poreza po mjesecima svake godine
+                self.assertEqual(
+                    obracun.porez_po_godinama,
+                    tax.po_godinama(dict(zip(obracun.mjeseci, obracun.porez)))
+                    if tip == tax.MALI
+                    else {g: p * stopa for g, p in tax.po_godinama(serija).items()},
+                )
+
+    def test_obracunaj_sve_kao_pojedinacno(self):
+        serije = [
+            (serija, tip, None if self.rng.random() < 0.5 else tax.po_godinama(serija))
+            for serija, tip, _ in self._serije(61)
+        ]
+        zajedno = tax.obracunaj_sve(serije, self.parametri)
+
+        self.assertEqual(len(zajedno), len(serije))
+        for i, ((serija, tip, godisnji), obracun) in enumerate(zip(serije, zajedno)):
+            pojedinacno = tax.obracunaj(serija, tip, self.parametri, godisnji=godisnji)
+            with self.subTest(serija=i, tip=tip):
+                self.assertEqual(self._redovi(obracun), self._redovi(pojedinacno))
+                self.assertEqual(obracun.porez_po_godinama, pojedinacno.porez_po_godinama)
+
+    def test_parovi_kao_dict(self):
+        serija = serija_prihoda(self.rng, 2024, 24)
+        for tip in (tax.MALI, tax.VELIKI):
+            with self.subTest(tip=tip):
+                self.assertEqual(
+                    self._redovi(tax.obracunaj(list(serija.items()), tip, self.parametri)),
+                    self._redovi(tax.obracunaj(serija, tip, self.parametri)),
+                )
+
+
+# ============================================
+# PARSIRANJE IZVODA
+# ============================================
+
+
+class ParsiranjeStranicaTest(SimpleTestCase):
+    """Stavke traže cijeli izvod, ali se svaka stranica izvlači samo jednom"""
+
+    def test_svaka_stranica_jednom(self):
+        from io import BytesIO
+
+        from .parsers import PdfStranice, parsiraj_stranice
+        from .parsers.base import POUZDANOST_USKLADJENO
+        from .parsers.testni import generisi_izvod
+
+        for banka in ("atos", "nlb"):
+            pdf = BytesIO(generisi_izvod(banka, broj_stranica=4))
+            with PdfStranice(pdf) as stranice, mock.patch.object(
+                stranice, "_izvuci", wraps=stranice._izvuci
+            ) as izvuci:
+                rezultat = parsiraj_stranice(stranice)
+
+            with self.subTest(banka=banka):
+                self.assertEqual(rezultat["pouzdanost"], POUZDANOST_USKLADJENO)
+                self.assertEqual(len(rezultat["transakcije"]), 4 * 30)
+                self.assertEqual(
+                    sorted(poziv.args[0] for poziv in izvuci.call_args_list),
+                    [0, 1, 2, 3],
+                )
+
+
+# ============================================
+# KEŠ PARSIRANJA IZVODA (core.izvodi_cache)
+# ============================================
+
+
+class IzvodiKesTest(TestCase):
+    def setUp(self):
+        izvodi_cache._memorija.clear()
+        self.addCleanup(izvodi_cache._memorija.clear)
+
+    def test_isti_bajtovi_bez_parsera(self):
+        from .parsers.testni import generisi_izvod
+
+        pdf = generisi_izvod("nlb", broj_stranica=1)
+        with mock.patch.object(
+            izvodi_cache, "parsiraj", wraps=izvodi_cache.parsiraj
+        ) as parsiraj:
+            prvi = izvodi_cache.parsiraj_kesirano(pdf)
+            self.assertEqual(izvodi_cache.parsiraj_kesirano(pdf), prvi)
+            self.assertEqual(parsiraj.call_count, 1)
+
+            # Drugi proces (prazna memorija) - rezultat iz baze, isti tipovi
+            izvodi_cache._memorija.clear()
+            iz_baze = izvodi_cache.parsiraj_kesirano(pdf)
+            self.assertEqual(parsiraj.call_count, 1)
+            self.assertEqual(iz_baze, prvi)
+            self.assertIsInstance(iz_baze["transakcije"][0]["iznos"], Decimal)
+
+            # Nova verzija parsera ne koristi stare rezultate
+            izvodi_cache._memorija.clear()
+            with mock.patch.object(izvodi_cache, "VERZIJA_PARSERA", "test"):
+                izvodi_cache.parsiraj_kesirano(pdf)
+            self.assertEqual(parsiraj.call_count, 2)
+
+    def test_ocisti_najduze_nekoristene(self):
+        from .models import ParsiranIzvod
+
+        sada = timezone.now()
+        kb = 1024
+        # Stara verzija parsera ide prva, bez obzira na korištenje
+        ParsiranIzvod.objects.create(
+            pdf_hash="stara", verzija_parsera="0", rezultat={}, velicina=10 * kb
+        )
+        for pdf_hash, sati in (("c", 3), ("a", 5), ("e", 1), ("b", 4), ("d", 2)):
+            ParsiranIzvod.objects.create(
+                pdf_hash=pdf_hash,
+                verzija_parsera=izvodi_cache.VERZIJA_PARSERA,
+                rezultat={"transakcije": []},
+                velicina=300 * kb,
+                posljednje_koristenje=sada - timedelta(hours=sati),
+            )
+        # Čitanje osvježava korištenje - "a" više nije najduže nekorišten
+        izvodi_cache.procitaj("a")
+
+        # 1.5 MB u kešu, limit 1 MB: briše se do 90% limita
+        self.assertEqual(izvodi_cache.ocisti(max_mb=1), 2)
+        self.assertEqual(
+            sorted(ParsiranIzvod.objects.values_list("pdf_hash", flat=True)),
+            ["a", "d", "e"],
+        )
+        self.assertEqual(izvodi_cache.ocisti(max_mb=1), 0)
+
+
+# ============================================
+# IZVODI - SKLADIŠTE
+# ============================================
+
+
+class IzvodiSkladisteTest(TestCase):
+    """Izvod je po korisniku, a izvod bez novih transakcija se ne čuva"""
+
+    PDF = b"%PDF-1.4 izvod"
+
+    def setUp(self):
+        privremeni_media(self)
+        _, self.prvi = napravi_korisnika("prvi", "4400000000001")
+        _, self.drugi = napravi_korisnika("drugi", "4400000000002")
+
+    def uvezi(self, korisnik, naziv, broj=3):
+        with self.captureOnCommitCallbacks(execute=True):
+            uvoz = Uvoz(korisnik)
+            izvod = sacuvaj_izvod(self.PDF, korisnik, naziv=naziv)
+            for i in range(broj):
+                uvoz.dodaj(date(2025, 1, i + 1), 100, "prihod", f"uplata {i}", izvod)
+            return uvoz.sacuvaj()
+
+    def test_naziv_po_korisniku(self):
+        self.uvezi(self.prvi, "prvi_izvod.pdf")
+        self.uvezi(self.drugi, "drugi_izvod.pdf")
+
+        prvi = Izvod.objects.get(korisnik=self.prvi)
+        drugi = Izvod.objects.get(korisnik=self.drugi)
+        self.assertEqual(prvi.naziv, "prvi_izvod.pdf")
+        self.assertEqual(drugi.naziv, "drugi_izvod.pdf")
+        # Isti sadržaj - jedan fajl
+        self.assertEqual(prvi.fajl.name, drugi.fajl.name)
+
+    def test_samo_duplikati_bez_izvoda(self):
+        self.assertEqual(self.uvezi(self.prvi, "izvod.pdf"), 3)
+        putanja = Izvod.objects.get().fajl.name
+
+        # Ponovni uvoz (drugi naziv, isti sadržaj) ne ostavlja novi izvod
+        Prihod.objects.filter(korisnik=self.prvi).update(izvod=None)
+        Izvod.objects.all().delete()
+        self.assertEqual(self.uvezi(self.prvi, "ponovo.pdf"), 0)
+        self.assertFalse(Izvod.objects.exists())
+        self.assertFalse(default_storage.exists(putanja))
+
+    def test_fajl_ostaje_dok_ga_drugi_koristi(self):
+        self.uvezi(self.prvi, "izvod.pdf")
+        self.uvezi(self.drugi, "izvod.pdf")
+        putanja = Izvod.objects.get(korisnik=self.prvi).fajl.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Prihod.objects.filter(korisnik=self.prvi).delete()
+
+        self.assertFalse(Izvod.objects.filter(korisnik=self.prvi).exists())
+        self.assertTrue(default_storage.exists(putanja))
+
+
+class UvozBrojTest(TestCase):
+    """Broj uvezenih su redovi koje je baza stvarno upisala"""
+
+    def test_paralelni_duplikat(self):
+        _, korisnik = napravi_korisnika()
+        prvi = Uvoz(korisnik)
+        prvi.dodaj(date(2025, 3, 1), 50, "prihod", "uplata")
+        self.assertEqual(prvi.sacuvaj(), 1)
+
+        # Drugi uvoz ne vidi red prvog (upisan između provjere i upisa)
+        drugi = Uvoz(korisnik)
+        drugi.dodaj(date(2025, 3, 1), 50, "prihod", "uplata")
+        drugi.dodaj(date(2025, 3, 2), 70, "prihod", "druga uplata")
+        with mock.patch.object(drugi, "_postojeci", return_value=set()):
+            self.assertEqual(drugi.sacuvaj(), 1)
+        self.assertEqual(drugi.preskoceno, 1)
+        self.assertEqual(Prihod.objects.filter(korisnik=korisnik).count(), 2)
+
+
+class InboxZakaziTest(TestCase):
+    """Ista isporuka (Message-ID) daje jedan posao i kada je provjera zakasnila"""
+
+    def test_paralelna_isporuka(self):
+        from .inbox_queue import zakazi
+        from .models import InboxPosao
+
+        _, korisnik = napravi_korisnika()
+        prvi, kreiran = zakazi(korisnik.pk, "banka@test", "Izvod", [], "<a@b>")
+        self.assertTrue(kreiran)
+
+        # Provjera drugog requesta nije vidjela prvi posao
+        with mock.patch.object(InboxPosao.objects, "filter") as filtriraj:
+            filtriraj.return_value.first.return_value = None
+            drugi, kreiran = zakazi(korisnik.pk, "banka@test", "Izvod", [], "<a@b>")
+        self.assertFalse(kreiran)
+        self.assertEqual(drugi, prvi)
+
+        # Bez Message-ID nema provjere duplikata
+        zakazi(korisnik.pk, "banka@test", "Izvod", [])
+        zakazi(korisnik.pk, "banka@test", "Izvod", [])
+        self.assertEqual(InboxPosao.objects.filter(korisnik=korisnik).count(), 3)
+
+
+class EmailWebhookTest(TestCase):
+    """Prilozi stižu u red sa ispravnim SHA256, privremeni fajlovi se zatvaraju"""
+
+    def setUp(self):
+        cache.clear()
+        privremeni_media(self)
+        _, self.korisnik = napravi_korisnika()
+        Korisnik.objects.filter(pk=self.korisnik.pk).update(plan="Professional")
+        self.pdf = b"%PDF-1.4 izvod " + os.urandom(4096)
+        self.adresa = "test+4400000000001@primjer.cloudmailin.net"
+
+    def posalji(self, *args, **kwargs):
+        from . import inbox_queue
+
+        with mock.patch.object(
+            inbox_queue, "zakazi", wraps=inbox_queue.zakazi
+        ) as zakazi:
+            response = self.client.post("/inbox/webhook/", *args, **kwargs)
+        self.assertEqual(response.status_code, 202)
+        prilozi = zakazi.call_args.args[3]
+        self.assertTrue(prilozi)
+        self.assertTrue(all(fajl.closed for fajl in prilozi))
+        return response
+
+    def provjeri_prilog(self):
+        from .models import InboxPrilog
+
+        prilog = InboxPrilog.objects.get(posao__korisnik=self.korisnik)
+        self.assertEqual(prilog.sha256, hashlib.sha256(self.pdf).hexdigest())
+        with prilog.fajl.open("rb") as fajl:
+            self.assertEqual(fajl.read(), self.pdf)
+
+    def test_multipart(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        response = self.posalji(
+            {
+                "envelope[to]": self.adresa,
+                "envelope[from]": "izvodi@banka.test",
+                "headers[Subject]": "Izvod",
+                "attachments[0]": SimpleUploadedFile(
+                    "izvod.pdf", self.pdf, "application/pdf"
+                ),
+                "attachments[1]": SimpleUploadedFile(
+                    "potpis.txt", b"--", "text/plain"
+                ),
+            }
+        )
+        self.provjeri_prilog()
+        # I preskočeni prilog je zatvoren
+        self.assertTrue(
+            all(fajl.closed for fajl in response.wsgi_request.FILES.values())
+        )
+
+    def test_json_base64(self):
+        import base64
+        import json
+
+        sadrzaj = base64.encodebytes(self.pdf).decode()  # sa prelomima linija
+        self.posalji(
+            json.dumps(
+                {
+                    "envelope": {"to": self.adresa, "from": "izvodi@banka.test"},
+                    "headers": {"Subject": "Izvod", "Message-ID": "<x@banka>"},
+                    "attachments": [
+                        {
+                            "file_name": "izvod.pdf",
+                            "content_type": "application/pdf",
+                            "content": sadrzaj,
+                        },
+                        {
+                            "file_name": "ostecen.pdf",
+                            "content_type": "application/pdf",
+                            "content": "nije base64!",
+                        },
+                    ],
+                }
+            ),
+            content_type="application/json",
+        )
+        self.provjeri_prilog()
+
+
+# ============================================
+# MJESEČNA SALDA
+# ============================================
+
+
+class SaldaTest(TestCase):
+    def setUp(self):
+        _, self.korisnik = napravi_korisnika()
+        uvoz = Uvoz(self.korisnik)
+        for i in range(90):
+            uvoz.dodaj(date(2025, 1, 1) + timedelta(days=i), 10 + i, "prihod", f"u {i}")
+        uvoz.sacuvaj()
+        # Ručni mjesečni unos - bez datuma
+        Prihod.objects.create(
+            korisnik=self.korisnik, mjesec="2025-02", iznos=1000, vrsta="prihod"
+        )
+
+    def test_brisanje_jedno_obnavljanje(self):
+        with mock.patch.object(salda, "obnovi", wraps=salda.obnovi) as obnovi:
+            with self.captureOnCommitCallbacks(execute=True):
+                Prihod.objects.filter(korisnik=self.korisnik).exclude(
+                    datum=None
+                ).delete()
+
+        obnovi.assert_called_once_with(
+            self.korisnik.pk, {"2025-01", "2025-02", "2025-03"}
+        )
+        self.assertEqual(salda.razlike(self.korisnik.pk), [])
+
+    def test_zbir_perioda_kao_lista(self):
+        transakcije = Prihod.objects.filter(korisnik=self.korisnik).exclude(datum=None)
+        for od, do in [
+            (date(2025, 1, 1), date(2025, 3, 31)),
+            (date(2025, 1, 15), date(2025, 3, 10)),
+            (date(2025, 2, 1), None),
+            (None, date(2025, 2, 28)),
+            (None, None),
+        ]:
+            lista = transakcije
+            if od:
+                lista = lista.filter(datum__gte=od)
+            if do:
+                lista = lista.filter(datum__lte=do)
+
+            with self.subTest(od=od, do=do):
+                zbir = salda.zbir_perioda(self.korisnik, od=od, do=do)
+                self.assertEqual(zbir["broj"], lista.count())
+                self.assertEqual(
+                    zbir["prihod"], sum(p.iznos for p in lista) or Decimal("0")
+                )
+
+
+# ============================================
+# JIB KEŠ
+# ============================================
+
+
+class JibKesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_izmjena_jib_nakon_commita(self):
+        from .jib_cache import razrijesi_jib
+
+        _, korisnik = napravi_korisnika(jib="4400000000001")
+        self.assertEqual(razrijesi_jib("4400000000001")[0], korisnik.pk)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            korisnik.jib = "4400000000002"
+            korisnik.save()
+            # Prije commit-a keš još ima staru vrijednost
+            self.assertEqual(razrijesi_jib("4400000000001")[0], korisnik.pk)
+        for callback in callbacks:
+            callback()
+
+        self.assertIsNone(razrijesi_jib("4400000000001"))
+        self.assertEqual(razrijesi_jib("4400000000002")[0], korisnik.pk)
+
+
+# ============================================
+# ZIP IZVOZ FAKTURA
+# ============================================
+
+
+class FaktureZipTest(TestCase):
+    """Arhiva se šalje dok nastaje - u memoriji su samo dokumenti u obradi"""
+
+    BROJ = 24
+    # Dokument veći od svega ostalog u izvozu, pa se arhiva u memoriji vidi
+    VELICINA = 512 * 1024
+    # Fakture, upiti i centralni direktorij arhive
+    OSNOVA = 1024 * 1024
+
+    def setUp(self):
+        self.user, _ = napravi_korisnika()
+        for i in range(self.BROJ):
+            nova = NovaFaktura(
+                self.user,
+                broj_fakture=f"Z-{i}",
+                datum_izdavanja=date(2025, 1, 1),
+                primalac_naziv=KLIJENTI[i % len(KLIJENTI)],
+                status="draft",
+            )
+            nova.dodaj_stavku("Usluga", "1", "100")
+            nova.sacuvaj()
+
+    def test_vrsna_memorija_po_dokumentu(self):
+        import tracemalloc
+        import zipfile
+
+        from . import fakture_izvoz
+
+        def renderuj(faktura, stavke, oblik):
+            return os.urandom(self.VELICINA)
+
+        fakture = Faktura.objects.filter(user=self.user)
+        with mock.patch.object(fakture_izvoz, "_renderuj", renderuj):
+            with tempfile.TemporaryFile() as arhiva:
+                tracemalloc.start()
+                try:
+                    for dio in fakture_izvoz.zip_stream(fakture, "pdf", max_workers=1):
+                        arhiva.write(dio)
+                    vrsna = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+                self.assertEqual(len(zipfile.ZipFile(arhiva).namelist()), self.BROJ)
+
+        # Jedan dokument u obradi (max_workers=1) i njegove kopije u baferu
+        # ZIP-a; cijela arhiva bi bila BROJ x VELICINA
+        self.assertLess(vrsna, self.OSNOVA + 4 * self.VELICINA)
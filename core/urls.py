@@ -45,6 +45,7 @@ urlpatterns = [
     # Fakture
     path("fakture/", views.fakture_view, name="fakture"),
     path("fakture/dodaj/", views.faktura_dodaj, name="faktura_dodaj"),
+    path("fakture/izvoz/", views.fakture_izvoz_zip, name="fakture_izvoz"),
     path(
         "fakture/download/<int:faktura_id>/",
         views.download_invoice,
@@ -1,18 +1,14 @@
 from collections import defaultdict
-import re
-import PyPDF2
 from django.core.files.base import ContentFile
 from django.conf import settings
+from django.template.loader import get_template
 from django.utils import timezone
 from PIL import Image, ImageDraw, ImageFont
 from io import BytesIO
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas as pdf_canvas
 from reportlab.lib.units import cm
-from datetime import datetime, timedelta, date
-from decimal import Decimal
-import csv
-import json
+from datetime import timedelta
 
 
 def get_client_ip(request):
@@ -38,138 +34,268 @@ def formatiraj_iznos(iznos, valuta):
     return f"{iznos} {valuta}"
 
 
-def generate_invoice_doc(faktura):
-    """Generiši Word fakturu kao HTML"""
+def _redovi_fakture(stavke):
+    """
+    Redovi tabele stavki (generator). Brojevi su već stringovi (iznosi kao
+    1,234.56), pa ih šablon ne lokalizuje - isti izlaz kao ranije
+    """
+    for index, stavka in enumerate(stavke, start=1):
+        yield {
+            "rb": str(index),
+            "opis": stavka.opis,
+            "jm": stavka.jedinica_mjere,
+            "kolicina": str(stavka.kolicina),
+            "cijena": f"{stavka.cijena_po_jedinici:,.2f}",
+            "iznos": f"{stavka.ukupna_cijena:,.2f}",
+        }
 
-    # Kreiraj HTML za stavke
-    stavke_html = ""
-    # Koristimo related_name='stavke' na InvoiceItem modelu
-    stavke = faktura.stavke.all()
 
-    for index, stavka in enumerate(stavke, start=1):
-        stavke_html += f"""
-            <tr>
-                <td style="text-align: center; border: 1px solid #000; padding: 8px;">{index}.</td>
-                <td style="border: 1px solid #000; padding: 8px;">{stavka.opis}</td>
-                <td style="text-align: center; border: 1px solid #000; padding: 8px;">{stavka.jedinica_mjere}</td>
-                <td style="text-align: center; border: 1px solid #000; padding: 8px;">{stavka.kolicina}</td>
-                <td style="text-align: right; border: 1px solid #000; padding: 8px;">{stavka.cijena_po_jedinici:,.2f}</td>
-                <td style="text-align: right; border: 1px solid #000; padding: 8px;">{stavka.ukupna_cijena:,.2f}</td>
-            </tr>"""
-
-    # Osnovni HTML šablon
-    html = f"""<!DOCTYPE html>
-<html lang="sr">
-<head>
-    <meta charset="UTF-8">
-    <title>Faktura {faktura.broj_fakture}</title>
-    <style>
-        @page {{ size: A4; margin: 1.5cm; }}
-        body {{ 
-            font-family: 'DejaVu Sans', Arial, sans-serif; 
-            font-size: 10pt; 
-            line-height: 1.4; 
-            color: #333;
-        }}
-        .header {{ border-bottom: 2px solid #2563eb; padding-bottom: 10px; margin-bottom: 25px; }}
-        .company-name {{ font-size: 13pt; font-weight: bold; color: #1e40af; text-transform: uppercase; }}
-        .invoice-title {{ text-align: right; font-size: 18pt; font-weight: bold; color: #1e40af; margin: 20px 0; }}
-        .info-grid {{ width: 100%; margin-bottom: 30px; }}
-        .items-table {{ width: 100%; border-collapse: collapse; margin: 20px 0; }}
-        .items-table th {{ 
-            background-color: #f1f5f9; 
-            border: 1px solid #000; 
-            padding: 10px; 
-            font-size: 9pt;
-            text-transform: uppercase;
-        }}
-        .total-row {{ font-weight: bold; background-color: #f8fafc; font-size: 11pt; }}
-        .footer-note {{ margin-top: 40px; font-size: 8pt; color: #666; border-top: 1px solid #eee; padding-top: 10px; }}
-    </style>
-</head>
-<body>
-    <div class="header">
-        <div class="company-name">{faktura.izdavalac_naziv}</div>
-        <div>{faktura.izdavalac_adresa}, {faktura.izdavalac_mjesto}</div>
-        <div style="margin-top: 5px;">
-            {f'<strong>JIB:</strong> {faktura.izdavalac_jib} | ' if faktura.izdavalac_jib else ''}
-            {f'<strong>Bank account:</strong> {faktura.izdavalac_racun}' if faktura.izdavalac_racun else ''}
-            {f'<br><strong>IBAN:</strong> {faktura.izdavalac_iban}' if hasattr(faktura, "izdavalac_iban") and faktura.izdavalac_iban else ''}
-        </div>
-    </div>
-    
-    <div class="invoice-title">INVOICE / RAČUN br. {faktura.broj_fakture}</div>
-    
-    <table class="info-grid">
-        <tr>
-            <td style="width: 60%; vertical-align: top;">
-                <strong>BILL TO / KUPAC:</strong><br>
-                <div style="font-size: 11pt; margin-top: 5px;">
-                    <strong>{faktura.primalac_naziv}</strong><br>
-                    {faktura.primalac_adresa}<br>
-                    {faktura.primalac_mjesto}
-                    {f'<br><strong>JIB: {faktura.primalac_jib}</strong>' if faktura.primalac_jib else ''}
-                </div>
-            </td>
-            <td style="width: 40%; text-align: right; vertical-align: top;">
-                <strong>Date / Datum:</strong> {faktura.datum_izdavanja.strftime('%d.%m.%Y')}<br>
-                {f'<strong>Place / Mjesto:</strong> {faktura.mjesto_izdavanja}<br>' if faktura.mjesto_izdavanja else ''}
-                <strong>Currency / Valuta:</strong> {faktura.valuta}
-            </td>
-        </tr>
-    </table>
-    
-    <table class="items-table">
-        <thead>
-            <tr>
-                <th style="width: 5%">No.</th>
-                <th style="width: 45%">Description / Opis usluge</th>
-                <th style="width: 10%">Unit / JM</th>
-                <th style="width: 10%">Qty / Kol.</th>
-                <th style="width: 15%">Price / Cijena</th>
-                <th style="width: 15%">Total / Iznos ({faktura.valuta})</th>
-            </tr>
-        </thead>
-        <tbody>
-            {stavke_html}
-            <tr class="total-row">
-                <td colspan="5" style="text-align: right; border: 1px solid #000; padding: 10px;">
-                    TOTAL / UKUPNO ZA UPLATU:
-                </td>
-                <td style="text-align: right; border: 1px solid #000; padding: 10px; color: #1e40af;">
-                    {faktura.ukupno_sa_pdv:,.2f} {faktura.valuta}
-                </td>
-            </tr>
-        </tbody>
-    </table>
-    
-    <div style="margin-top: 20px; font-style: italic; font-size: 9pt;">
-        Napomena: PDV nije obračunat prema članu 44. stav 1. Zakona o PDV-u (Mali obveznik).<br>
-        <em>Note: VAT not charged according to local tax regulations for small businesses.</em>
-    </div>
-
-    <table style="width: 100%; margin-top: 60px;">
-        <tr>
-            <td style="width: 50%;">
-                <div style="border-top: 1px solid #000; width: 200px; text-align: center; padding-top: 5px;">
-                    Issued by / Fakturisao
-                </div>
-            </td>
-            <td style="width: 50%; text-align: right;">
-                <div style="display: inline-block; border: 1px dashed #ccc; padding: 20px; text-align: center;">
-                    L.S. / M.P.
-                </div>
-            </td>
-        </tr>
-    </table>
-
-    <div class="footer-note">
-        Generated by ePauša RS - Softver za preduzetnike
-    </div>
-</body>
-</html>"""
-
-    return html
+def generate_invoice_doc(faktura, stavke=None):
+    """
+    Generiši Word fakturu kao HTML - šablon core/faktura_dokument.html se
+    kompajlira jednom po procesu (keširani template loader), a tekst
+    korisnika se escape-uje
+    """
+    return get_template("core/faktura_dokument.html").render(
+        {
+            "faktura": faktura,
+            "redovi": _redovi_fakture(_stavke_fakture(faktura, stavke)),
+            "ukupno": f"{faktura.ukupno_sa_pdv:,.2f}",
+        }
+    )
+
+
+def _stavke_fakture(faktura, stavke):
+    if stavke is not None:
+        return stavke
+    # Koristimo related_name='stavke' na StavkaFakture modelu
+    return faktura.stavke.only(
+        "opis", "jedinica_mjere", "kolicina", "cijena_po_jedinici", "ukupna_cijena"
+    ).iterator(chunk_size=2000)
+
+
+NASLOVI_STAVKI = ("No.", "Opis usluge", "JM", "Kol.", "Cijena", "Iznos")
+
+
+def generate_invoice_docx(faktura, stavke=None):
+    """Generiši fakturu kao pravi Word (DOCX) dokument - vraća BytesIO"""
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Pt
+
+    dokument = Document()
+    stil = dokument.styles["Normal"]
+    stil.font.name = "Arial"
+    stil.font.size = Pt(10)
+
+    naslov = dokument.add_paragraph()
+    naslov.add_run(faktura.izdavalac_naziv.upper()).bold = True
+    dokument.add_paragraph(f"{faktura.izdavalac_adresa}, {faktura.izdavalac_mjesto}")
+    racuni = [
+        f"JIB: {faktura.izdavalac_jib}" if faktura.izdavalac_jib else "",
+        f"Bank account: {faktura.izdavalac_racun}" if faktura.izdavalac_racun else "",
+        f"IBAN: {faktura.izdavalac_iban}" if faktura.izdavalac_iban else "",
+    ]
+    if any(racuni):
+        dokument.add_paragraph(" | ".join(r for r in racuni if r))
+
+    broj = dokument.add_paragraph()
+    broj.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+    run = broj.add_run(f"INVOICE / RAČUN br. {faktura.broj_fakture}")
+    run.bold = True
+    run.font.size = Pt(16)
+
+    kupac = dokument.add_paragraph()
+    kupac.add_run("BILL TO / KUPAC:\n").bold = True
+    kupac.add_run(f"{faktura.primalac_naziv}\n").bold = True
+    kupac.add_run(f"{faktura.primalac_adresa}\n{faktura.primalac_mjesto}")
+    if faktura.primalac_jib:
+        kupac.add_run(f"\nJIB: {faktura.primalac_jib}")
+
+    podaci = dokument.add_paragraph()
+    podaci.add_run(f"Date / Datum: {faktura.datum_izdavanja:%d.%m.%Y}\n")
+    if faktura.mjesto_izdavanja:
+        podaci.add_run(f"Place / Mjesto: {faktura.mjesto_izdavanja}\n")
+    podaci.add_run(f"Currency / Valuta: {faktura.valuta}")
+
+    redovi = list(_redovi_fakture(_stavke_fakture(faktura, stavke)))
+    tabela = dokument.add_table(rows=len(redovi) + 2, cols=len(NASLOVI_STAVKI))
+    tabela.style = "Table Grid"
+    celije = tabela._cells  # sve ćelije odjednom - brže od .cell(i, j)
+    kolone = len(NASLOVI_STAVKI)
+    for j, tekst in enumerate(NASLOVI_STAVKI):
+        celije[j].text = tekst
+        celije[j].paragraphs[0].runs[0].bold = True
+    for i, red in enumerate(redovi, start=1):
+        vrijednosti = (
+            f"{red['rb']}.",
+            red["opis"],
+            red["jm"],
+            red["kolicina"],
+            red["cijena"],
+            red["iznos"],
+        )
+        for j, tekst in enumerate(vrijednosti):
+            celije[i * kolone + j].text = tekst
+
+    zadnji = (len(redovi) + 1) * kolone
+    ukupno = celije[zadnji].merge(celije[zadnji + kolone - 2])
+    ukupno.text = "TOTAL / UKUPNO ZA UPLATU:"
+    celije[zadnji + kolone - 1].text = f"{faktura.ukupno_sa_pdv:,.2f} {faktura.valuta}"
+    for celija in (ukupno, celije[zadnji + kolone - 1]):
+        celija.paragraphs[0].runs[0].bold = True
+
+    dokument.add_paragraph(
+        "Napomena: PDV nije obračunat prema članu 44. stav 1. Zakona o PDV-u "
+        "(Mali obveznik)."
+    ).runs[0].italic = True
+    dokument.add_paragraph("\n\nIssued by / Fakturisao ____________________")
+    dokument.add_paragraph("Generated by ePauša RS - Softver za preduzetnike")
+
+    buffer = BytesIO()
+    dokument.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def _pdf_font():
+    """(obični, bold) font za PDF - TTF iz settings.FAKTURE_PDF_FONT ima č/ć/đ"""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    putanja = getattr(settings, "FAKTURE_PDF_FONT", None)
+    putanja_bold = getattr(settings, "FAKTURE_PDF_FONT_BOLD", None) or putanja
+    if not putanja:
+        return "Helvetica", "Helvetica-Bold"
+    if "FakturaFont" not in pdfmetrics.getRegisteredFontNames():
+        try:
+            pdfmetrics.registerFont(TTFont("FakturaFont", putanja))
+            pdfmetrics.registerFont(TTFont("FakturaFont-Bold", putanja_bold))
+        except Exception as e:
+            print(f"⚠️ PDF font {putanja} nije učitan ({e}) - koristi se Helvetica")
+            return "Helvetica", "Helvetica-Bold"
+    return "FakturaFont", "FakturaFont-Bold"
+
+
+def generate_invoice_pdf(faktura, stavke=None):
+    """Generiši fakturu kao PDF (reportlab) - vraća BytesIO"""
+    from xml.sax.saxutils import escape
+
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.platypus import (
+        LongTable,
+        Paragraph,
+        SimpleDocTemplate,
+        Spacer,
+        TableStyle,
+    )
+
+    font, font_bold = _pdf_font()
+    obicno = ParagraphStyle("obicno", fontName=font, fontSize=9, leading=12)
+    jako = ParagraphStyle("jako", parent=obicno, fontName=font_bold)
+    naslov = ParagraphStyle(
+        "naslov", parent=jako, fontSize=16, leading=20, alignment=2, spaceBefore=12
+    )
+
+    def p(tekst, stil=obicno):
+        # Tekst korisnika se escape-uje - Paragraph tumači <b>, <i>...
+        return Paragraph(escape(str(tekst)), stil)
+
+    izdavalac = [
+        faktura.izdavalac_jib and f"JIB: {faktura.izdavalac_jib}",
+        faktura.izdavalac_racun and f"Bank account: {faktura.izdavalac_racun}",
+        faktura.izdavalac_iban and f"IBAN: {faktura.izdavalac_iban}",
+    ]
+    kupac = [
+        faktura.primalac_adresa,
+        faktura.primalac_mjesto,
+        faktura.primalac_jib and f"JIB: {faktura.primalac_jib}",
+    ]
+    elementi = [
+        p(faktura.izdavalac_naziv.upper(), jako),
+        p(f"{faktura.izdavalac_adresa}, {faktura.izdavalac_mjesto}"),
+        p(" | ".join(r for r in izdavalac if r)),
+        p(f"INVOICE / RAČUN br. {faktura.broj_fakture}", naslov),
+        Spacer(1, 0.4 * cm),
+        p("BILL TO / KUPAC:", jako),
+        p(faktura.primalac_naziv, jako),
+        *[p(r) for r in kupac if r],
+        Spacer(1, 0.3 * cm),
+        p(f"Date / Datum: {faktura.datum_izdavanja:%d.%m.%Y}"),
+    ]
+    if faktura.mjesto_izdavanja:
+        elementi.append(p(f"Place / Mjesto: {faktura.mjesto_izdavanja}"))
+    elementi += [p(f"Currency / Valuta: {faktura.valuta}"), Spacer(1, 0.5 * cm)]
+
+    # Opis je Paragraph (prelama se), ostale ćelije su obični stringovi
+    podaci = [list(NASLOVI_STAVKI)]
+    for red in _redovi_fakture(_stavke_fakture(faktura, stavke)):
+        podaci.append(
+            [
+                f"{red['rb']}.",
+                p(red["opis"]),
+                red["jm"],
+                red["kolicina"],
+                red["cijena"],
+                red["iznos"],
+            ]
+        )
+    podaci.append(
+        [
+            "TOTAL / UKUPNO ZA UPLATU:",
+            "",
+            "",
+            "",
+            "",
+            f"{faktura.ukupno_sa_pdv:,.2f} {faktura.valuta}",
+        ]
+    )
+    tabela = LongTable(
+        podaci,
+        colWidths=[1.2 * cm, 7.3 * cm, 1.6 * cm, 1.8 * cm, 2.5 * cm, 2.6 * cm],
+        repeatRows=1,
+    )
+    tabela.setStyle(
+        TableStyle(
+            [
+                ("FONT", (0, 0), (-1, -1), font, 9),
+                ("FONT", (0, 0), (-1, 0), font_bold, 9),
+                ("FONT", (0, -1), (-1, -1), font_bold, 10),
+                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f1f5f9")),
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("ALIGN", (3, 1), (-1, -1), "RIGHT"),
+                ("SPAN", (0, -1), (4, -1)),
+                ("ALIGN", (0, -1), (4, -1), "RIGHT"),
+            ]
+        )
+    )
+    elementi += [
+        tabela,
+        Spacer(1, 0.5 * cm),
+        p(
+            "Napomena: PDV nije obračunat prema članu 44. stav 1. Zakona o PDV-u "
+            "(Mali obveznik)."
+        ),
+        Spacer(1, 1.5 * cm),
+        p("Issued by / Fakturisao ____________________"),
+        Spacer(1, 1 * cm),
+        p("Generated by ePauša RS - Softver za preduzetnike"),
+    ]
+
+    buffer = BytesIO()
+    SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        leftMargin=1.5 * cm,
+        rightMargin=1.5 * cm,
+        topMargin=1.5 * cm,
+        bottomMargin=1.5 * cm,
+        title=f"Faktura {faktura.broj_fakture}",
+    ).build(elementi)
+    buffer.seek(0)
+    return buffer
 
 
 def generate_payment_slip_png(uplatnica, korisnik):
@@ -368,41 +494,41 @@ def draw_number_boxes(draw, text, x, y, count, width, height, font):
                 )
 
 
-def generate_bilans_csv(bilans, korisnik, prihodi):
-    """Generiši CSV bilans"""
+def generate_bilans_csv(bilans, korisnik, obracun):
+    """Generiši CSV bilans - `obracun` je core.tax.Obracun mjesečnih prihoda"""
     buffer = BytesIO()
     buffer.write("\ufeff".encode("utf-8"))
 
+    broj_mjeseci = len(obracun.mjeseci)
+
     content = f"""BILANS USPJEHA - ePauša RS
 
 Korisnik,{korisnik.ime}
 Email,{korisnik.user.email}
 Datum kreiranja,{bilans.datum_kreiranja.strftime('%d.%m.%Y')}
 Period,Od {bilans.od_mjesec} do {bilans.do_mjesec}
-Broj mjeseci,{prihodi.count()}
+Broj mjeseci,{broj_mjeseci}
 Čuva se do,{bilans.datum_isteka.strftime('%d.%m.%Y')}
 
 PRIHODI PO MJESECIMA
-Mjesec,Iznos (KM),Porez 2% (KM),Doprinosi (KM),Neto (KM)
+Mjesec,Iznos (KM),Porez (KM),Doprinosi (KM),Neto (KM)
 """
 
-    for prihod in prihodi:
-        porez = prihod.iznos * Decimal("0.02")
-        doprinosi = Decimal(str(settings.PROSJECNA_BRUTO_PLATA)) * Decimal(
-            str(settings.STOPA_DOPRINOSA)
+    for red in obracun.redovi():
+        content += (
+            f"{red['mjesec']},{red['prihod']:.2f},{red['porez']:.2f},"
+            f"{red['doprinosi']:.2f},{red['neto']:.2f}\n"
         )
-        neto = prihod.iznos - porez - doprinosi
-        content += f"{prihod.mjesec},{prihod.iznos},{porez},{doprinosi},{neto}\n"
 
     content += f"""
 REKAPITULACIJA
 Stavka,Iznos (KM)
 Ukupan prihod,{bilans.ukupan_prihod}
-Porez (2%),{bilans.porez}
-Doprinosi (70%),{bilans.doprinosi}
+Porez,{bilans.porez}
+Doprinosi,{bilans.doprinosi}
 Ukupne obaveze,{bilans.porez + bilans.doprinosi}
 Neto dohodak,{bilans.neto}
-Prosječna mjesečna zarada,{bilans.neto / prihodi.count() if prihodi.count() > 0 else 0}
+Prosječna mjesečna zarada,{bilans.neto / broj_mjeseci if broj_mjeseci else 0}
 
 Generisano,{bilans.datum_kreiranja.strftime('%d.%m.%Y %H:%M:%S')}
 Sistem,ePauša RS © 2025
@@ -422,6 +548,8 @@ Sistem,ePauša RS © 2025
 
 def generate_godisnji_izvjestaj_pdf(korisnik, godina):
     """Generiši godišnji izvještaj za PURS u PDF formatu"""
+    from . import salda, tax
+
     buffer = BytesIO()
     p = pdf_canvas.Canvas(buffer, pagesize=A4)
     width, height = A4
@@ -447,15 +575,18 @@ def generate_godisnji_izvjestaj_pdf(korisnik, godina):
     y -= 1 * cm
 
     p.setFont("Helvetica", 11)
-    prihodi = korisnik.prihodi.filter(mjesec__startswith=str(godina)).order_by("mjesec")
+    obracun = tax.obracunaj(
+        salda.po_mjesecima(korisnik, "prihod", godina=godina),
+        korisnik.tip_preduzetnika,
+        tax.Parametri.iz_sistemskih(),
+    )
 
-    ukupan_prihod = Decimal("0")
-    for prihod in prihodi:
-        p.drawString(2 * cm, y, f"{prihod.mjesec}")
-        p.drawString(10 * cm, y, f"{prihod.iznos:,.2f} KM")
-        ukupan_prihod += prihod.iznos
+    for mjesec, iznos in zip(obracun.mjeseci, obracun.prihod):
+        p.drawString(2 * cm, y, f"{mjesec}")
+        p.drawString(10 * cm, y, f"{iznos:,.2f} KM")
         y -= 0.6 * cm
 
+    ukupan_prihod = obracun.ukupno_prihod
     y -= 0.5 * cm
     p.setFont("Helvetica-Bold", 11)
     p.drawString(2 * cm, y, "UKUPAN PRIHOD:")
@@ -466,17 +597,15 @@ def generate_godisnji_izvjestaj_pdf(korisnik, godina):
     p.drawString(2 * cm, y, "II. OBAVEZE")
     y -= 1 * cm
 
-    porez = ukupan_prihod * Decimal("0.02")
-    doprinosi = (
-        Decimal(str(settings.PROSJECNA_BRUTO_PLATA)) * Decimal("0.70") * prihodi.count()
-    )
+    porez = obracun.godisnji_porez
+    doprinosi = obracun.ukupno_doprinosi
     neto = ukupan_prihod - porez - doprinosi
 
     p.setFont("Helvetica", 11)
-    p.drawString(2 * cm, y, f"Porez na dohodak (2%):")
+    p.drawString(2 * cm, y, f"Porez na dohodak:")
     p.drawString(10 * cm, y, f"{porez:,.2f} KM")
     y -= 0.7 * cm
-    p.drawString(2 * cm, y, f"Doprinosi (70%):")
+    p.drawString(2 * cm, y, f"Doprinosi:")
     p.drawString(10 * cm, y, f"{doprinosi:,.2f} KM")
     y -= 1.5 * cm
 
@@ -491,55 +620,6 @@ def generate_godisnji_izvjestaj_pdf(korisnik, godina):
     return buffer
 
 
-# ============================================
-# CHART DATA
-# ============================================
-
-
-def get_chart_data_prihodi(korisnik):
-    """Generiši podatke za Chart.js"""
-    prihodi = korisnik.prihodi.all().order_by("mjesec")
-
-    labels = [p.mjesec for p in prihodi]
-    data_prihodi = [float(p.iznos) for p in prihodi]
-    data_porez = [float(p.iznos * Decimal("0.02")) for p in prihodi]
-    data_neto = [
-        float(
-            p.iznos
-            - (p.iznos * Decimal("0.02"))
-            - (Decimal(str(settings.PROSJECNA_BRUTO_PLATA)) * Decimal("0.70"))
-        )
-        for p in prihodi
-    ]
-
-    return {
-        "labels": labels,
-        "datasets": [
-            {
-                "label": "Prihodi",
-                "data": data_prihodi,
-                "borderColor": "rgb(59, 130, 246)",
-                "backgroundColor": "rgba(59, 130, 246, 0.1)",
-                "fill": True,
-            },
-            {
-                "label": "Porez",
-                "data": data_porez,
-                "borderColor": "rgb(249, 115, 22)",
-                "backgroundColor": "rgba(249, 115, 22, 0.1)",
-                "fill": True,
-            },
-            {
-                "label": "Neto",
-                "data": data_neto,
-                "borderColor": "rgb(34, 197, 94)",
-                "backgroundColor": "rgba(34, 197, 94, 0.1)",
-                "fill": True,
-            },
-        ],
-    }
-
-
 # ============================================
 # PREDICTIVE ANALYTICS
 # ============================================
@@ -600,20 +680,19 @@ def generate_income_predictions(korisnik):
 
 
 def get_chart_data_prihodi(korisnik):
-    """Generiši podatke za Chart.js"""
-    prihodi = korisnik.prihodi.all().order_by("mjesec")
-
-    labels = [p.mjesec for p in prihodi]
-    data_prihodi = [float(p.iznos) for p in prihodi]
-    data_porez = [float(p.iznos * Decimal("0.02")) for p in prihodi]
-    data_neto = [
-        float(
-            p.iznos
-            - (p.iznos * Decimal("0.02"))
-            - (Decimal(str(settings.PROSJECNA_BRUTO_PLATA)) * Decimal("0.70"))
-        )
-        for p in prihodi
-    ]
+    """Generiši podatke za Chart.js - mjesečna salda, porez iz core.tax"""
+    from . import salda, tax
+
+    obracun = tax.obracunaj(
+        salda.po_mjesecima(korisnik, "prihod"),
+        korisnik.tip_preduzetnika,
+        tax.Parametri.iz_sistemskih(),
+    )
+
+    labels = obracun.mjeseci
+    data_prihodi = [float(i) for i in obracun.prihod]
+    data_porez = [float(p) for p in obracun.porez]
+    data_neto = [float(n) for n in obracun.neto]
 
     return {
         "labels": labels,
@@ -646,113 +725,29 @@ def get_chart_data_prihodi(korisnik):
 # ============================================
 # OCR PROCESSING
 # ============================================
-def parse_bank_statement_pdf(pdf_file):
+def parse_bank_statement_pdf(pdf_file, banka=None):
     """
-    Poboljšani parser koji koristi pdfplumber kao primarni alat za Atos i NLB.
+    Parsira izvod parserom banke prepoznate na prvoj stranici (core.parsers).
+    `banka` je rezervni podatak ako se banka ne prepozna iz samog PDF-a.
+    Rezultat se kešira po SHA256 sadržaja (core.izvodi_cache).
     """
-    import pdfplumber
-    import re
-    from decimal import Decimal
-    from datetime import datetime, date
-
-    transakcije = []
-    full_text = ""
+    from .izvodi_cache import parsiraj_kesirano
 
     try:
-        pdf_file.seek(0)
-        # Pokušavamo sa pdfplumber jer PyPDF2 često griješi kod kolona
-        with pdfplumber.open(pdf_file) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    full_text += page_text + "\n"
-
-        # Ako pdfplumber ne izvuče ništa, probaj PyPDF2 (rezervna varijanta)
-        if not full_text.strip():
-            import PyPDF2
-
-            pdf_file.seek(0)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            for page in pdf_reader.pages:
-                full_text += page.extract_text()
-
-        # --- DEBUG: Odkomentariši liniju ispod ako i dalje ne radi da vidiš šta parser vidi ---
-        # print("DEBUG TEXT:\n", full_text)
-
-        # 1. Pronalaženje datuma
-        datum_match = re.search(
-            r"(?:na dan|Datum izvoda|Datum)[:\s]+(\d{2})\.(\d{2})\.(\d{4})",
-            full_text,
-            re.IGNORECASE,
-        )
-        if not datum_match:
-            datum_match = re.search(r"(\d{2})\.(\d{2})\.(\d{4})", full_text)
-
-        datum = date.today()
-        if datum_match:
-            dan, mj, god = datum_match.groups()
-            datum = date(int(god), int(mj), int(dan))
-
-        # 2. ATOS BANKA - LOGIKA
-        # Tražimo red koji sadrži PROMET i dva decimalna broja na kraju
-        # Poboljšani regex koji ignoriše sve između riječi PROMET i cifara
-        atos_pattern = re.compile(
-            r"UKUPAN\s+PROMET.*?([\d\.,]+\.\d{2})\s+([\d\.,]+\.\d{2})",
-            re.IGNORECASE | re.DOTALL,
-        )
-
-        atos_match = atos_pattern.search(full_text)
-
-        if atos_match:
-            # Čistimo brojeve od zareza (separator hiljada)
-            val1_raw = atos_match.group(1).replace(",", "")
-            val2_raw = atos_match.group(2).replace(",", "")
-
-            rashod = Decimal(val1_raw)
-            prihod = Decimal(val2_raw)
-
-            if rashod > 0:
-                transakcije.append(
-                    {"datum": datum, "opis": "Ukupno rashodi (Atos)", "iznos": -rashod}
-                )
-            if prihod > 0:
-                transakcije.append(
-                    {"datum": datum, "opis": "Ukupno prihodi (Atos)", "iznos": prihod}
-                )
-
-            if transakcije:
-                return transakcije
-
-        # 3. NLB BANKA - LOGIKA
-        nlb_match = re.search(
-            r"(\d{1,3}(?:\.\d{3})*,\d{2})\s+(\d{1,3}(?:\.\d{3})*,\d{2})\s+\d{1,3}(?:\.\d{3})*,\d{2}\s*Ukupno duguje",
-            full_text,
-        )
-
-        if nlb_match:
-            rashod_str = nlb_match.group(1).replace(".", "").replace(",", ".")
-            prihod_str = nlb_match.group(2).replace(".", "").replace(",", ".")
-
-            rashod = Decimal(rashod_str)
-            prihod = Decimal(prihod_str)
-
-            if rashod > 0:
-                transakcije.append(
-                    {"datum": datum, "opis": "Ukupno rashodi (NLB)", "iznos": -rashod}
-                )
-            if prihod > 0:
-                transakcije.append(
-                    {"datum": datum, "opis": "Ukupno prihodi (NLB)", "iznos": prihod}
-                )
-
-            return transakcije
-
+        return parsiraj_kesirano(pdf_file, banka=banka)["transakcije"]
     except Exception as e:
         print(f"❌ Parser error: {str(e)}")
 
     return []
 
 
+def parsiraj_izvod(pdf_file, banka=None):
+    """Parsira izvod i propušta greške pozivaocu (koristi ga batch parser)"""
+    from .parsers import parsiraj
+
+    return parsiraj(pdf_file, banka=banka)["transakcije"]
+
+
 # ============================================
 # AUDIT & RATE LIMITING
 # ============================================
@@ -851,21 +846,18 @@ def generate_income_predictions(korisnik):
     return predictions
 
 
-def get_chart_data_prihodi_filtered(prihodi_queryset):
-    """Generiši chart data sa SVIM mjesecima u godini"""
-    from datetime import datetime
-
-    # Grupisanje po mjesecu
-    mjesecni_podaci = defaultdict(lambda: Decimal("0"))
-
-    for p in prihodi_queryset.filter(vrsta="prihod"):
-        mjesecni_podaci[p.mjesec] += p.iznos
-
-    if not mjesecni_podaci:
+def get_chart_data_prihodi_filtered(obracun):
+    """Chart data sa SVIM mjesecima u godini - `obracun` je core.tax.Obracun"""
+    if not obracun.mjeseci:
         return {"labels": [], "datasets": []}
 
+    po_mjesecu = {
+        m: (i, p, n)
+        for m, i, p, n in zip(obracun.mjeseci, obracun.prihod, obracun.porez, obracun.neto)
+    }
+
     # Odredi godinu (prva ili sve)
-    sve_godine = sorted(set([m.split("-")[0] for m in mjesecni_podaci.keys()]))
+    sve_godine = sorted(set([m.split("-")[0] for m in obracun.mjeseci]))
 
     labels = []
     data_prihodi = []
@@ -876,12 +868,12 @@ def get_chart_data_prihodi_filtered(prihodi_queryset):
     for godina in sve_godine:
         for mjesec in range(1, 13):
             mjesec_key = f"{godina}-{mjesec:02d}"
-            iznos = mjesecni_podaci.get(mjesec_key, Decimal("0"))
+            iznos, porez, neto = po_mjesecu.get(mjesec_key, (0, 0, 0))
 
             labels.append(mjesec_key)
             data_prihodi.append(float(iznos))
-            data_porez.append(float(iznos * Decimal("0.02")))
-            data_neto.append(float(iznos * Decimal("0.98")))
+            data_porez.append(float(porez))
+            data_neto.append(float(neto))
 
     return {
         "labels": labels,
@@ -0,0 +1,205 @@
+"""
+Masovni uvoz transakcija iz izvoda u Prihod.
+
+Svaka uvezena transakcija dobija otisak: SHA256 normalizovanog korisnika,
+datuma, iznosa, vrste, opisa i izvora. Baza drži jedinstven par
+(korisnik, otisak). Uvoz jednim indeksiranim upitom provjeri koji otisci
+već postoje i nove upiše sa bulk_create(ignore_conflicts=True), pa ni
+paralelna potvrda istog izvoda ne može napraviti duplikat; redovi koje
+je baza pri tome preskočila se nakon upisa broje kao duplikati. Obrađeni
+EmailInbox zapisi se označavaju jednim update() upitom.
+
+PDF izvoda se čuva jednom (core.izvodi_skladiste), a transakcije ga
+referenciraju. Nakon upisa se osvježavaju mjesečna salda (core.salda) i
+verzija keša dashboarda (core.dashboard_cache).
+"""
+
+import hashlib
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import salda
+from .dashboard_cache import zastarjelo
+from .izvodi_skladiste import pocisti_izvode, sacuvaj_izvod
+
+CENT = Decimal("0.01")
+
+# Izvor transakcija iz bankovnog izvoda. Upload i email inbox dijele izvor,
+# pa se isti izvod uvezen na oba načina prepoznaje kao duplikat.
+IZVOR_IZVOD = "izvod"
+
+# Broj otisaka po jednom IN upitu
+VELICINA_UPITA = 500
+
+
+def otisak_transakcije(korisnik_id, datum, iznos, vrsta, opis, izvor=IZVOR_IZVOD):
+    """SHA256 normalizovane transakcije (vrijednost Prihod.otisak)"""
+    if isinstance(datum, str):
+        datum = date.fromisoformat(datum)
+    opis = " ".join((opis or "").split()).casefold()[:500]
+    dijelovi = [
+        str(korisnik_id),
+        datum.isoformat() if datum else "",
+        str(abs(Decimal(str(iznos))).quantize(CENT)),
+        vrsta,
+        opis,
+        izvor,
+    ]
+    return hashlib.sha256("\x1f".join(dijelovi).encode("utf-8")).hexdigest()
+
+
+class Uvoz:
+    """
+    Jedan uvoz za jednog korisnika:
+
+        uvoz = Uvoz(korisnik)
+        for inbox in inboxi:
+            uvoz.dodaj_inbox(inbox)
+        broj = uvoz.sacuvaj()
+    """
+
+    def __init__(self, korisnik, izvor=IZVOR_IZVOD):
+        self.korisnik = korisnik
+        self.izvor = izvor
+        self.stavke = []  # (otisak, datum, iznos, vrsta, opis, izvod)
+        self.inbox_ids = []
+        self.preskoceno = 0
+
+    def dodaj(self, datum, iznos, vrsta, opis, izvod=None):
+        """Dodaje jednu transakciju (iznos se čuva kao apsolutna vrijednost)"""
+        iznos = abs(Decimal(str(iznos))).quantize(CENT)
+        opis = (opis or "")[:500]
+        otisak = otisak_transakcije(
+            self.korisnik.pk, datum, iznos, vrsta, opis, self.izvor
+        )
+        self.stavke.append((otisak, datum, iznos, vrsta, opis, izvod))
+
+    def dodaj_parsirano(self, transakcije, izvod=None):
+        """Transakcije iz parsera - iznos sa predznakom, rashodi negativni"""
+        for t in transakcije:
+            iznos = Decimal(str(t["iznos"]))
+            vrsta = "prihod" if iznos > 0 else "rashod"
+            self.dodaj(t["datum"], iznos, vrsta, t["opis"], izvod)
+
+    def dodaj_inbox(self, inbox):
+        """Transakcije iz EmailInbox.transakcije_json; inbox se označava obrađenim"""
+        izvod = self.izvod_inboxa(inbox) if inbox.transakcije_json else None
+        for trans in inbox.transakcije_json or []:
+            self.dodaj(
+                date.fromisoformat(trans["datum"]),
+                trans["iznos"],
+                trans["tip"],
+                trans["opis"],
+                izvod,
+            )
+        self.oznaci_obradjen(inbox)
+
+    def izvod_inboxa(self, inbox):
+        """Izvod za PDF iz inboxa - poznat hash, pa se fajl čita samo prvi put"""
+        if not inbox.pdf_fajl:
+            return None
+        try:
+            return sacuvaj_izvod(
+                inbox.pdf_fajl,
+                self.korisnik,
+                naziv=inbox.pdf_fajl.name.rsplit("/", 1)[-1],
+                sha256=inbox.pdf_hash or None,
+            )
+        finally:
+            inbox.pdf_fajl.close()
+
+    def oznaci_obradjen(self, inbox):
+        """Inbox se pri čuvanju označava obrađenim (jedan update za sve)"""
+        self.inbox_ids.append(inbox.pk)
+
+    def _postojeci(self, otisci):
+        """Otisci koji već postoje kod korisnika - indeksirani IN upit"""
+        from .models import Prihod
+
+        postojeci = set()
+        for start in range(0, len(otisci), VELICINA_UPITA):
+            postojeci.update(
+                Prihod.objects.filter(
+                    korisnik=self.korisnik,
+                    otisak__in=otisci[start : start + VELICINA_UPITA],
+                ).values_list("otisak", flat=True)
+            )
+        return postojeci
+
+    def _upisani(self, novi):
+        """
+        Redovi iz `novi` koje je bulk_create stvarno upisao. Sa
+        ignore_conflicts baza tiho preskače otiske koje je paralelni uvoz
+        upisao u međuvremenu; takav red u bazi ima tuđe datum_kreiranja.
+        """
+        from .models import Prihod
+
+        po_otisku = {p.otisak: p for p in novi}
+        upisani = []
+        otisci = list(po_otisku)
+        for start in range(0, len(otisci), VELICINA_UPITA):
+            for otisak, kreiran in Prihod.objects.filter(
+                korisnik=self.korisnik,
+                otisak__in=otisci[start : start + VELICINA_UPITA],
+            ).values_list("otisak", "datum_kreiranja"):
+                if kreiran == po_otisku[otisak].datum_kreiranja:
+                    upisani.append(po_otisku[otisak])
+        return upisani
+
+    def sacuvaj(self):
+        """Upisuje nove transakcije; vraća broj uvezenih"""
+        from .models import EmailInbox, Prihod
+
+        with transaction.atomic():
+            vidjeno = self._postojeci([stavka[0] for stavka in self.stavke])
+            novi = []
+            for otisak, datum, iznos, vrsta, opis, izvod in self.stavke:
+                if otisak in vidjeno:
+                    self.preskoceno += 1
+                    continue
+                vidjeno.add(otisak)
+
+                novi.append(
+                    Prihod(
+                        korisnik=self.korisnik,
+                        datum=datum,
+                        mjesec=datum.strftime("%Y-%m"),
+                        period=datum.replace(day=1),
+                        iznos=iznos,
+                        vrsta=vrsta,
+                        opis=opis,
+                        izvod=izvod,
+                        otisak=otisak,
+                    )
+                )
+
+            # Paralelni uvoz istog izvoda između provjere i upisa: baza
+            # odbija duplikat, a red se tiho preskače i broji kao duplikat
+            if novi:
+                Prihod.objects.bulk_create(novi, batch_size=500, ignore_conflicts=True)
+                upisani = self._upisani(novi)
+                self.preskoceno += len(novi) - len(upisani)
+                novi = upisani
+
+            # bulk_create ne šalje signale - salda uvezenih mjeseci i keš
+            # dashboarda ručno
+            if novi:
+                salda.obnovi(self.korisnik.pk, {p.mjesec for p in novi})
+            if novi or self.inbox_ids:
+                zastarjelo(self.korisnik.pk)
+
+            # Izvod čije su sve transakcije već postojale ne treba čuvati
+            izvodi = {s[5].pk for s in self.stavke if s[5]}
+            iskoristeni = {p.izvod_id for p in novi if p.izvod_id}
+            if izvodi - iskoristeni:
+                pocisti_izvode(izvodi - iskoristeni)
+
+            if self.inbox_ids:
+                EmailInbox.objects.filter(pk__in=self.inbox_ids).update(
+                    procesuirano=True, datum_odobravanja=timezone.now()
+                )
+
+        return len(novi)
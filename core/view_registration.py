@@ -54,6 +54,12 @@ def register(request):
                 'error': 'Email već postoji',
                 'selected_plan': selected_plan
             })
+
+        if Korisnik.objects.filter(jib=request.POST.get('jib')).exists():
+            return render(request, 'core/register.html', {
+                'error': 'JIB već postoji',
+                'selected_plan': selected_plan
+            })
         
         # Sačuvaj u session za Step 3
         request.session['registration_data'] = {
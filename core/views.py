@@ -1,22 +1,19 @@
-import base64
-import io
 from pyexpat.errors import messages
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout
-from django.http import JsonResponse, HttpResponse, FileResponse
-from django.conf import settings
+from django.http import JsonResponse, HttpResponse, FileResponse, Http404
 from django.db.models import Q, Sum
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from django.views.decorators.http import require_http_methods
 from django.utils.translation import activate, get_language
+from django.core.exceptions import ValidationError
 from django.core.files.base import ContentFile
-from collections import defaultdict
 from django.core.paginator import Paginator
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 from .models import *
 from .utils import (
-    generate_invoice_doc,
     generate_bilans_csv,
     generate_income_predictions,
     get_chart_data_prihodi_filtered,
@@ -25,14 +22,21 @@ from .utils import (
     check_rate_limit,
     log_audit,
     generate_godisnji_izvjestaj_pdf,
-    parse_bank_statement_pdf,
     get_client_ip,
 )
+from .izvodi_batch import parsiraj_izvode
+from . import fakture_izvoz, fakture_skladiste, salda, tax
+from .dashboard_cache import dashboard_kesirano
+from .fakture import NovaFaktura
+from .izvodi_skladiste import sacuvaj_izvod
+from .statistika import statistika_dashboarda
+from .stranicenje import csv_odgovor, kesirani_broj, stranica_po_kljucu, upit_bez
+from .uvoz import Uvoz
 import json
 
 from django.contrib import messages
 from django.db import transaction
-from .models import Faktura, StavkaFakture
+from .models import Faktura
 from datetime import date, datetime
 import re
 
@@ -237,6 +241,13 @@ def register(request):
                 {"error": "Email već postoji", "selected_plan": selected_plan},
             )
 
+        if Korisnik.objects.filter(jib=request.POST.get("jib")).exists():
+            return render(
+                request,
+                "core/register.html",
+                {"error": "JIB već postoji", "selected_plan": selected_plan},
+            )
+
         request.session["registration_data"] = {
             "ime": request.POST.get("ime"),
             "email": email,
@@ -341,6 +352,43 @@ def cancel_subscription(request):
 # ============================================
 
 
+def _dashboard_brojke(korisnik, godina_filter):
+    """Statistike, grafikon i brojači za dashboard (dio context-a koji se kešira)"""
+    # FILTRIRANE STATISTIKE (jedan upit nad mjesečnim saldima)
+    godina = None if godina_filter == "all" else int(godina_filter)
+    statistika = statistika_dashboarda(korisnik, godina)
+
+    # Porez prema tipu (core.tax)
+    obracun = tax.obracunaj(
+        statistika["prihodi"],
+        korisnik.tip_preduzetnika,
+        tax.Parametri.iz_sistemskih(SistemskiParametri.get_parametri()),
+    )
+
+    ukupan_prihod = statistika["prihod"]
+    ukupni_rashodi = statistika["rashod"]
+    porez = obracun.godisnji_porez
+
+    # Neto
+    neto = ukupan_prihod - ukupni_rashodi - porez
+
+    chart_data = get_chart_data_prihodi_filtered(obracun)
+
+    return {
+        "stats": {
+            "ukupno": ukupan_prihod,
+            "rashodi": ukupni_rashodi,
+            "porez": porez,
+            "neto": neto,
+        },
+        "chart_data": json.dumps(chart_data),
+        "inbox_count": statistika["inbox_count"],
+        "fakture_count": statistika["fakture_count"],
+        "uplatnice_count": statistika["uplatnice_count"],
+        "dostupne_godine": statistika["godine"],
+    }
+
+
 @login_required
 def dashboard(request):
     """Dashboard sa year filter - BEZ AI predikcija"""
@@ -351,84 +399,32 @@ def dashboard(request):
     trenutna_godina = timezone.now().year
 
     # Default je trenutna godina
-    if not godina_filter:
+    if not godina_filter or (godina_filter != "all" and not godina_filter.isdigit()):
         godina_filter = str(trenutna_godina)
 
-    # Subscription days left
-    if korisnik.trial_end_date:
-        days_left = (korisnik.trial_end_date - timezone.now().date()).days
-        subscription_days_left = max(0, days_left)
-    else:
-        korisnik.trial_end_date = korisnik.registrovan + timedelta(days=30)
-        korisnik.save()
-        subscription_days_left = (korisnik.trial_end_date - timezone.now().date()).days
+    # Subscription days left (GET ne mijenja korisnika)
+    trial_end = korisnik.trial_end_date or (korisnik.registrovan + timedelta(days=30))
+    subscription_days_left = max(0, (trial_end - timezone.now().date()).days)
 
     # Plan prices
     plan_prices = {"Starter": 15, "Professional": 29, "Business": 49, "Enterprise": 99}
     current_plan_price = plan_prices.get(korisnik.plan, 29)
 
-    # FILTRIRANE STATISTIKE
-    if godina_filter == "all":
-        prihodi = korisnik.prihodi.filter(vrsta="prihod")
-        rashodi = korisnik.prihodi.filter(vrsta="rashod")
-        chart_prihodi = korisnik.prihodi.all()
-    else:
-        prihodi = korisnik.prihodi.filter(vrsta="prihod", datum__year=godina_filter)
-        rashodi = korisnik.prihodi.filter(vrsta="rashod", datum__year=godina_filter)
-        chart_prihodi = korisnik.prihodi.filter(datum__year=godina_filter)
-
-    # Izračunaj ukupno
-    from django.db.models import Sum
-
-    ukupan_prihod = prihodi.aggregate(total=Sum("iznos"))["total"] or Decimal("0")
-    ukupni_rashodi = rashodi.aggregate(total=Sum("iznos"))["total"] or Decimal("0")
-
-    # Sistemski parametri
-    parametri = SistemskiParametri.get_parametri()
-
-    # Porez prema tipu
-    if korisnik.tip_preduzetnika == "veliki":
-        if godina_filter == "all" or int(godina_filter) <= trenutna_godina:
-            porez = ukupan_prihod * (
-                parametri.porez_veliki_preduzetnik / Decimal("100")
-            )
-        else:
-            porez = Decimal("0")
-    else:
-        porez = ukupan_prihod * (parametri.porez_mali_preduzetnik / Decimal("100"))
-
-    # Neto
-    neto = ukupan_prihod - ukupni_rashodi - porez
-
-    chart_data = get_chart_data_prihodi_filtered(chart_prihodi)
-
-    # Dostupne godine
-    sve_godine = korisnik.prihodi.exclude(datum=None).dates(
-        "datum", "year", order="DESC"
+    # Brojke se računaju samo kad se podaci promijene (core.dashboard_cache)
+    brojke = dashboard_kesirano(
+        korisnik.pk,
+        godina_filter,
+        lambda: _dashboard_brojke(korisnik, godina_filter),
     )
-    dostupne_godine = [d.year for d in sve_godine]
-
-    # Counts
-    inbox_count = korisnik.inbox_poruke.filter(procesuirano=False).count()
 
     context = {
         "korisnik": korisnik,
         "subscription_days_left": subscription_days_left,
         "current_plan_price": current_plan_price,
-        "stats": {
-            "ukupno": ukupan_prihod,
-            "rashodi": ukupni_rashodi,
-            "porez": porez,
-            "neto": neto,
-        },
-        "chart_data": json.dumps(chart_data),
-        "inbox_count": inbox_count,
-        "fakture_count": request.user.fakture.count(),
-        "uplatnice_count": korisnik.uplatnice.count(),
         "godina_filter": godina_filter,
-        "dostupne_godine": dostupne_godine,
         "trenutna_godina": trenutna_godina,
         "tip_preduzetnika": korisnik.tip_preduzetnika,
+        **brojke,
     }
 
     return render(request, "core/dashboard.html", context)
@@ -453,46 +449,14 @@ def inbox_confirm(request):
             messages.error(request, "❌ Nema parsovanih transakcija")
             return redirect("inbox")
 
-        # Uvezi sve transakcije
+        # Uvezi sve transakcije (bulk, duplikati se preskaču)
         with transaction.atomic():
-            imported_count = 0
-
-            for trans in inbox.transakcije_json:
-                # Konvertuj datum iz stringa
-                datum = datetime.strptime(trans["datum"], "%Y-%m-%d").date()
-                iznos = Decimal(str(abs(trans["iznos"])))
-                vrsta = trans["tip"]
-
-                # Provjeri duplikat u Prihod tabeli
-                duplikat = Prihod.objects.filter(
-                    korisnik=inbox.korisnik,
-                    datum=datum,
-                    iznos=iznos,
-                    vrsta=vrsta,
-                    opis=trans["opis"],
-                ).exists()
-
-                if duplikat:
-                    print(f"⏭️ SKIP duplikat: {trans['opis']}")
-                    continue
+            uvoz = Uvoz(inbox.korisnik)
+            uvoz.dodaj_inbox(inbox)
+            imported_count = uvoz.sacuvaj()
 
-                # Kreiraj Prihod/Rashod
-                Prihod.objects.create(
-                    korisnik=inbox.korisnik,
-                    datum=datum,
-                    mjesec=datum.strftime("%Y-%m"),
-                    iznos=iznos,
-                    vrsta=vrsta,
-                    opis=trans["opis"],
-                    izvod_fajl=inbox.pdf_fajl,
-                )
-
-                imported_count += 1
-
-            # Označi kao obrađeno
-            inbox.procesuirano = True
-            inbox.datum_odobravanja = timezone.now()
-            inbox.save()
+            if uvoz.preskoceno:
+                print(f"⏭️ SKIP {uvoz.preskoceno} duplikata")
 
             # Log
             SystemLog.objects.create(
@@ -526,43 +490,13 @@ def inbox_confirm_all(request):
         return JsonResponse({"success": False, "error": "Nema izvoda za odobrenje"})
 
     try:
-        total_imported = 0
-
-        with transaction.atomic():
-            for inbox in inbox_items:
-                if not inbox.transakcije_json:
-                    continue
-
-                for trans in inbox.transakcije_json:
-                    datum = datetime.strptime(trans["datum"], "%Y-%m-%d").date()
-                    iznos = Decimal(str(abs(trans["iznos"])))
-                    vrsta = trans["tip"]
-
-                    # Skip duplikata
-                    if Prihod.objects.filter(
-                        korisnik=korisnik,
-                        datum=datum,
-                        iznos=iznos,
-                        vrsta=vrsta,
-                        opis=trans["opis"],
-                    ).exists():
-                        continue
-
-                    Prihod.objects.create(
-                        korisnik=korisnik,
-                        datum=datum,
-                        mjesec=datum.strftime("%Y-%m"),
-                        iznos=iznos,
-                        vrsta=vrsta,
-                        opis=trans["opis"],
-                        izvod_fajl=inbox.pdf_fajl,
-                    )
+        # Svi izvodi u jednom uvozu: jedan upit za duplikate, bulk insert
+        uvoz = Uvoz(korisnik)
+        for inbox in inbox_items.only("id", "pdf_fajl", "transakcije_json"):
+            if inbox.transakcije_json:
+                uvoz.dodaj_inbox(inbox)
 
-                    total_imported += 1
-
-                inbox.procesuirano = True
-                inbox.datum_odobravanja = timezone.now()
-                inbox.save()
+        total_imported = uvoz.sacuvaj()
 
         return JsonResponse({"success": True, "count": total_imported})
 
@@ -784,15 +718,42 @@ def process_upgrade_payment(request):
 # ============================================
 
 
+def _opseg_iznosa(search):
+    """
+    Pretraga po iznosu kao opseg [od, do) umjesto LIKE nad brojem:
+    "150" -> 150.00-150.99, "150.5" -> 150.50-150.59, "150,50" -> tačno 150.50.
+    Vraća None ako pojam nije broj.
+    """
+    pojam = search.strip().replace(" ", "").replace(",", ".")
+    try:
+        iznos = Decimal(pojam)
+    except InvalidOperation:
+        return None
+    if not iznos.is_finite() or iznos < 0:
+        return None
+
+    decimale = min(max(-iznos.as_tuple().exponent, 0), 2)
+    korak = Decimal(1).scaleb(-decimale)
+    return iznos, iznos + korak
+
+
+def _opseg_godine(godina):
+    """
+    (1. januar godine, 1. januar sljedeće) za filter po datumu, ili None za
+    godinu koju date() ne može predstaviti (0, 9999 i više)
+    """
+    godina = int(godina)
+    if not 1 <= godina <= 9998:
+        return None
+    return date(godina, 1, 1), date(godina + 1, 1, 1)
+
+
 @login_required
 def prihodi_view(request):
     """Prikaz prihoda grupisanih po mjesecu sa novom logikom poreza"""
 
-    # Pronađi Korisnik objekat
-    try:
-        korisnik = Korisnik.objects.get(user=request.user)
-    except Korisnik.DoesNotExist:
-        korisnik = None
+    # Korisnik objekat (middleware, bez dodatnog upita)
+    korisnik = request.korisnik
 
     if not korisnik:
         return render(request, "core/prihodi.html", {"error": "Korisnik nije pronađen"})
@@ -800,89 +761,84 @@ def prihodi_view(request):
     # Preuzmi sistemske parametre
     parametri = SistemskiParametri.get_parametri()
 
-    # Preuzmi prihode
-    prihodi = Prihod.objects.filter(korisnik=korisnik)
-
-    # Filter po mjesecu
     mjesec_param = request.GET.get("mjesec", "")
-    if mjesec_param:
-        prihodi = prihodi.filter(mjesec__endswith=f"-{int(mjesec_param):02d}")
-
-    # Filter po godini
     godina_param = request.GET.get("godina", "")
+    if not mjesec_param.isdigit() or not 1 <= int(mjesec_param) <= 12:
+        mjesec_param = ""
+    if not godina_param.isdigit():
+        godina_param = ""
     godina_za_porez = int(godina_param) if godina_param else datetime.now().year
-
-    if godina_param:
-        prihodi = prihodi.filter(mjesec__startswith=godina_param)
-
-    # Pretraga
     search = request.GET.get("search", "")
+
     if search:
-        prihodi = prihodi.filter(Q(iznos__icontains=search) | Q(opis__icontains=search))
+        # Pretraga po transakcijama, sabrana po mjesecu u bazi
+        uslov = Q(opis__icontains=search)
+        opseg_iznosa = _opseg_iznosa(search)
+        if opseg_iznosa:
+            uslov |= Q(iznos__gte=opseg_iznosa[0], iznos__lt=opseg_iznosa[1])
+
+        prihodi = Prihod.objects.filter(uslov, korisnik=korisnik, vrsta="prihod")
+        if godina_param:
+            opseg_godine = _opseg_godine(godina_param)
+            if opseg_godine:
+                prihodi = prihodi.filter(
+                    period__gte=opseg_godine[0], period__lt=opseg_godine[1]
+                )
+            else:
+                # Kao i salda bez pretrage - takva godina nema transakcija
+                prihodi = prihodi.none()
+        if mjesec_param:
+            prihodi = prihodi.filter(period__month=int(mjesec_param))
+
+        mjesecni_podaci_dict = {
+            period.strftime("%Y-%m"): suma
+            for period, suma in prihodi.order_by()
+            .values("period")
+            .annotate(suma=Sum("iznos"))
+            .values_list("period", "suma")
+            if period
+        }
+    else:
+        # Bez pretrage - mjesečna salda, bez čitanja transakcija
+        mjesecni_podaci_dict = salda.po_mjesecima(
+            korisnik, "prihod", godina=godina_param or None
+        )
+
+        # Filter po mjesecu (u bilo kojoj godini)
+        if mjesec_param:
+            sufiks = f"-{int(mjesec_param):02d}"
+            mjesecni_podaci_dict = {
+                m: iznos
+                for m, iznos in mjesecni_podaci_dict.items()
+                if m.endswith(sufiks)
+            }
 
     # Izračunaj godišnji prihod (samo za prikaz)
-    godisnji_prihod_sve = Prihod.objects.filter(
-        korisnik=korisnik, mjesec__startswith=str(godina_za_porez), vrsta="prihod"
-    ).aggregate(total=Sum("iznos"))["total"] or Decimal("0")
+    godisnji_prihod_sve = salda.ukupno(korisnik, "prihod", godina=godina_za_porez)
 
     # Koristi TIP koji je korisnik RUČNO odabrao
     tip_preduzetnika = korisnik.tip_preduzetnika
 
-    # Odredi poresku stopu na osnovu tipa
-    if tip_preduzetnika == "veliki":
-        porez_stopa = parametri.porez_veliki_preduzetnik / Decimal("100")  # 10% -> 0.10
-    else:
-        porez_stopa = parametri.porez_mali_preduzetnik / Decimal("100")  # 2% -> 0.02
-
-    # Grupisanje po mjesecu
-    mjesecni_podaci_dict = defaultdict(lambda: Decimal("0"))
-
-    for prihod in prihodi:
-        if prihod.vrsta == "prihod":  # Samo prihodi, ne rashodi
-            mjesecni_podaci_dict[prihod.mjesec] += prihod.iznos
-
-    # Konvertuj u listu i izračunaj
-    mjesecni_podaci_lista = []
-    ukupan_prihod = Decimal("0")
-    ukupan_porez = Decimal("0")
-    ukupni_doprinosi = Decimal("0")
-
-    for mjesec_key, ukupan_prihod_mjeseca in sorted(
-        mjesecni_podaci_dict.items(), reverse=True
-    ):
-        # Doprinosi - fiksno mjesečno
-        doprinosi = parametri.mjesecni_doprinosi
-
-        # Porez se računa drugačije za male i velike preduzetnike
-        if tip_preduzetnika == "mali":
-            # Mali: 2% mjesečno
-            porez = ukupan_prihod_mjeseca * porez_stopa
-        else:
-            # Veliki: 10% godišnje, plaća se u martu
-            mjesec_broj = int(mjesec_key.split("-")[1])
-            if mjesec_broj == parametri.mjesec_placanja_poreza:  # Mart (3)
-                # U martu se plaća cijeli godišnji porez
-                porez = godisnji_prihod_sve * porez_stopa
-            else:
-                porez = Decimal("0")  # Ostali mjeseci 0
+    # Veliki plaća porez na cijeli godišnji prihod, ne samo na prikazane mjesece
+    godisnji = None
+    if tip_preduzetnika == tax.VELIKI:
+        godisnji = tax.po_godinama(salda.po_mjesecima(korisnik, "prihod"))
 
-        ukupni_rashodi = porez + doprinosi
-        neto = ukupan_prihod_mjeseca - ukupni_rashodi
+    obracun = tax.obracunaj(
+        sorted(mjesecni_podaci_dict.items()),
+        tip_preduzetnika,
+        tax.Parametri.iz_sistemskih(parametri),
+        godisnji=godisnji,
+    )
 
-        mjesecni_podaci_lista.append(
-            {
-                "mjesec": mjesec_key,
-                "prihod": ukupan_prihod_mjeseca,
-                "porez": porez,
-                "doprinosi": doprinosi,
-                "ukupni_rashodi": ukupni_rashodi,
-                "neto": neto,
-            }
-        )
+    mjesecni_podaci_lista = obracun.redovi()
+    mjesecni_podaci_lista.reverse()
+    for red in mjesecni_podaci_lista:
+        red["ukupni_rashodi"] = red["porez"] + red["doprinosi"]
 
-        ukupan_prihod += ukupan_prihod_mjeseca
-        ukupan_porez += porez
-        ukupni_doprinosi += doprinosi
+    ukupan_prihod = obracun.ukupno_prihod
+    ukupan_porez = obracun.ukupno_porez
+    ukupni_doprinosi = obracun.ukupno_doprinosi
 
     # Paginacija
     paginator = Paginator(mjesecni_podaci_lista, 25)
@@ -995,29 +951,24 @@ def inbox_confirm(request):
             messages.error(request, "Nema PDF fajla za ovaj unos.")
             return redirect("inbox")
 
-        # POZIV TVOG PARSERA IZ UTILS.PY
-        transakcije = parse_bank_statement_pdf(stavka.pdf_fajl)
+        # Parsiranje preko keša - isti PDF je već parsiran pri prijemu
+        from .izvodi_cache import parsiraj_kesirano
 
-        if transakcije:
-            with transaction.atomic():
-                for t in transakcije:
-                    iznos = Decimal(str(t["iznos"]))
-                    # Tvoj parser vraća negativne iznose za rashode
-                    vrsta = "prihod" if iznos > 0 else "rashod"
-
-                    Prihod.objects.create(
-                        korisnik=stavka.korisnik,
-                        datum=t["datum"],
-                        mjesec=t["datum"].strftime("%Y-%m"),
-                        iznos=abs(iznos),
-                        vrsta=vrsta,
-                        opis=t["opis"],
-                        izvod_fajl=stavka.pdf_fajl,  # Link ka originalu
-                    )
+        try:
+            transakcije = parsiraj_kesirano(
+                stavka.pdf_fajl, pdf_hash=stavka.pdf_hash or None
+            )["transakcije"]
+        except Exception as e:
+            print(f"❌ Parser error: {str(e)}")
+            transakcije = []
 
-                stavka.procesuirano = True
-                stavka.save()
-            messages.success(request, f"Uvezeno {len(transakcije)} transakcija!")
+        if transakcije:
+            uvoz = Uvoz(stavka.korisnik)
+            # Parser vraća negativne iznose za rashode
+            uvoz.dodaj_parsirano(transakcije, izvod=uvoz.izvod_inboxa(stavka))
+            uvoz.oznaci_obradjen(stavka)
+            broj = uvoz.sacuvaj()
+            messages.success(request, f"Uvezeno {broj} transakcija!")
         else:
             messages.error(request, "Parser nije prepoznao podatke u PDF-u.")
 
@@ -1032,6 +983,9 @@ def email_webhook(request):
     """
     CloudMailin webhook - podržava JSON i Multipart format
 
+    PDF prilozi se upisuju u red (core.inbox_queue) i odgovor je 202;
+    parsiranje radi `manage.py obradi_inbox`.
+
     Test mode: test+JIB@cloudmailin.net
     Production: JIB u Subject liniji
     """
@@ -1049,6 +1003,10 @@ def email_webhook(request):
     print("📧 EMAIL WEBHOOK AKTIVIRAN")
     print("=" * 70)
 
+    # Privremeni fajlovi priloga - zatvaraju se na kraju, i kada su
+    # preskočeni ili je došlo do greške
+    otvoreni = []
+
     try:
         # ============================================
         # PARSUJ REQUEST - JSON ili Multipart
@@ -1056,6 +1014,11 @@ def email_webhook(request):
         content_type = request.META.get("CONTENT_TYPE", "")
         print(f"Content-Type: {content_type}")
 
+        # Prilozi idu direktno na disk uz SHA256 - bez kopija u memoriji
+        from .prilozi import HashUploadHandler, base64_u_fajl
+
+        request.upload_handlers = [HashUploadHandler(request)]
+
         if "application/json" in content_type:
             # JSON format
             data = json.loads(request.body)
@@ -1078,30 +1041,29 @@ def email_webhook(request):
             )
 
             envelope = {"to": to_address, "from": from_address}
-            headers = {"Subject": subject}
+            headers = {
+                "Subject": subject,
+                "Message-ID": request.POST.get("headers[Message-ID]", ""),
+            }
 
             # Attachments iz FILES
             attachments = []
 
             for key in request.FILES:
                 file = request.FILES[key]
+                otvoreni.append(file)
 
-                # Čitaj file content
-                file_content = file.read()
-
-                # Enkoduj u base64 (kao što bi JSON radio)
-                content_base64 = base64.b64encode(file_content).decode("utf-8")
-
+                # Fajl je već na disku (HashUploadHandler) - ne čitamo ga
                 attachments.append(
                     {
                         "file_name": file.name,
                         "content_type": file.content_type,
-                        "content": content_base64,
+                        "file": file,
                     }
                 )
 
                 print(
-                    f"📎 Attachment: {file.name} ({file.content_type}, {len(file_content)} bytes)"
+                    f"📎 Attachment: {file.name} ({file.content_type}, {file.size} bytes)"
                 )
 
         else:
@@ -1179,39 +1141,36 @@ def email_webhook(request):
         # ============================================
         # PRONAĐI KORISNIKA
         # ============================================
-        try:
-            korisnik = Korisnik.objects.get(jib=jib)
-            print(f"✅ Korisnik: {korisnik.ime} (Plan: {korisnik.plan})")
+        # Keširano (core.jib_cache) - i promašaji, bez skeniranja tabele
+        from .jib_cache import razrijesi_jib
 
-        except Korisnik.DoesNotExist:
+        tenant = razrijesi_jib(jib)
+        if tenant is None:
             print(f"❌ Korisnik sa JIB {jib} ne postoji")
-
-            all_jibs = Korisnik.objects.values_list("jib", "ime")
-            print(f"\n📋 Dostupni JIB-ovi:")
-            for db_jib, ime in all_jibs:
-                print(f"   - {db_jib} ({ime})")
-
             return HttpResponse(f"User with JIB {jib} not found", status=404)
 
+        korisnik_id, plan = tenant
+        print(f"✅ Korisnik ID={korisnik_id} (Plan: {plan})")
+
         # ============================================
         # PROVJERI PLAN
         # ============================================
-        if korisnik.plan not in ["Professional", "Business", "Enterprise"]:
-            print(f"⚠️ Plan '{korisnik.plan}' ne podržava inbox")
+        if plan not in ["Professional", "Business", "Enterprise"]:
+            print(f"⚠️ Plan '{plan}' ne podržava inbox")
             return HttpResponse(
-                f"Plan '{korisnik.plan}' does not support inbox. Upgrade required.",
+                f"Plan '{plan}' does not support inbox. Upgrade required.",
                 status=403,
             )
 
         # ============================================
-        # OBRADI PDF ATTACHMENTE
+        # SAČUVAJ PDF ATTACHMENTE U RED ZA OBRADU
         # ============================================
-        pdf_count = 0
-
         if not attachments:
             print("⚠️ Nema attachmenta")
             return HttpResponse("No attachments found", status=400)
 
+        prilozi = []
+
         for attachment in attachments:
             content_type = attachment.get("content_type", "")
             filename = attachment.get("file_name", "izvod.pdf")
@@ -1223,112 +1182,53 @@ def email_webhook(request):
                 print(f"⏭️ SKIP non-PDF: {filename}")
                 continue
 
-            print(f"\n📄 PDF: {filename}")
+            pdf_fajl = attachment.get("file")
 
-            content_base64 = attachment.get("content")
+            if pdf_fajl is None:
+                # JSON format - base64 dekodiramo u fajl, chunk po chunk
+                content_base64 = attachment.get("content")
 
-            if not content_base64:
-                print("⚠️ PDF content prazan")
-                continue
-
-            try:
-                pdf_bytes = base64.b64decode(content_base64)
-                print(f"📦 Size: {len(pdf_bytes)} bytes")
-            except Exception as e:
-                print(f"❌ Base64 decode error: {str(e)}")
-                continue
-
-            # DUPLIKAT PROVJERA
-            pdf_file = io.BytesIO(pdf_bytes)
-            is_duplicate, pdf_hash = EmailInbox.check_duplicate(pdf_file, korisnik)
+                if not content_base64:
+                    print(f"⚠️ PDF content prazan: {filename}")
+                    continue
 
-            if is_duplicate:
-                print(f"⏭️ SKIP - Duplikat (hash: {pdf_hash[:16]}...)")
-                continue
+                try:
+                    pdf_fajl = base64_u_fajl(content_base64, filename)
+                except Exception as e:
+                    print(f"❌ Base64 decode error: {str(e)}")
+                    continue
+                otvoreni.append(pdf_fajl)
 
-            # Detektuj banku
-            banka = detect_bank_from_text(from_address, subject, filename)
-            print(f"🏦 Banka: {banka}")
-
-            # PARSUJ PDF
-            pdf_file = io.BytesIO(pdf_bytes)
-            from .utils import parse_bank_statement_pdf
-
-            transakcije = parse_bank_statement_pdf(pdf_file)
-
-            if not transakcije:
-                print("⚠️ Parser nije pronašao transakcije")
-                inbox = EmailInbox.objects.create(
-                    korisnik=korisnik,
-                    from_email=from_address,
-                    subject=subject,
-                    banka_naziv=banka,
-                    pdf_fajl=ContentFile(pdf_bytes, name=filename),
-                    pdf_hash=pdf_hash,
-                    transakcije_json=[],
-                    confidence=0,
-                    procesuirano=False,
-                )
-                print(f"⚠️ Inbox ID={inbox.id} (bez transakcija)")
-                pdf_count += 1
+            if not pdf_fajl.size:
+                print(f"⚠️ PDF content prazan: {filename}")
                 continue
 
-            print(f"✅ Parsirano {len(transakcije)} transakcija:")
-
-            transakcije_json = []
-            ukupno_prihodi = 0
-            ukupno_rashodi = 0
+            print(f"📄 PDF: {filename} ({pdf_fajl.size} bytes)")
+            prilozi.append(pdf_fajl)
 
-            for idx, trans in enumerate(transakcije, 1):
-                tip = "prihod" if trans["iznos"] > 0 else "rashod"
-                transakcije_json.append(
-                    {
-                        "datum": trans["datum"].strftime("%Y-%m-%d"),
-                        "opis": trans["opis"],
-                        "iznos": float(trans["iznos"]),
-                        "tip": tip,
-                    }
-                )
-
-                if trans["iznos"] > 0:
-                    ukupno_prihodi += trans["iznos"]
-                else:
-                    ukupno_rashodi += abs(trans["iznos"])
-
-                print(
-                    f"  [{idx}] {tip.upper()}: {trans['iznos']:>10.2f} KM - {trans['opis'][:50]}"
-                )
-
-            neto = ukupno_prihodi - ukupno_rashodi
-            print(f"\n💰 UKUPNO:")
-            print(f"   Prihodi:  +{ukupno_prihodi:>10.2f} KM")
-            print(f"   Rashodi:  -{ukupno_rashodi:>10.2f} KM")
-            print(f"   {'='*30}")
-            print(f"   Neto:      {neto:>10.2f} KM")
-
-            inbox = EmailInbox.objects.create(
-                korisnik=korisnik,
-                from_email=from_address,
-                subject=subject,
-                banka_naziv=banka,
-                pdf_fajl=ContentFile(pdf_bytes, name=filename),
-                pdf_hash=pdf_hash,
-                transakcije_json=transakcije_json,
-                confidence=95,
-                procesuirano=False,
-            )
+        if not prilozi:
+            print("\n⚠️ Nijedan PDF nije pronađen")
+            return HttpResponse("No valid PDFs processed", status=400)
 
-            print(f"\n✅ Inbox ID={inbox.id} za {korisnik.ime}")
-            pdf_count += 1
+        # Parsiranje radi worker (manage.py obradi_inbox) - odgovaramo odmah
+        # da spori PDF ne zadrži CloudMailin i ne izazove ponovno slanje
+        from .inbox_queue import zakazi
 
-        if pdf_count == 0:
-            print("\n⚠️ Nijedan PDF nije obrađen")
-            return HttpResponse("No valid PDFs processed", status=400)
+        posao, kreiran = zakazi(
+            korisnik_id,
+            from_address,
+            subject,
+            prilozi,
+            message_id=headers.get("Message-ID", "") or "",
+        )
 
-        print(f"\n🎉 Ukupno: {pdf_count} PDF fajlova")
+        if not kreiran:
+            print(f"⏭️ Ponovljena isporuka - posao #{posao.id} već postoji")
+        else:
+            print(f"\n📥 Posao #{posao.id}: {len(prilozi)} PDF fajlova u redu")
         print("=" * 70 + "\n")
 
-        return HttpResponse("OK", status=200)
+        return HttpResponse("Accepted", status=202)
 
     except Exception as e:
         print(f"❌ WEBHOOK ERROR: {str(e)}")
@@ -1337,27 +1237,20 @@ def email_webhook(request):
         traceback.print_exc()
         return HttpResponse("Server error", status=500)
 
+    finally:
+        # Storage je fajl premjestio; zatvaranje samo oslobađa deskriptor
+        for fajl in otvoreni:
+            fajl.close()
+
 
 def detect_bank_from_text(from_email, subject, filename=""):
     """Detektuj banku iz email podataka"""
-    text = (from_email + " " + subject + " " + filename).lower()
-
-    banks = {
-        "nlb": "NLB Banka",
-        "atos": "Atos Banka",
-        "unicredit": "UniCredit",
-        "sparkasse": "Sparkasse",
-        "raiffeisen": "Raiffeisen",
-        "komercijalna": "Komercijalna Banka",
-        "intesa": "Intesa Sanpaolo",
-        "hypo": "Hypo Alpe Adria",
-    }
+    from .parsers import prepoznaj_banku
 
-    for keyword, name in banks.items():
-        if keyword in text:
-            return name
-
-    return "Nepoznata banka"
+    return (
+        prepoznaj_banku(from_email + " " + subject + " " + filename)
+        or "Nepoznata banka"
+    )
 
 
 # ============================================
@@ -1389,9 +1282,9 @@ def faktura_dodaj(request):
             print("=" * 50 + "\n")
             # -----------------------------------
 
-            # Kreiranje fakture
-            faktura = Faktura.objects.create(
-                user=request.user,
+            # Kreiranje fakture - stavke i zbirovi se upisuju zajedno
+            nova = NovaFaktura(
+                request.user,
                 broj_fakture=request.POST.get("broj_fakture"),
                 datum_izdavanja=request.POST.get("datum_izdavanja"),
                 mjesto_izdavanja=request.POST.get("mjesto_izdavanja"),
@@ -1413,30 +1306,16 @@ def faktura_dodaj(request):
             while f"stavke[{i}][opis]" in request.POST:
                 opis = request.POST.get(f"stavke[{i}][opis]")
                 if opis and opis.strip():
-                    # Čišćenje brojeva (zarez u tačku)
-                    kol = request.POST.get(f"stavke[{i}][kolicina]", "1").replace(
-                        ",", "."
-                    )
-                    cij = request.POST.get(f"stavke[{i}][cijena]", "0").replace(
-                        ",", "."
-                    )
-
-                    StavkaFakture.objects.create(
-                        faktura=faktura,
+                    nova.dodaj_stavku(
+                        opis,
+                        kolicina=request.POST.get(f"stavke[{i}][kolicina]", "1"),
+                        cijena=request.POST.get(f"stavke[{i}][cijena]", "0"),
+                        jedinica=request.POST.get(f"stavke[{i}][jedinica]", "unit"),
                         redni_broj=i + 1,
-                        opis=opis,
-                        jedinica_mjere=request.POST.get(
-                            f"stavke[{i}][jedinica]", "unit"
-                        ),
-                        kolicina=Decimal(kol),
-                        cijena_po_jedinici=Decimal(cij),
-                        pdv_stopa=0,
                     )
                 i += 1
 
-            # 4. FINALNI KORAK - Forsiramo valutu još jednom prije kalkulacije
-            faktura.valuta = odabrana_valuta
-            faktura.izracunaj_ukupno()  # Ova metoda radi self.save()
+            faktura = nova.sacuvaj()
 
             messages.success(
                 request,
@@ -1444,6 +1323,8 @@ def faktura_dodaj(request):
             )
             return redirect("faktura_detalji", faktura_id=faktura.id)
 
+        except ValidationError as e:
+            messages.error(request, f"Greška: {' '.join(e.messages)}")
         except Exception as e:
             messages.error(request, f"Greška: {str(e)}")
 
@@ -1482,6 +1363,59 @@ def update_invoice_status(request, faktura_id):
         return JsonResponse({"success": False, "error": str(e)}, status=500)
 
 
+def _datum_filtera(vrijednost):
+    """Datum iz GET parametra (YYYY-MM-DD) - neispravan se ignoriše"""
+    try:
+        return date.fromisoformat(vrijednost)
+    except ValueError:
+        return None
+
+
+def _filtrirane_fakture(request):
+    """
+    Fakture korisnika po filterima iz GET-a (search, status, valuta, period) -
+    isti filteri za listu i za izvoz. Vraća (queryset, filteri za šablon).
+    """
+    fakture = Faktura.objects.filter(user=request.user).order_by(
+        "-datum_izdavanja", "-id"
+    )
+
+    # SEARCH LOGIKA
+    search_query = request.GET.get("search", "").strip()
+
+    if search_query:
+        fakture = fakture.filter(
+            Q(broj_fakture__icontains=search_query)
+            | Q(primalac_naziv__icontains=search_query)
+        )
+
+    # FILTER PO STATUSU
+    status_filter = request.GET.get("status", "")
+    if status_filter:
+        fakture = fakture.filter(status=status_filter)
+
+    # FILTER PO VALUTI
+    valuta_filter = request.GET.get("valuta", "")
+    if valuta_filter:
+        fakture = fakture.filter(valuta=valuta_filter)
+
+    # FILTER PO PERIODU (datum izdavanja)
+    datum_od = _datum_filtera(request.GET.get("datum_od", ""))
+    if datum_od:
+        fakture = fakture.filter(datum_izdavanja__gte=datum_od)
+    datum_do = _datum_filtera(request.GET.get("datum_do", ""))
+    if datum_do:
+        fakture = fakture.filter(datum_izdavanja__lte=datum_do)
+
+    return fakture, {
+        "search_query": search_query,
+        "status_filter": status_filter,
+        "valuta_filter": valuta_filter,
+        "datum_od": datum_od.isoformat() if datum_od else "",
+        "datum_do": datum_do.isoformat() if datum_do else "",
+    }
+
+
 @login_required
 def fakture_view(request):
     """Lista faktura + kreiranje nove + search + paginacija"""
@@ -1490,8 +1424,8 @@ def fakture_view(request):
     if request.method == "POST":
         try:
             # Osnovni podaci
-            faktura = Faktura.objects.create(
-                user=request.user,
+            nova = NovaFaktura(
+                request.user,
                 broj_fakture=request.POST.get("broj_fakture"),
                 datum_izdavanja=request.POST.get("datum_izdavanja"),
                 mjesto_izdavanja=request.POST.get("mjesto_izdavanja", ""),
@@ -1514,27 +1448,20 @@ def fakture_view(request):
             # Dodaj stavke
             i = 0
             while f"stavke[{i}][opis]" in request.POST:
-                opis = request.POST.get(f"stavke[{i}][opis]")
-                jedinica = request.POST.get(f"stavke[{i}][jedinica]", "unit")
                 kolicina_str = request.POST.get(f"stavke[{i}][kolicina]")
                 cijena_str = request.POST.get(f"stavke[{i}][cijena]")
 
-                if not kolicina_str or not cijena_str:
-                    i += 1
-                    continue
-
-                StavkaFakture.objects.create(
-                    faktura=faktura,
-                    redni_broj=i + 1,
-                    opis=opis,
-                    jedinica_mjere=jedinica,
-                    kolicina=Decimal(kolicina_str),
-                    cijena_po_jedinici=Decimal(cijena_str),
-                    pdv_stopa=0,
-                )
+                if kolicina_str and cijena_str:
+                    nova.dodaj_stavku(
+                        request.POST.get(f"stavke[{i}][opis]"),
+                        kolicina=kolicina_str,
+                        cijena=cijena_str,
+                        jedinica=request.POST.get(f"stavke[{i}][jedinica]", "unit"),
+                        redni_broj=i + 1,
+                    )
                 i += 1
 
-            faktura.izracunaj_ukupno()
+            faktura = nova.sacuvaj()
 
             messages.success(
                 request, f"Faktura {faktura.broj_fakture} je uspješno kreirana!"
@@ -1542,31 +1469,15 @@ def fakture_view(request):
 
             return redirect("download_invoice", faktura_id=faktura.id)
 
+        except ValidationError as e:
+            messages.error(request, f"Greška: {' '.join(e.messages)}")
+            return redirect("fakture")
         except Exception as e:
             messages.error(request, f"Greška: {str(e)}")
             return redirect("fakture")
 
     # GET - Prikaz liste sa search, filter i paginacijom
-    fakture = Faktura.objects.filter(user=request.user).order_by("-datum_izdavanja")
-
-    # SEARCH LOGIKA
-    search_query = request.GET.get("search", "").strip()
-
-    if search_query:
-        fakture = fakture.filter(
-            Q(broj_fakture__icontains=search_query)
-            | Q(primalac_naziv__icontains=search_query)
-        )
-
-    # FILTER PO STATUSU
-    status_filter = request.GET.get("status", "")
-    if status_filter:
-        fakture = fakture.filter(status=status_filter)
-
-    # FILTER PO VALUTI
-    valuta_filter = request.GET.get("valuta", "")
-    if valuta_filter:
-        fakture = fakture.filter(valuta=valuta_filter)
+    fakture, filteri = _filtrirane_fakture(request)
 
     # STATISTIKA (prije paginacije - ukupno sve)
     ukupno = fakture.count()
@@ -1574,35 +1485,39 @@ def fakture_view(request):
         "0"
     )
 
-    # PAGINACIJA
-    per_page = request.GET.get("per_page", "20")  # Default 20
-
-    # Ako korisnik odabere "Sve"
-    if per_page == "all":
-        paginator = None
-        page_obj = None
-        fakture_page = fakture
-    else:
-        try:
-            per_page_int = int(per_page)
-            # Ograniči na 20, 40, 100
-            if per_page_int not in [20, 40, 100]:
-                per_page_int = 20
-        except:
-            per_page_int = 20
+    # IZVOZ - sve filtrirane fakture kao CSV stream (umjesto prikaza "Sve")
+    if request.GET.get("izvoz") == "csv":
+        return csv_odgovor(
+            "fakture.csv",
+            ["Broj", "Datum izdavanja", "Primalac", "Valuta", "Ukupno", "Status"],
+            fakture.values_list(
+                "broj_fakture",
+                "datum_izdavanja",
+                "primalac_naziv",
+                "valuta",
+                "ukupno_sa_pdv",
+                "status",
+            ).iterator(chunk_size=2000),
+        )
 
-        paginator = Paginator(fakture, per_page_int)
-        page_number = request.GET.get("page", 1)
-        page_obj = paginator.get_page(page_number)
-        fakture_page = page_obj
+    # PAGINACIJA (po ključu datum_izdavanja, id - bez OFFSET-a)
+    per_page = request.GET.get("per_page", "20")  # Default 20
+    if per_page not in ("20", "40", "100"):
+        per_page = "20"
+
+    page_obj = stranica_po_kljucu(
+        fakture,
+        request.GET.get("kursor"),
+        ("-datum_izdavanja", "-id"),
+        po_stranici=int(per_page),
+        ukupno=ukupno,
+    )
 
     context = {
-        "fakture": fakture_page,
+        "fakture": page_obj,
         "page_obj": page_obj,
-        "paginator": paginator,
-        "search_query": search_query,
-        "status_filter": status_filter,
-        "valuta_filter": valuta_filter,
+        "upit": upit_bez(request.GET, "kursor", "izvoz"),
+        **filteri,
         "per_page": per_page,
         "ukupno": ukupno,
         "ukupan_iznos": ukupan_iznos,
@@ -1615,20 +1530,45 @@ def fakture_view(request):
 
 @login_required
 def download_invoice(request, faktura_id):
-    """Preuzmi fakturu kao Word (HTML) dokument"""
+    """
+    Preuzmi fakturu kao Word (HTML), DOCX ili PDF (?format=doc|docx|pdf).
+    Izdate i plaćene fakture se serviraju iz sačuvanog fajla; ponovljeno
+    preuzimanje sa If-None-Match dobija 304 bez renderovanja.
+    """
+    oblik = request.GET.get("format", "doc")
+    if oblik not in fakture_skladiste.FORMATI:
+        return HttpResponse("Nepoznat format", status=400)
+
     faktura = get_object_or_404(Faktura, id=faktura_id, user=request.user)
 
-    # Generiši Word dokument
-    from .utils import generate_invoice_doc
+    etag = fakture_skladiste.etag(faktura, oblik)
+    nije_mijenjano = get_conditional_response(request, etag=etag)
+    if nije_mijenjano is not None:
+        return nije_mijenjano
 
-    html_content = generate_invoice_doc(faktura)
+    response = FileResponse(
+        fakture_skladiste.dokument(faktura, oblik),
+        as_attachment=True,
+        filename=fakture_skladiste.naziv_fajla(faktura, oblik),
+        content_type=fakture_skladiste.FORMATI[oblik][1],
+    )
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
 
-    # Vrati kao HTML fajl (može se otvoriti u Word-u)
-    response = HttpResponse(html_content, content_type="application/msword")
-    filename = f'faktura_{faktura.broj_fakture.replace("/", "-")}.doc'
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
 
-    return response
+@login_required
+def fakture_izvoz_zip(request):
+    """
+    Sve fakture po filterima liste (search, status, valuta, period) kao ZIP
+    dokumenata (?format=doc|docx|pdf) - arhiva se šalje dok nastaje
+    """
+    oblik = request.GET.get("format", "pdf")
+    if oblik not in fakture_skladiste.FORMATI:
+        return HttpResponse("Nepoznat format", status=400)
+
+    fakture, _ = _filtrirane_fakture(request)
+    return fakture_izvoz.zip_odgovor("fakture.zip", fakture, oblik)
 
 
 # ============================================
@@ -1752,11 +1692,7 @@ def api_prihodi_za_mjesec(request):
     korisnik = request.user.korisnik
 
     # Saberi sve prihode (samo tip 'prihod', ne rashode) za taj mjesec
-    ukupan_prihod = (
-        Prihod.objects.filter(
-            korisnik=korisnik, mjesec=mjesec, vrsta="prihod"
-        ).aggregate(total=Sum("iznos"))["total"]
-    ) or Decimal("0")
+    ukupan_prihod = salda.ukupno(korisnik, "prihod", mjesec=mjesec)
 
     return JsonResponse(
         {
@@ -1858,62 +1794,66 @@ def izvodi_upload(request):
         ukupno_rashodi = Decimal("0")
         processed_count = 0
         error_count = 0
+        ukupno_duplikata = 0
 
-        for pdf_file in files:
-            try:
-                # Sačuvaj sadržaj fajla za kasnije (mora prije parsiranja)
-                file_content = pdf_file.read()
-                pdf_file.seek(0)
+        # Sadržaj fajlova čitamo u request threadu, parsiranje ide u pool
+        sadrzaji = [pdf_file.read() for pdf_file in files]
 
-                # Parsuj PDF - vraća listu transakcija
-                transakcije = parse_bank_statement_pdf(pdf_file)
+        for rezultat in parsiraj_izvode(list(enumerate(sadrzaji))):
+            naziv = files[rezultat["kljuc"]].name
 
-                print(
-                    f"\n📄 {pdf_file.name}: Dobio {len(transakcije)} transakcija od parsera"
-                )
+            if rezultat["greska"]:
+                error_count += 1
+                print(f"❌ Greška u {naziv}: {rezultat['greska']}")
+                messages.warning(request, f"Greška u {naziv}: {rezultat['greska']}")
+                continue
 
-                # Kreiraj Prihod entry za SVAKU transakciju
-                for trans in transakcije:
-                    print(f"  Procesiranje: {trans['opis']} | iznos={trans['iznos']}")
-
-                    # Odredi vrstu na osnovu znaka iznosa
-                    if trans["iznos"] > 0:
-                        # PRIHOD
-                        vrsta = "prihod"
-                        iznos_za_bazu = trans["iznos"]  # Pozitivan broj
-                        ukupno_prihodi += trans["iznos"]
-                    else:
-                        # RASHOD
-                        vrsta = "rashod"
-                        iznos_za_bazu = abs(
-                            trans["iznos"]
-                        )  # Pozitivan broj (u bazi čuvamo apsolutnu)
-                        ukupno_rashodi += abs(trans["iznos"])
-
-                    # Kreiraj u bazi
-                    prihod_obj = Prihod.objects.create(
-                        korisnik=request.user.korisnik,
-                        mjesec=trans["datum"].strftime("%Y-%m"),
-                        datum=trans["datum"],
-                        iznos=iznos_za_bazu,  # SVE POZITIVNO
-                        vrsta=vrsta,
-                        opis=trans["opis"],
-                        izvod_fajl=ContentFile(file_content, name=pdf_file.name),
-                    )
+            transakcije = rezultat["transakcije"]
+            file_content = sadrzaji[rezultat["kljuc"]]
 
-                    print(
-                        f"    ✅ Sačuvano u bazi: ID={prihod_obj.id}, vrsta={vrsta}, iznos={iznos_za_bazu}"
+            print(f"\n📄 {naziv}: Dobio {len(transakcije)} transakcija od parsera")
+
+            try:
+                # Prihod za SVAKU transakciju - već uvezene (isti otisak) se
+                # preskaču, a PDF se čuva jednom za sve transakcije. Izvod
+                # bez ijedne nove transakcije Uvoz briše u istoj transakciji.
+                with transaction.atomic():
+                    izvod = (
+                        sacuvaj_izvod(file_content, request.user.korisnik, naziv=naziv)
+                        if transakcije
+                        else None
                     )
+                    uvoz = Uvoz(request.user.korisnik)
+                    for trans in transakcije:
+                        # Parser vraća negativne iznose za rashode, u bazi čuvamo apsolutne
+                        if trans["iznos"] > 0:
+                            vrsta = "prihod"
+                            ukupno_prihodi += trans["iznos"]
+                        else:
+                            vrsta = "rashod"
+                            ukupno_rashodi += abs(trans["iznos"])
+
+                        uvoz.dodaj(
+                            trans["datum"],
+                            trans["iznos"],
+                            vrsta,
+                            trans["opis"],
+                            izvod=izvod,
+                        )
+
+                    broj = uvoz.sacuvaj()
+                print(f"    ✅ Sačuvano u bazi: {broj}, duplikata: {uvoz.preskoceno}")
+                ukupno_duplikata += uvoz.preskoceno
 
                 processed_count += 1
 
             except Exception as e:
                 error_count += 1
-                print(f"❌ Greška u {pdf_file.name}: {str(e)}")
+                print(f"❌ Greška u {naziv}: {str(e)}")
                 import traceback
 
                 traceback.print_exc()
-                messages.warning(request, f"Greška u {pdf_file.name}: {str(e)}")
+                messages.warning(request, f"Greška u {naziv}: {str(e)}")
 
         # Poruka korisniku
         if processed_count > 0:
@@ -1926,6 +1866,12 @@ def izvodi_upload(request):
                 f"📊 Neto: {neto:.2f} KM",
             )
 
+        if ukupno_duplikata > 0:
+            messages.info(
+                request,
+                f"⏭️ Preskočeno {ukupno_duplikata} već uvezenih transakcija",
+            )
+
         if error_count > 0:
             messages.warning(request, f"⚠️ {error_count} fajlova nije obrađeno")
 
@@ -1969,7 +1915,8 @@ def izvodi_pregled(request):
     transakcije = (
         Prihod.objects.filter(korisnik=request.user.korisnik)
         .exclude(datum=None)
-        .order_by("-datum")
+        .select_related("izvod")
+        .order_by("-datum", "-id")
     )
 
     # IZRAČUNAJ DATUME ZA QUICK FILTERE (NA POČETKU!)
@@ -2003,57 +1950,63 @@ def izvodi_pregled(request):
 
     # DEFAULT FILTER - Trenutna godina
     if not od_datum and not do_datum:
-        transakcije = transakcije.filter(datum__gte=ova_godina_start)
+        od, do = ova_godina_start, None
         od_datum = ova_godina_start.strftime("%Y-%m-%d")
         do_datum = None
     else:
         # Manual filter
-        if od_datum:
-            transakcije = transakcije.filter(datum__gte=od_datum)
-        if do_datum:
-            transakcije = transakcije.filter(datum__lte=do_datum)
+        try:
+            od = date.fromisoformat(od_datum) if od_datum else None
+            do = date.fromisoformat(do_datum) if do_datum else None
+        except ValueError:
+            messages.error(request, "Neispravan datum")
+            return redirect("izvodi_pregled")
 
-    # STATISTIKA
-    from django.db.models import Sum
+    if od:
+        transakcije = transakcije.filter(datum__gte=od)
+    if do:
+        transakcije = transakcije.filter(datum__lte=do)
 
-    ukupno_prihodi = (
-        transakcije.filter(vrsta="prihod").aggregate(total=Sum("iznos"))["total"] or 0
-    )
-    ukupno_rashodi = (
-        transakcije.filter(vrsta="rashod").aggregate(total=Sum("iznos"))["total"] or 0
-    )
+    # STATISTIKA - cijeli mjeseci iz salda, djelimični iz transakcija
+    zbir = salda.zbir_perioda(request.user.korisnik, od=od, do=do)
+
+    ukupno_prihodi = zbir["prihod"]
+    ukupno_rashodi = zbir["rashod"]
 
     bilans = ukupno_prihodi - ukupno_rashodi
-    ukupno_transakcija = transakcije.count()
+    ukupno_transakcija = zbir["broj"]
+
+    # IZVOZ - sve transakcije perioda kao CSV stream (umjesto prikaza "Sve")
+    if request.GET.get("izvoz") == "csv":
+        return csv_odgovor(
+            f"transakcije_{od_datum or ''}_{do_datum or ''}.csv",
+            ["Datum", "Vrsta", "Iznos", "Opis", "Izvod"],
+            transakcije.values_list(
+                "datum", "vrsta", "iznos", "opis", "izvod__naziv"
+            ).iterator(chunk_size=2000),
+        )
 
-    # PAGINACIJA
+    # PAGINACIJA (po ključu datum, id - bez OFFSET-a i COUNT-a)
     per_page = request.GET.get("per_page", "20")
-
-    if per_page == "all":
-        paginator = None
-        page_obj = None
-        transakcije_page = transakcije
-    else:
-        try:
-            per_page_int = int(per_page)
-            if per_page_int not in [20, 40, 100]:
-                per_page_int = 20
-        except:
-            per_page_int = 20
-
-        paginator = Paginator(transakcije, per_page_int)
-        page_number = request.GET.get("page", 1)
-        page_obj = paginator.get_page(page_number)
-        transakcije_page = page_obj
+    if per_page not in ("20", "40", "100"):
+        per_page = "20"
+
+    page_obj = stranica_po_kljucu(
+        transakcije,
+        request.GET.get("kursor"),
+        ("-datum", "-id"),
+        po_stranici=int(per_page),
+        ukupno=ukupno_transakcija,
+    )
 
     # RETURN
     return render(
         request,
         "core/izvodi_pregled.html",
         {
-            "transakcije": transakcije_page,
+            "transakcije": page_obj,
             "page_obj": page_obj,
-            "paginator": paginator,
+            "upit": upit_bez(request.GET, "kursor", "izvoz"),
             "per_page": per_page,
             "ukupno_prihodi": ukupno_prihodi,
             "ukupno_rashodi": ukupno_rashodi,
@@ -2085,15 +2038,15 @@ def bilans_view(request):
         od = request.POST.get("od")
         do = request.POST.get("do")
 
-        # Kalkulacije
-        prihodi = korisnik.prihodi.filter(mjesec__gte=od, mjesec__lte=do)
-        ukupan_prihod = sum([p.iznos for p in prihodi])
-        porez = ukupan_prihod * Decimal(str(settings.STOPA_POREZA))
-        doprinosi = (
-            Decimal(str(settings.PROSJECNA_BRUTO_PLATA))
-            * Decimal(str(settings.STOPA_DOPRINOSA))
-            * prihodi.count()
+        # Kalkulacije - prihodi po mjesecima iz salda
+        obracun = tax.obracunaj(
+            salda.po_mjesecima(korisnik, "prihod", od=od, do=do),
+            korisnik.tip_preduzetnika,
+            tax.Parametri.iz_sistemskih(),
         )
+        ukupan_prihod = obracun.ukupno_prihod
+        porez = obracun.godisnji_porez
+        doprinosi = obracun.ukupno_doprinosi
         neto = ukupan_prihod - porez - doprinosi
 
         bilans = Bilans.objects.create(
@@ -2106,7 +2059,7 @@ def bilans_view(request):
             neto=neto,
         )
 
-        csv_file = generate_bilans_csv(bilans, korisnik, prihodi)
+        csv_file = generate_bilans_csv(bilans, korisnik, obracun)
         bilans.fajl = csv_file
         bilans.save()
 
@@ -2146,22 +2099,28 @@ def godisnji_izvjestaj_view(request, godina=None):
 
     if not godina:
         godina = timezone.now().year - 1
+    opseg_godine = _opseg_godine(godina)
+    if not opseg_godine:
+        raise Http404("Nepostojeća godina")
 
     izvjestaj = korisnik.godisnji_izvjestaji.filter(godina=godina).first()
 
     if not izvjestaj:
-        prihodi = korisnik.prihodi.filter(mjesec__startswith=str(godina))
-        ukupan_prihod = sum([p.iznos for p in prihodi])
-        porez = ukupan_prihod * Decimal("0.02")
-        doprinosi = (
-            Decimal(str(settings.PROSJECNA_BRUTO_PLATA))
-            * Decimal("0.70")
-            * prihodi.count()
+        obracun = tax.obracunaj(
+            salda.po_mjesecima(korisnik, "prihod", godina=godina),
+            korisnik.tip_preduzetnika,
+            tax.Parametri.iz_sistemskih(),
         )
+        ukupan_prihod = obracun.ukupno_prihod
+        porez = obracun.godisnji_porez
+        doprinosi = obracun.ukupno_doprinosi
         neto = ukupan_prihod - porez - doprinosi
 
-        fakture = request.user.fakture.filter(datum__year=godina)
-        klijenti = fakture.values_list("klijent", flat=True).distinct().count()
+        fakture = request.user.fakture.filter(
+            datum_izdavanja__gte=opseg_godine[0],
+            datum_izdavanja__lt=opseg_godine[1],
+        )
+        klijenti = fakture.values_list("primalac_naziv", flat=True).distinct().count()
 
         izvjestaj = GodisnjiIzvjestaj.objects.create(
             korisnik=korisnik,
@@ -2259,7 +2218,6 @@ def admin_panel(request):
     for k in korisnici:
         if not k.trial_end_date:
             k.trial_end_date = k.registrovan + timedelta(days=30)
-            k.save()
         if today <= k.trial_end_date:
             k.je_trial = True
             k.status_label = "Trial"
@@ -2271,18 +2229,25 @@ def admin_panel(request):
             k.dani_info = "Aktivna licenca"
 
     # Logs
-    logs = SystemLog.objects.all()
+    svi_logovi = SystemLog.objects.select_related("user")
     if log_search:
         from django.db.models import Q
 
-        logs = logs.filter(
+        svi_logovi = svi_logovi.filter(
             Q(user__email__icontains=log_search)
             | Q(user__username__icontains=log_search)
             | Q(action__icontains=log_search)
             | Q(ip_address__icontains=log_search)
             | Q(details__icontains=log_search)
         )
-    logs = logs[:100]
+    logs = stranica_po_kljucu(
+        svi_logovi,
+        request.GET.get("log_kursor"),
+        ("-timestamp", "-id"),
+        po_stranici=100,
+        # Tabela logova brzo raste - broj je keširan, ne broji se po stranici
+        ukupno=lambda: kesirani_broj(svi_logovi, f"admin_logs:{log_search}"),
+    )
 
     # Failed requests
     failed = FailedRequest.objects.all()
@@ -2317,6 +2282,7 @@ def admin_panel(request):
     context = {
         "korisnici": korisnici,
         "logs": logs,
+        "log_upit": upit_bez(request.GET, "log_kursor"),
         "failed_requests": failed,
         "active_tab": tab,
         "search_query": search_query,
@@ -2473,7 +2439,7 @@ def admin_parametri_update(request):
         return JsonResponse({"error": "Unauthorized"}, status=403)
 
     if request.method == "POST":
-        parametri = SistemskiParametri.get_parametri()
+        parametri, _ = SistemskiParametri.objects.get_or_create(pk=1)
 
         # Ažuriraj vrijednosti
         parametri.mjesecni_doprinosi = Decimal(
@@ -155,6 +155,44 @@ FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10 MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10 MB
 ALLOWED_UPLOAD_EXTENSIONS = [".pdf", ".jpg", ".jpeg", ".png", ".doc", ".docx"]
 
+# ============================================
+# PARSIRANJE IZVODA
+# ============================================
+
+IZVODI_PARSER_WORKERS = min(4, os.cpu_count() or 1)  # Procesi za bulk upload
+IZVODI_PARSER_MAX_MEMORY_MB = 512  # Limit memorije po worker procesu
+IZVODI_CACHE_MAX_MB = 100  # Keš rezultata parsiranja u bazi
+IZVODI_CACHE_MEMORIJA = 256  # Broj rezultata u memoriji svakog procesa
+
+# Red za email izvode (manage.py obradi_inbox)
+INBOX_QUEUE_MAX_POKUSAJA = 5  # Nakon toga posao ide u FailedRequest
+INBOX_QUEUE_BACKOFF_SECONDS = 30  # 30s, 60s, 120s... (max 1h)
+INBOX_QUEUE_LEASE_SECONDS = 300  # Posao palog workera se vraća u red
+
+# JIB -> korisnik za dolazne emailove (core.jib_cache)
+JIB_CACHE_TTL = 3600  # Django cache, briše se pri izmjeni korisnika
+JIB_CACHE_PROMASAJ_TTL = 300  # Nepostojeći JIB-ovi
+# Memorija procesa - ostali procesi vide izmjenu korisnika tek nakon isteka
+JIB_CACHE_LOKALNO_TTL = 60
+
+# Izračunat dashboard po korisniku (core.dashboard_cache)
+DASHBOARD_CACHE_TTL = 3600  # Izmjena podataka ga odmah poništava
+
+# Sistemski parametri (core.parametri_cache)
+PARAMETRI_CACHE_LOKALNO_TTL = 5  # Memorija procesa, zatim provjera verzije
+
+# Stanje pretplate u sesiji (core.pretplata)
+PRETPLATA_SESSION_TTL = 300  # Izmjena korisnika ga odmah poništava
+
+# PDF fakture (core.utils.generate_invoice_pdf) - putanja do TTF fonta sa
+# č/ć/đ/š/ž iz okruženja (npr. DejaVuSans.ttf); bez njega se koristi Helvetica
+FAKTURE_PDF_FONT = os.environ.get("FAKTURE_PDF_FONT", "")
+FAKTURE_PDF_FONT_BOLD = os.environ.get("FAKTURE_PDF_FONT_BOLD", "")
+
+# ZIP izvoz faktura (core.fakture_izvoz)
+FAKTURE_IZVOZ_WORKERS = min(4, os.cpu_count() or 1)  # Procesi za renderovanje
+FAKTURE_IZVOZ_U_TOKU = 2  # Dokumenata u obradi po procesu (ograničava memoriju)
+
 # ============================================
 # CACHING (Optional - za production)
 # ============================================